@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from bentoctl.exceptions import InvalidBuildManifest
+from bentoctl.utils.timings import record_timings
+
+# bentos staged, built and pushed at the same time by `build-many`
+DEFAULT_BUILD_JOBS = 4
+# buildx builds running at the same time, they compete for the CPU
+DEFAULT_MAX_CONCURRENT_BUILDS = 2
+
+
+@dataclass
+class BuildEntry:
+    bento_tag: str
+    deployment_config_file: str
+    # extra `bentoctl build` options for this bento
+    args: t.List[str] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return f"{self.bento_tag} ({self.deployment_config_file})"
+
+
+def _get_args(value: t.Any, where: str) -> t.List[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(a, str) for a in value):
+        raise InvalidBuildManifest(f"{where}: 'args' must be a list of strings.")
+    return value
+
+
+def load_build_manifest(manifest_path: str) -> t.List[BuildEntry]:
+    """
+    Loads the builds from a manifest like
+
+        args: [--incremental]  # for every build
+        builds:
+          - bento_tag: iris_classifier:latest
+            deployment_config_file: iris/deployment_config.yaml
+            args: [--model-layers]
+
+    Deployment config paths are relative to the manifest.
+    """
+    import yaml
+
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise InvalidBuildManifest(f"Unable to read {manifest_path}: {e}")
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("builds"), list):
+        raise InvalidBuildManifest(f"{manifest_path} must have a list of 'builds'.")
+    common_args = _get_args(manifest.get("args"), manifest_path)
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    entries = []
+    for i, build in enumerate(manifest["builds"]):
+        where = f"{manifest_path}: builds[{i}]"
+        if not isinstance(build, dict) or not build.get("bento_tag"):
+            raise InvalidBuildManifest(f"{where} must have a 'bento_tag'.")
+        deployment_config_file = build.get(
+            "deployment_config_file", "deployment_config.yaml"
+        )
+        entries.append(
+            BuildEntry(
+                bento_tag=str(build["bento_tag"]),
+                deployment_config_file=os.path.normpath(
+                    os.path.join(manifest_dir, deployment_config_file)
+                ),
+                args=[*common_args, *_get_args(build.get("args"), where)],
+            )
+        )
+    return entries
+
+
+def run_builds(
+    builds: t.List[t.Tuple[BuildEntry, t.Callable[[], t.Any]]],
+    max_workers: int = DEFAULT_BUILD_JOBS,
+) -> t.List[t.Dict[str, t.Any]]:
+    """
+    Calls the function of every (entry, build function) in builds on a bounded
+    thread pool and returns the result of each one, in order, as a dict with
+    the `entry`, its `status` ("ok" or "failed"), the `error` and the `timings`
+    of its spans. A failed build doesn't stop the others.
+    """
+
+    def run(entry: BuildEntry, build_func: t.Callable[[], t.Any]):
+        result = {"entry": entry, "status": "ok", "error": None}
+        with record_timings(f"build {entry.name}") as timings:
+            try:
+                build_func()
+            except Exception as e:  # pylint: disable=broad-except
+                result["status"] = "failed"
+                result["error"] = f"{type(e).__name__}: {e}"
+        result["timings"] = timings
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda build: run(*build), builds))
@@ -1,43 +1,170 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import json
 import logging
 import os
+import sys
 import typing as t
 
 import click
 
 from bentoctl import __version__
-from bentoctl.cli.interactive import deployment_config_builder
+from bentoctl.build_manifest import (
+    DEFAULT_BUILD_JOBS,
+    DEFAULT_MAX_CONCURRENT_BUILDS,
+)
+from bentoctl.cli.cache_management import get_cache_management_subcommands
 from bentoctl.cli.operator_management import get_operator_management_subcommands
-from bentoctl.cli.utils import BentoctlCommandGroup, handle_bentoctl_exceptions
+from bentoctl.cli.utils import (
+    BentoctlCommandGroup,
+    handle_bentoctl_exceptions,
+    record_command_timings,
+)
 from bentoctl.console import (
     console,
+    live_display_disabled,
     print_generated_files_list,
     print_post_build_help_message,
     prompt_user_for_filename,
 )
-from bentoctl.deployment_config import DeploymentConfig
-from bentoctl.docker_utils import (
-    generate_deployable_container,
-    push_docker_image_to_repository,
-    tag_docker_image,
-)
 from bentoctl.utils import is_debug_mode
+from bentoctl.utils.build_fingerprint import (
+    compute_build_fingerprint,
+    get_build_record_path,
+    load_build_record,
+    save_build_record,
+)
+from bentoctl.utils.concurrency import run_in_background
+from bentoctl.utils.staging import (
+    STAGING_STRATEGIES,
+    STAGING_STRATEGY_AUTO,
+    STAGING_STRATEGY_ENV_VAR,
+)
+from bentoctl.utils.staging_cache import STAGING_CACHE_ENV_VAR
 from bentoctl.utils.terraform import (
+    PROVIDER_MIRROR_ENV_VAR,
     is_terraform_applied,
     terraform_apply,
     terraform_destroy,
 )
+from bentoctl.utils.timings import span
+from bentoctl.validation import DEFAULT_DEPLOYMENT_CONFIG_PATTERN
+
+# NOTE: bentoml, docker and cerberus are expensive to import. Modules that
+# depend on them (deployment_config, docker_utils, cli.interactive) are imported
+# inside the commands that need them so that `bentoctl --help`, `--version` and
+# shell completions don't pay for them.
 
 logger = logging.getLogger(__name__)
-try:
-    from bentoml_cli.utils import validate_container_tag
-except ImportError:
-    logger.warning(
-        "'bentoml._internal.utils.docker.validate_tag' not imported. "
-        "Validation dissabled."
+
+
+def validate_container_tag(ctx, param, value):
+    """
+    Lazily resolved wrapper around bentoml_cli's container tag validation.
+    """
+    if not value:
+        return value
+    try:
+        from bentoml_cli.utils import validate_container_tag as _validate
+    except ImportError:
+        logger.warning(
+            "'bentoml_cli.utils.validate_container_tag' not imported. "
+            "Validation dissabled."
+        )
+        return value
+    return _validate(ctx, param, value)
+
+
+def _create_repository(deployment_config):
+    with span("create_repository"):
+        repository = deployment_config.create_repository()
+    console.print(f"Created the repository {deployment_config.repository_name}")
+    return repository
+
+
+def _wait_for_repository(repository_future):
+    with span("wait_for_repository"):
+        return repository_future.result()
+
+
+def _push_image(
+    local_docker_tag, repository_image_tag, username, password, previous_image_tags
+) -> str | None:
+    """
+    Tags and pushes the local image, unless the repository already has all of
+    its layers and the image itself. Returns the digest of the pushed image.
+    """
+    from bentoctl.docker_utils import (
+        plan_image_push,
+        push_docker_image_to_repository,
+        tag_docker_image,
     )
-    validate_container_tag = None
+
+    with span("tag_docker_image"):
+        tag_docker_image(local_docker_tag, repository_image_tag)
+    with span("check_registry_layers"):
+        push_plan = plan_image_push(
+            local_docker_tag,
+            repository_image_tag,
+            username=username,
+            password=password,
+            previous_image_tags=previous_image_tags,
+        )
+    if push_plan is not None:
+        if push_plan.image_digest:
+            console.print(
+                f"[green]{repository_image_tag} is already in the repository, "
+                "skipping push[/]"
+            )
+            return push_plan.image_digest
+        console.print(push_plan.summary())
+    with span("push_docker_image"):
+        return push_docker_image_to_repository(
+            repository=repository_image_tag, username=username, password=password
+        )
+
+
+def _reuse_previous_build(
+    deployment_config, local_docker_tag, record, repository
+) -> bool:
+    """
+    Points the deployment config at the image from the previous build if it is
+    still in the repository, pushing it again from the local image if only that
+    one is left. Returns False if the image has to be rebuilt.
+    """
+    from bentoctl.docker_utils import get_local_image_id, get_registry_image_digest
+
+    repository_url, username, password = repository
+    repository_image_tag = deployment_config.generate_docker_image_tag(repository_url)
+    if repository_image_tag != record.get("repository_image_tag"):
+        return False
+
+    repository_digest = record.get("repository_digest")
+    with span("check_registry_image"):
+        is_in_registry = repository_digest is not None and repository_digest == (
+            get_registry_image_digest(repository_image_tag, username, password)
+        )
+    if is_in_registry:
+        console.print(f"[green]Build is up to date, using {repository_image_tag}[/]")
+        return True
+
+    image_id = record.get("image_id")
+    if image_id is not None and image_id == get_local_image_id(local_docker_tag):
+        console.print(
+            f"[green]Build is up to date, pushing the existing image "
+            f"{local_docker_tag}[/]"
+        )
+        _push_image(
+            local_docker_tag,
+            repository_image_tag,
+            username,
+            password,
+            previous_image_tags=[repository_image_tag],
+        )
+        return True
+    return False
 
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
@@ -77,6 +204,8 @@ def init(save_path, do_not_generate):
     """
     Start the interactive deployment config builder file.
     """
+    from bentoctl.cli.interactive import deployment_config_builder
+
     deployment_config = deployment_config_builder()
     deployment_config_filname = prompt_user_for_filename()
 
@@ -97,8 +226,10 @@ def init(save_path, do_not_generate):
     console.print("[green]deployment config generated to: " f"{relative_path}[/]")
 
     if not do_not_generate:
-        generated_files = deployment_config.generate(destination_dir=save_path)
-        print_generated_files_list(generated_files)
+        generated_files, unchanged_files = deployment_config.generate(
+            destination_dir=save_path
+        )
+        print_generated_files_list(generated_files, unchanged_files)
     return deployment_config
 
 
@@ -126,14 +257,89 @@ def generate(deployment_config_file, values_only, save_path):
     """
     Generate template files for deployment.
     """
+    from bentoctl.deployment_config import DeploymentConfig
+
     deployment_config = DeploymentConfig.from_file(deployment_config_file)
-    generated_files = deployment_config.generate(
+    generated_files, unchanged_files = deployment_config.generate(
         destination_dir=save_path, values_only=values_only
     )
-    print_generated_files_list(generated_files)
+    print_generated_files_list(generated_files, unchanged_files)
     return deployment_config
 
 
+@bentoctl.command()
+@click.argument("paths", nargs=-1, required=True)
+@click.option(
+    "--pattern",
+    default=DEFAULT_DEPLOYMENT_CONFIG_PATTERN,
+    show_default=True,
+    help="Filename pattern used to find deployment config files in directories.",
+)
+@click.option(
+    "--output",
+    "-o",
+    default="text",
+    type=click.Choice(["text", "json", "junit"]),
+    help="Format of the validation report.",
+)
+@click.option(
+    "--output-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the report to this file instead of stdout.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of processes used for validation, defaults to the number of CPUs.",
+)
+@handle_bentoctl_exceptions
+def validate(paths, pattern, output, output_file, jobs):
+    """
+    Validate deployment config files.
+
+    PATHS can be deployment config files, directories (searched recursively for
+    files matching --pattern) or glob patterns. Exits with a non-zero code if any
+    of the deployment configs are invalid.
+    """
+    from bentoctl.validation import (
+        find_deployment_config_files,
+        generate_json_report,
+        generate_junit_report,
+        validate_deployment_config_files,
+    )
+
+    files = find_deployment_config_files(paths, pattern=pattern)
+    results = validate_deployment_config_files(files, max_workers=jobs)
+    invalid_results = [r for r in results if not r["valid"]]
+
+    if output == "text":
+        for result in invalid_results:
+            console.print(f"[red]{result['path']}[/]")
+            for error in result["errors"]:
+                console.print(f"  {error}")
+        console.print(
+            f"Validated {len(results)} deployment configs, "
+            f"{len(invalid_results)} invalid."
+        )
+    else:
+        report = (
+            generate_json_report(results)
+            if output == "json"
+            else generate_junit_report(results)
+        )
+        if output_file is not None:
+            with open(output_file, "w", encoding="utf-8") as f:
+                f.write(report)
+        else:
+            click.echo(report)
+
+    if invalid_results:
+        sys.exit(1)
+
+
 @bentoctl.command()
 @click.option(
     "--bento-tag", "-b", help="Bento tag to use for deployment.", required=True
@@ -237,8 +443,91 @@ def generate(deployment_config_file, values_only, save_path):
     default=None,
     help="Set the target build stage to build.",
 )
+@click.option(
+    "--staging-strategy",
+    type=click.Choice(STAGING_STRATEGIES),
+    default=STAGING_STRATEGY_AUTO,
+    envvar=STAGING_STRATEGY_ENV_VAR,
+    show_default=True,
+    help="How bento and model files are placed into the build staging directory. "
+    "'reflink' uses copy-on-write clones, 'hardlink' links the files (they must "
+    "not be modified by the operator) and 'auto' tries reflinks. All of them "
+    "fall back to copying when links are not supported.",
+)
+@click.option(
+    "--staging-cache/--no-staging-cache",
+    default=False,
+    envvar=STAGING_CACHE_ENV_VAR,
+    help="Stage the bento and models through the content-addressed cache in "
+    "BENTOCTL_HOME, so building the same bento again (eg. for another operator) "
+    "reuses the cached files. Cached files are hardlinked unless another "
+    "--staging-strategy is set. Clean up with 'bentoctl cache prune'.",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Record a fingerprint of the bento, operator, spec and build options "
+    "next to the deployment config, and skip building and pushing when they are "
+    "unchanged and the previously pushed image still exists.",
+)
+@click.option(
+    "--push-to-repository",
+    is_flag=True,
+    default=False,
+    help="Create the repository before building and let buildx push the image "
+    "straight to it with the operator's credentials, instead of loading the "
+    "image into the local docker daemon and pushing it from there.",
+)
+@click.option(
+    "--push-to",
+    multiple=True,
+    default=[],
+    help="Also push the image to this destination (a full image name, eg. "
+    "'ghcr.io/org/app:v1'), with the credentials from the docker config. "
+    "Can be set multiple times, the destinations are pushed concurrently.",
+)
+@click.option(
+    "--registry-cache",
+    is_flag=True,
+    default=False,
+    help="Import and export the build cache from/to the operator's repository "
+    "(as the ':buildcache' tag), so builds on fresh machines reuse the layers of "
+    "previous builds. Requires a buildx builder that supports cache export, eg. "
+    "the docker-container driver.",
+)
+@click.option(
+    "--local-cache",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Import and export the build cache from/to this directory, eg. on "
+    "self-hosted CI runners. Requires a buildx builder that supports cache "
+    "export, eg. the docker-container driver.",
+)
+@click.option(
+    "--model-layers",
+    is_flag=True,
+    default=False,
+    help="Copy each model into the image in its own layer, before the rest of "
+    "the bento, so code changes don't rebuild and re-push the model layers. "
+    "Requires a Dockerfile frontend that supports 'COPY --link'.",
+)
+@click.option(
+    "--timings-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the time spent in each phase of the build to this file as JSON.",
+)
 @handle_bentoctl_exceptions
-def build(
+@record_command_timings("build")
+def build(**kwargs):
+    """
+    Build the Docker image for the given deployment config file and bento.
+    """
+    return _build_deployment(**kwargs)
+
+
+def _build_deployment(
     bento_tag: str,
     docker_image_tag: list[str],
     deployment_config_file: str,
@@ -257,13 +546,37 @@ def build(
     pull: bool,
     push: bool,
     target: str,
+    staging_strategy: str,
+    staging_cache: bool,
+    incremental: bool,
+    push_to_repository: bool,
+    push_to: list[str],
+    registry_cache: bool,
+    local_cache: str | None,
+    model_layers: bool,
+    destination_dir: str = os.curdir,
+    print_help: bool = True,
 ):
     """
-    Build the Docker image for the given deployment config file and bento.
+    The `build` command, generating the values file in destination_dir. The
+    help message for the next steps is only printed with print_help.
     """
+    from bentoctl.deployment_config import DeploymentConfig
+    from bentoctl.docker_utils import (
+        build_docker_image,
+        get_local_image_id,
+        get_registry_cache_args,
+        get_registry_host,
+        local_build_cache,
+        prepare_deployable,
+        push_docker_image_to_destinations,
+        registry_login,
+    )
 
-    deployment_config = DeploymentConfig.from_file(deployment_config_file)
-    deployment_config.set_bento(bento_tag)
+    with span("load_deployment_config"):
+        deployment_config = DeploymentConfig.from_file(deployment_config_file)
+    with span("set_bento"):
+        deployment_config.set_bento(bento_tag)
     local_docker_tag = deployment_config.generate_local_image_tag()
 
     # parse buildx args
@@ -296,9 +609,21 @@ def build(
             key, value = arg.split("=")
             output_[key] = value
 
+    if push_to_repository and (push or dry_run):
+        raise click.UsageError(
+            "'--push-to-repository' can't be used with '--push' or '--dry-run'."
+        )
+    if push_to and dry_run and not push:
+        raise click.UsageError("'--push-to' can't be used with '--dry-run'.")
+    if registry_cache and (push or dry_run):
+        raise click.UsageError(
+            "'--registry-cache' needs the repository bentoctl creates and can't be "
+            "used with '--push' or '--dry-run'."
+        )
+
     load = True
     if platform and len(platform) > 1:
-        if not push:
+        if not (push or push_to_repository):
             click.echo(
                 "Multiple '--platform' arguments were found. "
                 "Make sure to also use '--push' to push images to a repository or "
@@ -313,51 +638,310 @@ def build(
         load = False
         dry_run = True
 
-    generate_deployable_container(
-        tags=tags,
-        deployment_config=deployment_config,
-        cleanup=False if is_debug_mode() else True,
-        allow=allow_,
-        build_args=build_args,
-        build_context=build_context_,
-        builder=builder,
-        cache_from=cache_from,
-        cache_to=cache_to,
-        load=load,
-        no_cache=no_cache,
-        output=output_,
-        platform=platform,
-        progress=progress,
-        pull=pull,
-        push=push,
-        target=target,
-    )
+    build_record_path = get_build_record_path(deployment_config_file)
+    fingerprint = None
+    if incremental and not dry_run:
+        with span("compute_build_fingerprint"):
+            fingerprint = compute_build_fingerprint(
+                deployment_config,
+                {
+                    "tags": list(docker_image_tag),
+                    "allow": allow_,
+                    "build_args": build_args,
+                    "build_context": build_context_,
+                    "output": output_,
+                    "platform": list(platform),
+                    "target": target,
+                    "push_to_repository": push_to_repository,
+                    "push_to": list(push_to),
+                    "model_layers": model_layers,
+                },
+            )
 
-    if not dry_run:
-        (
-            repository_url,
-            username,
-            password,
-        ) = deployment_config.create_repository()
+    with contextlib.ExitStack() as stack:
+        repository_future = None
+        if not dry_run:
+            # creating the repository takes a few cloud API calls, run them
+            # while the deployable is staged and built.
+            repository_future = stack.enter_context(
+                run_in_background(_create_repository, deployment_config)
+            )
+
+        # --no-cache and --pull ask for a fresh image, so always rebuild then.
+        record = load_build_record(build_record_path) if fingerprint else None
+        if (
+            not (no_cache or pull)
+            and record is not None
+            and record["fingerprint"] == fingerprint["digest"]
+            and _reuse_previous_build(
+                deployment_config,
+                local_docker_tag,
+                record,
+                _wait_for_repository(repository_future),
+            )
+        ):
+            with span("generate"):
+                generated_files, unchanged_files = deployment_config.generate(
+                    destination_dir=destination_dir, values_only=True
+                )
+            print_generated_files_list(generated_files, unchanged_files)
+            print_post_build_help_message(template_type=deployment_config.template_type)
+            return deployment_config
+
+        repository_image_tag = None
+        with prepare_deployable(
+            deployment_config,
+            cleanup=False if is_debug_mode() else True,
+            staging_strategy=staging_strategy,
+            use_staging_cache=staging_cache,
+            model_layers=model_layers,
+        ) as (context_path, model_build_contexts):
+            cache_from = list(cache_from or [])
+            cache_to = list(cache_to or [])
+            registry_auth = contextlib.nullcontext()
+            if push_to_repository or registry_cache:
+                # buildx pushes the image or cache itself, so the repository has
+                # to exist before building.
+                repository_url, username, password = _wait_for_repository(
+                    repository_future
+                )
+                registry_auth = registry_login(
+                    get_registry_host(repository_url), username, password
+                )
+                if push_to_repository:
+                    repository_image_tag = deployment_config.generate_docker_image_tag(
+                        repository_url
+                    )
+                    tags = [repository_image_tag, *docker_image_tag]
+                if registry_cache:
+                    registry_cache_from, registry_cache_to = get_registry_cache_args(
+                        repository_url
+                    )
+                    cache_from += registry_cache_from
+                    cache_to += registry_cache_to
+            elif repository_future is not None and repository_future.done():
+                # don't start building if the repository couldn't be created
+                repository_future.result()
+
+            if push or push_to_repository:
+                # buildx pushes all the tags, so there is no local image to
+                # push to the other destinations from.
+                tags = [*tags, *push_to]
 
-        console.print(f"Created the repository {deployment_config.repository_name}")
-        repository_image_tag = deployment_config.generate_docker_image_tag(
-            repository_url
+            local_cache_args = contextlib.nullcontext(([], []))
+            if local_cache is not None:
+                local_cache_args = local_build_cache(local_cache)
+
+            with registry_auth as build_env, local_cache_args as (
+                local_cache_from,
+                local_cache_to,
+            ):
+                # the digest of the image if buildx pushed it
+                repository_digest = build_docker_image(
+                    context_path,
+                    tags=tags,
+                    allow=allow_,
+                    build_args=build_args,
+                    build_context={**build_context_, **model_build_contexts},
+                    builder=builder,
+                    cache_from=cache_from + local_cache_from,
+                    cache_to=cache_to + local_cache_to,
+                    load=load and not push_to_repository,
+                    no_cache=no_cache,
+                    output=output_,
+                    platform=platform,
+                    progress=progress,
+                    pull=pull,
+                    push=push or push_to_repository,
+                    target=target,
+                    env=build_env,
+                )
+
+        if dry_run:
+            console.print(f"[green]Created docker image: {local_docker_tag}[/]")
+            return deployment_config
+
+        image_id = None
+        if not push_to_repository:
+            repository_url, username, password = _wait_for_repository(repository_future)
+            repository_image_tag = deployment_config.generate_docker_image_tag(
+                repository_url
+            )
+            # layers of the previous build are likely to be in the repository
+            previous_image_tag = (record or {}).get("repository_image_tag")
+            repository_digest = _push_image(
+                local_docker_tag,
+                repository_image_tag,
+                username,
+                password,
+                previous_image_tags=[previous_image_tag] if previous_image_tag else [],
+            )
+            image_id = get_local_image_id(local_docker_tag) if fingerprint else None
+            if push_to:
+                # after the operator's repository, so that the daemon can mount
+                # its layers into other repositories of the same registry.
+                with span("push_to_destinations"):
+                    push_docker_image_to_destinations(local_docker_tag, list(push_to))
+
+    if fingerprint is not None:
+        save_build_record(
+            build_record_path,
+            {
+                "fingerprint": fingerprint["digest"],
+                "inputs": fingerprint,
+                "local_image_tag": local_docker_tag,
+                "image_id": image_id,
+                "repository_image_tag": repository_image_tag,
+                "repository_digest": repository_digest,
+            },
         )
-        tag_docker_image(local_docker_tag, repository_image_tag)
-        push_docker_image_to_repository(
-            repository=repository_image_tag,
-            username=username,
-            password=password,
+    with span("generate"):
+        generated_files, unchanged_files = deployment_config.generate(
+            destination_dir=destination_dir, values_only=True
         )
-        generated_files = deployment_config.generate(values_only=True)
-        print_generated_files_list(generated_files)
+    print_generated_files_list(generated_files, unchanged_files)
+    if print_help:
         print_post_build_help_message(template_type=deployment_config.template_type)
-    else:
-        console.print(f"[green]Created docker image: {local_docker_tag}[/]")
     return deployment_config
 
 
+@bentoctl.command(name="build-many")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=DEFAULT_BUILD_JOBS,
+    show_default=True,
+    help="Number of bentos staged, built and pushed at the same time.",
+)
+@click.option(
+    "--max-concurrent-builds",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_CONCURRENT_BUILDS,
+    show_default=True,
+    help="Number of buildx builds run at the same time, the other jobs wait "
+    "for them after staging their deployable.",
+)
+@click.option(
+    "--timings-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the status and the time spent in each phase of every build to "
+    "this file as JSON.",
+)
+@handle_bentoctl_exceptions
+def build_many(manifest, jobs, max_concurrent_builds, timings_file):
+    """
+    Build the Docker images for many bentos and deployment configs.
+
+    MANIFEST is a YAML file with the list of `builds`, each with a `bento_tag`,
+    its `deployment_config_file` (relative to the manifest) and optionally the
+    `args` passed to `bentoctl build`. Top level `args` apply to every build.
+    Exits with a non-zero code if any of the builds failed.
+    """
+    from rich.table import Table
+
+    from bentoctl.build_manifest import load_build_manifest, run_builds
+    from bentoctl.docker_utils import limit_concurrent_builds
+    from bentoctl.exceptions import InvalidBuildManifest
+    from bentoctl.utils.timings import TIMINGS_VERSION, format_duration
+
+    # parse the options of every build first, so that a typo fails all of them
+    # before anything is built.
+    builds = []
+    for entry in load_build_manifest(manifest):
+        try:
+            build_ctx = build.make_context(
+                "build",
+                [
+                    "--bento-tag",
+                    entry.bento_tag,
+                    "--deployment-config-file",
+                    entry.deployment_config_file,
+                    *entry.args,
+                ],
+                parent=click.get_current_context(),
+            )
+        except click.ClickException as e:
+            raise InvalidBuildManifest(f"{entry.name}: {e.format_message()}")
+        # these are set by the manifest and build-many, an entry's args can't
+        # override them.
+        overridden_options = [
+            option
+            for option, name, value in (
+                ("--bento-tag", "bento_tag", entry.bento_tag),
+                (
+                    "--deployment-config-file",
+                    "deployment_config_file",
+                    entry.deployment_config_file,
+                ),
+                ("--timings-file", "timings_file", None),
+            )
+            if build_ctx.params[name] != value
+        ]
+        if overridden_options:
+            raise InvalidBuildManifest(
+                f"{entry.name}: {', '.join(overridden_options)} can't be used in "
+                "'args', set the 'bento_tag' and 'deployment_config_file' of the "
+                "build or pass --timings-file to build-many instead."
+            )
+        params = {
+            k: v
+            for k, v in build_ctx.params.items()
+            if k not in ("verbose", "do_not_track", "timings_file")
+        }
+        params["destination_dir"] = os.path.dirname(entry.deployment_config_file)
+        builds.append(
+            (entry, functools.partial(_build_deployment, **params, print_help=False))
+        )
+
+    with live_display_disabled(), limit_concurrent_builds(max_concurrent_builds):
+        results = run_builds(builds, max_workers=jobs)
+
+    table = Table(title="build-many summary", title_justify="left")
+    table.add_column("Bento")
+    table.add_column("Deployment config")
+    table.add_column("Status")
+    table.add_column("Duration", justify="right")
+    for result in results:
+        table.add_row(
+            result["entry"].bento_tag,
+            os.path.relpath(result["entry"].deployment_config_file),
+            "[green]ok[/]" if result["status"] == "ok" else "[red]failed[/]",
+            format_duration(result["timings"].total_ms),
+        )
+    console.print(table)
+    failed_results = [r for r in results if r["status"] != "ok"]
+    for result in failed_results:
+        console.print(f"[red]{result['entry'].name}[/]: {result['error']}")
+    console.print(
+        f"Built {len(results) - len(failed_results)}/{len(results)} bentos, "
+        f"{len(failed_results)} failed."
+    )
+
+    if timings_file is not None:
+        report = {
+            "version": TIMINGS_VERSION,
+            "command": "build-many",
+            "builds": [
+                {
+                    "bento_tag": r["entry"].bento_tag,
+                    "deployment_config_file": r["entry"].deployment_config_file,
+                    "status": r["status"],
+                    "error": r["error"],
+                    "timings": r["timings"].to_dict(),
+                }
+                for r in results
+            ],
+        }
+        with open(timings_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if failed_results:
+        sys.exit(1)
+
+
 @bentoctl.command()
 @click.option(
     "--deployment-config-file",
@@ -371,17 +955,28 @@ def build(
     default=False,
     help="auto approves the terraform plan generated.",
 )
+@click.option(
+    "--events-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write terraform's progress events to this file as JSON lines. "
+    "Requires '--auto-approve'.",
+)
 @handle_bentoctl_exceptions
-def destroy(deployment_config_file, auto_approve):
+def destroy(deployment_config_file, auto_approve, events_file):
     """
     Destroy all the resources created and remove the registry.
     """
+    from bentoctl.deployment_config import DeploymentConfig
+
+    if events_file is not None and not auto_approve:
+        raise click.UsageError("'--events-file' requires '--auto-approve'.")
     deployment_config = DeploymentConfig.from_file(deployment_config_file)
     if (
         deployment_config.template_type.startswith("terraform")
         and is_terraform_applied()
     ):
-        terraform_destroy(auto_approve)
+        terraform_destroy(auto_approve, events_file)
     deployment_config.delete_repository()
     console.print(f"Deleted the repository {deployment_config.repository_name}")
     return deployment_config
@@ -400,17 +995,59 @@ def destroy(deployment_config_file, auto_approve):
     default=False,
     help="auto approves the terraform plan generated.",
 )
+@click.option(
+    "--events-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write terraform's progress events to this file as JSON lines. "
+    "Requires '--auto-approve'.",
+)
+@click.option(
+    "--provider-mirror",
+    type=click.Path(exists=True, file_okay=False),
+    default=None,
+    envvar=PROVIDER_MIRROR_ENV_VAR,
+    help="Install the terraform providers from this directory (eg. created with "
+    "'terraform providers mirror') instead of the registry, for runners "
+    "without internet access. Providers are cached in BENTOCTL_HOME either way.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Run terraform apply even if the terraform files, the values and the "
+    "image are unchanged since the last successful apply.",
+)
 @handle_bentoctl_exceptions
-def apply(deployment_config_file, auto_approve):
+def apply(deployment_config_file, auto_approve, events_file, provider_mirror, force):
     """
     [Experimental] Apply the generated template file to create/update the deployment.
     """
+    from bentoctl.deployment_config import DeploymentConfig
+
+    if events_file is not None and not auto_approve:
+        raise click.UsageError("'--events-file' requires '--auto-approve'.")
     deployment_config = DeploymentConfig.from_file(deployment_config_file)
     if deployment_config.template_type.startswith("terraform"):
-        terraform_apply(auto_approve)
+        # the image pushed by the last `build --incremental`, a rebuild can push
+        # a new image under the same tag.
+        build_record = load_build_record(get_build_record_path(deployment_config_file))
+        terraform_apply(
+            auto_approve,
+            events_file,
+            provider_mirror,
+            force=force,
+            apply_inputs={
+                "repository_image_tag": (build_record or {}).get(
+                    "repository_image_tag"
+                ),
+                "repository_digest": (build_record or {}).get("repository_digest"),
+            },
+        )
 
     return deployment_config
 
 
 # subcommands
 bentoctl.add_command(get_operator_management_subcommands())
+bentoctl.add_command(get_cache_management_subcommands())
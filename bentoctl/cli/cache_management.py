@@ -0,0 +1,39 @@
+import click
+
+from bentoctl.cli.utils import BentoctlCommandGroup, handle_bentoctl_exceptions
+from bentoctl.console import console
+
+
+def get_cache_management_subcommands():
+    @click.group(name="cache", cls=BentoctlCommandGroup)
+    def cache_management():
+        """
+        Sub-commands to manage the caches bentoctl keeps in BENTOCTL_HOME.
+        """
+
+    @cache_management.command()
+    @click.option(
+        "--max-size",
+        type=click.STRING,
+        default=None,
+        help="Keep the most recently used entries up to this size (eg. '20GB') "
+        "instead of removing everything.",
+    )
+    @handle_bentoctl_exceptions
+    def prune(max_size):  # pylint: disable=unused-variable
+        """
+        Remove entries from the staging cache.
+
+        Without --max-size the whole cache is cleared. Files that are not used
+        by any cache entry are always removed.
+        """
+        from bentoctl.utils.staging_cache import get_staging_cache, parse_size
+
+        max_size_bytes = parse_size(max_size) if max_size is not None else 0
+        removed_entries, freed = get_staging_cache().prune(max_size_bytes)
+        console.print(
+            f"Removed {removed_entries} staging cache entries, "
+            f"freed {freed / 1024**2:.1f}MB."
+        )
+
+    return cache_management
@@ -8,9 +8,6 @@ from bentoctl.console import console
 from bentoctl.deployment_config import DeploymentConfig, deployment_config_schema
 from bentoctl.operator import get_local_operator_registry
 
-local_operator_registry = get_local_operator_registry()
-
-
 INTERACTIVE_MODE_TITLE = "[r]Bentoctl Interactive Deployment Config Builder[/]"
 WELCOME_MESSAGE = """
 [green]Welcome![/] You are now in interactive mode.
@@ -271,6 +268,7 @@ def deployment_config_builder():
     console.print(f"[b]name:[/] {name}")
 
     # get operators
+    local_operator_registry = get_local_operator_registry()
     available_operators = list(local_operator_registry.list())
     operator_name = (
         available_operators[0]
@@ -11,8 +11,6 @@ from bentoctl.operator import get_local_operator_registry
 from bentoctl.operator.constants import OFFICIAL_OPERATORS
 from bentoctl.utils import is_debug_mode
 
-local_operator_registry = get_local_operator_registry()
-
 
 def get_operator_management_subcommands():
     @click.group(name="operator", cls=BentoctlCommandGroup)
@@ -32,7 +30,7 @@ def get_operator_management_subcommands():
         Lists the operator, the path from where you can access operator locally and
         if the operator was pulled from github, the github URL is also shown.
         """
-        operators_list = local_operator_registry.list()
+        operators_list = get_local_operator_registry().list()
         print_operator_list(operators_list)
 
     @operator_management.command()
@@ -83,7 +81,9 @@ def get_operator_management_subcommands():
                     "Please specify the name of the operator to install."
                 )
         try:
-            operator_name = local_operator_registry.install_operator(name, version)
+            operator_name = get_local_operator_registry().install_operator(
+                name, version
+            )
             if operator_name is not None:
                 click.echo(f"Installed {operator_name}!")
             else:
@@ -141,7 +141,7 @@ def get_operator_management_subcommands():
             if not proceed_with_delete:
                 return
         try:
-            local_operator_registry.remove_operator(name)
+            get_local_operator_registry().remove_operator(name)
             click.echo(f"operator '{name}' removed!")
         except BentoctlException as e:
             e.show()
@@ -157,6 +157,7 @@ def get_operator_management_subcommands():
         the name of an available operator it goes and fetches the latest code from
         the Github repo and update the local codebase with it.
         """
+        local_operator_registry = get_local_operator_registry()
         try:
             if local_operator_registry.is_operator_on_latest_version(name):
                 click.echo(f"Operator '{name}' is already on the latest version.")
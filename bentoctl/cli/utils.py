@@ -9,14 +9,11 @@ import click
 
 from bentoctl.exceptions import BentoctlException
 from bentoctl.utils import set_debug_mode
-from bentoctl.utils.usage_stats import (
-    BENTOML_DO_NOT_TRACK,
-    BentoctlCliEvent,
-    cli_events_map,
-    track,
-)
 
 DEBUG_ENV_VAR = "BENTOCTL_DEBUG"
+# mirrors bentoml's analytics env var, kept here so that building the CLI
+# doesn't import bentoml.
+BENTOML_DO_NOT_TRACK = "BENTOML_DO_NOT_TRACK"
 
 
 def handle_bentoctl_exceptions(func):
@@ -31,6 +28,33 @@ def handle_bentoctl_exceptions(func):
     return wrapper
 
 
+def record_command_timings(command_name: str):
+    """
+    Times the spans opened while the command runs (see `bentoctl.utils.timings`)
+    and prints them as a table once it is done. The command must take a
+    `--timings-file` option, the timings are also written there as JSON, even if
+    the command fails.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, timings_file=None, **kwargs):
+            from bentoctl.utils.timings import record_timings
+
+            with record_timings(command_name) as timings:
+                try:
+                    return_value = func(*args, **kwargs)
+                finally:
+                    if timings_file is not None:
+                        timings.write(timings_file)
+            timings.print_summary()
+            return return_value
+
+        return wrapper
+
+    return decorator
+
+
 class BentoctlCommandGroup(click.Group):
     NUMBER_OF_COMMON_PARAMS = 2
 
@@ -67,6 +91,12 @@ class BentoctlCommandGroup(click.Group):
             if do_not_track:
                 os.environ["BENTOCTL_DO_NOT_TRACK"] = str(True)
                 return func(*args, **kwargs)
+            from bentoctl.utils.usage_stats import (
+                BentoctlCliEvent,
+                cli_events_map,
+                track,
+            )
+
             start_time = time.time_ns()
             if cmd_group.name in cli_events_map:
                 # If cli command is build or operator related, we will add
@@ -1,12 +1,39 @@
+from contextlib import contextmanager
+
 from rich.console import Console
 
 console = Console(highlight=False)
+# rich can only show one live display (progress bars) at a time, commands that
+# run several builds at once turn them off.
+_live_display_enabled = True
+
+
+def use_live_display() -> bool:
+    """
+    Whether progress can be shown with a live display, otherwise it should be
+    printed as plain lines.
+    """
+    return _live_display_enabled and console.is_terminal
+
+
+@contextmanager
+def live_display_disabled():
+    global _live_display_enabled  # pylint: disable=global-statement
+    previous = _live_display_enabled
+    _live_display_enabled = False
+    try:
+        yield
+    finally:
+        _live_display_enabled = previous
 
 
-def print_generated_files_list(generated_files: list):
+def print_generated_files_list(generated_files: list, unchanged_files: list = ()):
     console.print(":sparkles: generated template files.")
     for file in generated_files:
-        console.print(f"  - {file}")
+        if file in unchanged_files:
+            console.print(f"  - {file} (unchanged)")
+        else:
+            console.print(f"  - {file}")
 
 
 def prompt_user_for_filename():
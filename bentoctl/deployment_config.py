@@ -1,6 +1,8 @@
 import copy
+import hashlib
 import logging
 import os
+import threading
 import typing as t
 from contextlib import contextmanager
 from pathlib import Path
@@ -8,7 +10,6 @@ from pathlib import Path
 import bentoml
 import cerberus
 import fs
-import fs.mirror
 import yaml
 from bentoml import Bento
 from bentoml.exceptions import NotFound
@@ -21,15 +22,25 @@ from bentoctl.exceptions import (
     OperatorNotFound,
 )
 from bentoctl.operator import get_local_operator_registry
-from bentoctl.operator.utils import _is_official_operator
+from bentoctl.operator.utils import _get_bentoctl_home, _is_official_operator
 from bentoctl.utils import is_debug_mode
+from bentoctl.utils.staging import (
+    STAGING_STRATEGY_AUTO,
+    STAGING_STRATEGY_COPY,
+    stage_trees,
+)
+from bentoctl.utils.staging_cache import get_staging_cache
+from bentoctl.utils.temp_dir import TempDirectory
+from bentoctl.utils.timings import span
 
 logger = logging.getLogger(__name__)
-local_operator_registry = get_local_operator_registry()
+
+# use libyaml's loader when pyyaml was built with it, it is several times faster.
+YAMLSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def operator_exists(field, operator_name, error):
-    available_operators = list(local_operator_registry.list().keys())
+    available_operators = list(get_local_operator_registry().list().keys())
     if operator_name not in available_operators:
         error(
             field,
@@ -99,6 +110,29 @@ def remove_help_message(schema):
     return schema
 
 
+# cerberus validators keep per-validation state, so they are cached per thread.
+_validator_cache = threading.local()
+
+
+def get_schema_validator(schema: dict) -> cerberus.Validator:
+    """
+    Returns a cerberus Validator for the schema with its help messages removed.
+
+    Validators are cached by the digest of the schema so that validating many
+    deployment configs for the same operator only prepares the schema once. The
+    schema passed in is never modified.
+    """
+    validators = getattr(_validator_cache, "validators", None)
+    if validators is None:
+        validators = _validator_cache.validators = {}
+    schema_digest = hashlib.sha256(repr(schema).encode("utf-8")).hexdigest()
+    if schema_digest not in validators:
+        validators[schema_digest] = cerberus.Validator(
+            remove_help_message(copy.deepcopy(schema))
+        )
+    return validators[schema_digest]
+
+
 def get_bento_metadata(bento_path: str) -> dict:
     metadata = {}
 
@@ -115,6 +149,42 @@ def get_bento_metadata(bento_path: str) -> dict:
     return metadata
 
 
+def load_deployment_config_file(file_path: t.Union[str, Path]) -> t.Dict[str, t.Any]:
+    """
+    Reads the deployment config yaml file into a dict without validating it.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise DeploymentConfigNotFound(file_path)
+    elif file_path.suffix in [".yaml", ".yml"]:
+        try:
+            return yaml.load(file_path.read_text(encoding="utf-8"), YAMLSafeLoader)
+        except yaml.YAMLError as e:
+            raise InvalidDeploymentConfig(exc=e)
+    else:
+        raise InvalidDeploymentConfig
+
+
+def _get_file_state(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _get_file_states(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return {
+                os.path.abspath(entry.path): _get_file_state(entry.path)
+                for entry in entries
+                if entry.is_file()
+            }
+    except OSError:
+        return {}
+
+
 class DeploymentConfig:
     def __init__(self, deployment_config: t.Dict[str, t.Any]):
         self.bento = None
@@ -144,6 +214,7 @@ class DeploymentConfig:
         self.operator_name = operator_dict.get("name")
         if self.operator_name is None:
             raise InvalidDeploymentConfig("operator.name is a required field")
+        local_operator_registry = get_local_operator_registry()
         try:
             self.operator = local_operator_registry.get(self.operator_name)
         except OperatorNotFound:
@@ -173,21 +244,17 @@ class DeploymentConfig:
         copied_env = copy.deepcopy(self.deployment_config.get("env"))
         validated_env = None
         if copied_env is not None:
-            v = cerberus.Validator()
-            env_schema = remove_help_message(
-                {"env": copy.deepcopy(deployment_config_schema["env"])}
-            )
-            validated_env = v.validated({"env": copied_env}, env_schema)["env"]
+            v = get_schema_validator({"env": deployment_config_schema["env"]})
+            validated_env = v.validated({"env": copied_env})
             if validated_env is None:
                 raise InvalidDeploymentConfig(config_errors=v.errors)
+            validated_env = validated_env["env"]
         self.env = validated_env
 
     def _set_operator_spec(self):
-        # cleanup operator_schema by removing 'help_message' field
-        operator_schema = remove_help_message(schema=self.operator.schema)
         copied_operator_spec = copy.deepcopy(self.deployment_config["spec"])
-        v = cerberus.Validator()
-        validated_spec = v.validated(copied_operator_spec, schema=operator_schema)
+        v = get_schema_validator(self.operator.schema)
+        validated_spec = v.validated(copied_operator_spec)
         if validated_spec is None:
             raise InvalidDeploymentConfig(config_errors=v.errors)
 
@@ -207,18 +274,7 @@ class DeploymentConfig:
 
     @classmethod
     def from_file(cls, file_path: t.Union[str, Path]):
-        file_path = Path(file_path)
-        if not file_path.exists():
-            raise DeploymentConfigNotFound(file_path)
-        elif file_path.suffix in [".yaml", ".yml"]:
-            try:
-                config_dict = yaml.safe_load(file_path.read_text(encoding="utf-8"))
-            except yaml.YAMLError as e:
-                raise InvalidDeploymentConfig(exc=e)
-        else:
-            raise InvalidDeploymentConfig
-
-        return cls(config_dict)
+        return cls(load_deployment_config_file(file_path))
 
     def save(self, save_path, filename="deployment_config.yaml"):
         config_path = os.path.join(save_path, filename)
@@ -232,8 +288,11 @@ class DeploymentConfig:
 
     def generate(self, destination_dir=os.curdir, values_only=False):
         """
-        Generate the template and params file in destination_dir.
+        Generate the template and params file in destination_dir. Returns the
+        generated files and the ones among them that were left untouched because
+        their contents didn't change.
         """
+        previous_states = _get_file_states(destination_dir)
         generated_files = self.operator.generate(
             name=self.deployment_name,
             spec=self.operator_spec,
@@ -241,36 +300,92 @@ class DeploymentConfig:
             destination_dir=destination_dir,
             values_only=values_only,
         )
+        # the operators only report which files they generated, the values
+        # helpers keep a file (and its inode and mtime) when it is up to date.
+        unchanged_files = [
+            file
+            for file in generated_files
+            if previous_states.get(os.path.abspath(file)) is not None
+            and previous_states.get(os.path.abspath(file)) == _get_file_state(file)
+        ]
 
-        return generated_files
+        return generated_files, unchanged_files
 
     @contextmanager
-    def _prepare_bento_dir(self) -> t.Generator[str, None, None]:
+    def _prepare_bento_dir(
+        self,
+        staging_strategy: str = STAGING_STRATEGY_AUTO,
+        use_staging_cache: bool = False,
+        models_dir: t.Optional[str] = None,
+    ) -> t.Generator[str, None, None]:
+        """
+        Stages the bento with its models into a temporary directory. Models are
+        staged into models_dir instead of the bento's models/ when it is set.
+        """
         assert self.bento is not None
-        with fs.open_fs("temp://") as temp_fs, fs.open_fs(self.bento.path) as bento_fs:
-            fs.mirror.mirror(bento_fs, temp_fs)
-            models_fs = temp_fs.makedirs("models", recreate=True)
-            for model_info in self.bento.info.models:
-                model = get_model(model_info.tag)
-                model_fs = models_fs.makedirs(model_info.tag.path())
-                fs.mirror.mirror(model.path, model_fs)
-            yield temp_fs.getsyspath("/")
-
-    def create_deployable(self, destination_dir=os.curdir) -> str:
+        # links can only be created within a filesystem, so unless we copy, stage
+        # inside bentoctl home which usually shares the disk with the bento store
+        # and always shares it with the staging cache.
+        staging_root = (
+            None
+            if staging_strategy == STAGING_STRATEGY_COPY and not use_staging_cache
+            else _get_bentoctl_home() / "staging"
+        )
+        with TempDirectory(prefix="staging", dir=staging_root) as staging_dir:
+            with span("stage_bento"):
+                # (key, source, path inside the staging dir) of the bento and models
+                trees = [(f"bento:{self.bento.tag}", self.bento.path, "")]
+                for model_info in self.bento.info.models:
+                    model = get_model(model_info.tag)
+                    # joining an absolute path discards the staging dir
+                    model_dst = os.path.join(
+                        models_dir or "models", model_info.tag.path()
+                    )
+                    trees.append((f"model:{model_info.tag}", model.path, model_dst))
+                if use_staging_cache:
+                    stats = get_staging_cache().stage(
+                        trees, str(staging_dir), staging_strategy, show_progress=True
+                    )
+                else:
+                    stats = stage_trees(
+                        [
+                            (src, os.path.join(staging_dir, relative_dst))
+                            for _, src, relative_dst in trees
+                        ],
+                        staging_strategy,
+                        labels=[key for key, _, _ in trees],
+                        show_progress=True,
+                    )
+                logger.debug("Staged bento into %s: %s", staging_dir, stats)
+            yield str(staging_dir)
+
+    def create_deployable(
+        self,
+        destination_dir=os.curdir,
+        staging_strategy=STAGING_STRATEGY_AUTO,
+        use_staging_cache=False,
+        models_dir=None,
+    ) -> str:
         """
         Creates the deployable in the destination_dir and returns
-        the docker args for building
+        the docker args for building. When models_dir is set the models are
+        staged there (as models_dir/<name>/<version>) instead of in the bento
+        passed to the operator.
         """
         # NOTE: In the case of debug mode, we want to keep the deployable
         # for debugging purpose. So by setting overwrite_deployable to false,
         # we don't delete the deployable after the build.
-        with self._prepare_bento_dir() as bento_path:
-            return self.operator.create_deployable(
-                bento_path=bento_path,
-                destination_dir=destination_dir,
-                bento_metadata=get_bento_metadata(bento_path),
-                overwrite_deployable=not is_debug_mode(),
-            )
+        with self._prepare_bento_dir(
+            staging_strategy, use_staging_cache, models_dir
+        ) as bento_path:
+            bento_metadata = get_bento_metadata(bento_path)
+            with span("operator_create_deployable"):
+                return self.operator.create_deployable(
+                    bento_path=bento_path,
+                    destination_dir=destination_dir,
+                    bento_metadata=bento_metadata,
+                    overwrite_deployable=not is_debug_mode(),
+                )
 
     def create_repository(self):
         (
@@ -1,36 +1,139 @@
 from __future__ import annotations
 
+import base64
+import json
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import threading
+import time
 import typing as t
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 
 import docker
+import requests
 from bentoml import container
 from rich.live import Live
 
-from bentoctl.console import console
+from bentoctl.console import console, use_live_display
 from bentoctl.deployment_config import DeploymentConfig
 from bentoctl.exceptions import BentoctlDockerException
+from bentoctl.operator.utils import _get_bentoctl_home
+from bentoctl.utils.model_layers import add_model_layers
+from bentoctl.utils.staging import STAGING_STRATEGY_AUTO, stage_tree
 from bentoctl.utils.temp_dir import TempDirectory
+from bentoctl.utils.timings import span
+
+logger = logging.getLogger(__name__)
 
 # default location were dockerfile can be found
 DOCKERFILE_PATH = "env/docker/Dockerfile"
+DOCKER_HUB_REGISTRY = "https://index.docker.io/v1/"
+# tag of the image that holds the buildx cache in the operator's repository
+REGISTRY_CACHE_TAG = "buildcache"
+# concurrent pushes to the `--push-to` destinations
+PUSH_MAX_WORKERS = 4
+# how long a passed buildx health check is trusted for, in seconds
+BUILDX_HEALTH_CHECK_TTL = 300
+# how often the push progress is redrawn on terminals, and logged otherwise.
+PUSH_PROGRESS_REFRESH_PER_SECOND = 4
+PUSH_PROGRESS_LOG_INTERVAL = 10
+
+_docker_client: docker.DockerClient | None = None
+_docker_client_lock = threading.Lock()
+# when the health check of each container backend last passed
+_backend_health_checked_at: t.Dict[str, float] = {}
+# limits the buildx builds running at the same time, see limit_concurrent_builds
+_build_slots: threading.Semaphore | None = None
+
+
+def get_docker_client() -> docker.DockerClient:
+    """
+    The docker client shared by the whole process, created on first use so the
+    connection pool and API version negotiation are only paid once.
+    """
+    global _docker_client
+    with _docker_client_lock:
+        if _docker_client is None:
+            _docker_client = docker.from_env()
+        return _docker_client
+
+
+def check_backend_health(backend: str = "buildx"):
+    """
+    Runs the health check of the container backend, unless it passed less
+    than BUILDX_HEALTH_CHECK_TTL seconds ago in this process.
+    """
+    checked_at = _backend_health_checked_at.get(backend)
+    if checked_at is not None and (
+        time.monotonic() - checked_at < BUILDX_HEALTH_CHECK_TTL
+    ):
+        return
+    container.health(backend)
+    _backend_health_checked_at[backend] = time.monotonic()
+
+
+@contextmanager
+def limit_concurrent_builds(max_builds: int):
+    """
+    Lets at most max_builds calls to `build_docker_image` run buildx at the
+    same time in this context, the others wait for their turn.
+    """
+    global _build_slots
+    previous = _build_slots
+    _build_slots = threading.BoundedSemaphore(max_builds)
+    try:
+        yield
+    finally:
+        _build_slots = previous
+
+
+@contextmanager
+def _build_slot():
+    build_slots = _build_slots
+    if build_slots is None:
+        yield
+        return
+    with span("wait_for_build_slot"):
+        build_slots.acquire()
+    try:
+        yield
+    finally:
+        build_slots.release()
+
+
+def sizeof_fmt(num, suffix="B"):
+    if num is None:
+        return None
+    for unit in ["", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"]:
+        if abs(num) < 1024.0:
+            return f"{num:3.1f}{unit}{suffix}"
+        num /= 1024.0
+    return f"{num:.1f}Yi{suffix}"
 
 
 class DockerPushProgressBar:
-    layers = OrderedDict()
+    """
+    Progress of a single docker push: the status of every layer and the bytes
+    pushed over all of them. `update` only records the daemon's messages, they
+    are rendered at a fixed rate by rich's Live display, or logged as plain
+    text every PUSH_PROGRESS_LOG_INTERVAL seconds with `log`.
+    """
 
-    def sizeof_fmt(self, num, suffix="B"):
-        if num is None:
-            return None
-        for unit in ["", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"]:
-            if abs(num) < 1024.0:
-                return f"{num:3.1f}{unit}{suffix}"
-            num /= 1024.0
-        return f"{num:.1f}Yi{suffix}"
+    def __init__(self):
+        self.layers = OrderedDict()
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_log = self._start
 
     def format_progress_detail(self, progress_detail):
-        current = self.sizeof_fmt(progress_detail.get("current"))
-        total = self.sizeof_fmt(progress_detail.get("total"))
+        current = sizeof_fmt(progress_detail.get("current"))
+        total = sizeof_fmt(progress_detail.get("total"))
 
         if current is None or total is None:
             return ""
@@ -40,23 +143,122 @@ class DockerPushProgressBar:
     def update(self, line):
         status = line.get("status")
         layer_id = line.get("id")
-        progress_str = self.format_progress_detail(line.get("progressDetail"))
-        self.layers[layer_id] = {"status": status, "progress_str": progress_str}
+        progress_detail = line.get("progressDetail") or {}
+        with self._lock:
+            layer = self.layers.setdefault(layer_id, {"current": 0, "total": 0})
+            layer["status"] = status
+            layer["progress_str"] = self.format_progress_detail(progress_detail)
+            if progress_detail.get("total"):
+                layer["current"] = progress_detail.get("current", 0)
+                layer["total"] = progress_detail["total"]
+            elif status == "Pushed":
+                layer["current"] = layer["total"]
+
+    def summary(self) -> str:
+        """
+        The bytes pushed so far over all the layers, the rate and the ETA.
+        """
+        with self._lock:
+            current = sum(layer["current"] for layer in self.layers.values())
+            total = sum(layer["total"] for layer in self.layers.values())
+        elapsed = time.monotonic() - self._start
+        rate = current / elapsed if elapsed > 0 else 0
+        summary = (
+            f"Pushed {sizeof_fmt(current)}/{sizeof_fmt(total)}, "
+            f"{sizeof_fmt(rate)}/s"
+        )
+        if rate and total > current:
+            summary += f", ETA {_format_eta((total - current) / rate)}"
+        return summary
+
+    def log(self, force=False):
+        """
+        Prints the summary if PUSH_PROGRESS_LOG_INTERVAL has passed since the
+        last one, for logs that can't show the live display.
+        """
+        now = time.monotonic()
+        if force or now - self._last_log >= PUSH_PROGRESS_LOG_INTERVAL:
+            self._last_log = now
+            console.print(self.summary())
 
     def __rich_console__(self, *_):
-        progress_table = []
-        for layer_id, line in self.layers.items():
-            progress_table.append(
+        with self._lock:
+            progress_table = [
                 f"{layer_id}: {line.get('status')} {line.get('progress_str')}"
-            )
+                for layer_id, line in self.layers.items()
+            ]
+        progress_table.append(self.summary())
 
         yield "\n".join(progress_table)
 
 
-def generate_deployable_container(
-    tags: list[str],
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+@contextmanager
+def prepare_deployable(
     deployment_config: DeploymentConfig,
     cleanup: bool,
+    staging_strategy: str = STAGING_STRATEGY_AUTO,
+    use_staging_cache: bool = False,
+    model_layers: bool = False,
+) -> t.Generator[tuple[str, dict[str, str]], None, None]:
+    """
+    Creates the deployable in a temporary directory and yields the docker build
+    context path along with the extra build contexts it needs.
+
+    With model_layers, every model is copied into the image in its own layer
+    from its own build context (see `bentoctl.utils.model_layers`).
+    """
+    # models are staged next to the deployable, inside bentoctl home so that
+    # they can be linked from the bento store or staging cache.
+    dist_root = _get_bentoctl_home() / "staging" if model_layers else None
+    with TempDirectory(cleanup=cleanup, dir=dist_root) as dist_dir:
+        if cleanup is False:
+            # --debug flag is passed. show the path for the saved deployable
+            console.print(
+                f"In debug mode. Intermediate bento saved to [b]{dist_dir}[/b]"
+            )
+        models_dir = os.path.join(dist_dir, "models") if model_layers else None
+        with span("create_deployable"):
+            context_path = deployment_config.create_deployable(
+                destination_dir=str(dist_dir),
+                staging_strategy=staging_strategy,
+                use_staging_cache=use_staging_cache,
+                models_dir=models_dir,
+            )
+
+        build_contexts = {}
+        if models_dir is not None and os.path.isdir(models_dir):
+            models = [
+                (
+                    # a path in the image, written into the Dockerfile
+                    posixpath.join("models", name, version),
+                    os.path.join(models_dir, name, version),
+                )
+                for name in sorted(os.listdir(models_dir))
+                for version in sorted(os.listdir(os.path.join(models_dir, name)))
+            ]
+            model_build_contexts = add_model_layers(
+                os.path.join(context_path, DOCKERFILE_PATH), models
+            )
+            if model_build_contexts is not None:
+                build_contexts = model_build_contexts
+            else:
+                for path_in_bento, model_dir in models:
+                    stage_tree(
+                        model_dir,
+                        os.path.join(context_path, path_in_bento),
+                        staging_strategy,
+                    )
+        yield context_path, build_contexts
+
+
+def build_docker_image(
+    context_path: str,
+    tags: list[str],
     allow: list[str],
     build_args: dict[str, str],
     build_context: dict[str, str],
@@ -71,17 +273,17 @@ def generate_deployable_container(
     pull: bool,
     push: bool,
     target: str,
-):
-    with TempDirectory(cleanup=cleanup) as dist_dir:
-        if cleanup is False:
-            # --debug flag is passed. show the path for the saved deployable
-            console.print(
-                f"In debug mode. Intermediate bento saved to [b]{dist_dir}[/b]"
-            )
+    env: dict[str, str] | None = None,
+) -> str | None:
+    """
+    Builds the image for the deployable with buildx and returns its digest if
+    it was pushed. env adds to the environment of the buildx process, eg. the
+    DOCKER_CONFIG from `registry_login`.
+    """
+    with TempDirectory(prefix="buildx") as metadata_dir:
+        metadata_file = os.path.join(metadata_dir, "metadata.json")
         buildx_args = {
-            "context_path": deployment_config.create_deployable(
-                destination_dir=str(dist_dir)
-            ),
+            "context_path": context_path,
             "file": DOCKERFILE_PATH,
             "tag": tags,
             "add_host": None,
@@ -95,7 +297,7 @@ def generate_deployable_container(
             "iidfile": None,
             "labels": None,
             "load": load,  # loading built container to local registry.
-            "metadata_file": None,
+            "metadata_file": metadata_file,
             "network": None,
             "no_cache": no_cache,
             "no_cache_filter": None,
@@ -115,13 +317,198 @@ def generate_deployable_container(
         buildx_args = {k: v or None for k, v in buildx_args.items()}
 
         # run health check whether buildx is install locally
-        container.health("buildx")
+        with span("buildx_health_check"):
+            check_backend_health("buildx")
         backend = container.get_backend("buildx")
-        backend.build(**buildx_args)
+        with _build_slot(), span("buildx_build"):
+            if env:
+                _run_backend_build(backend, env, **buildx_args)
+            else:
+                backend.build(**buildx_args)
+        return get_buildx_image_digest(metadata_file) if push else None
+
+
+def _run_backend_build(backend, env: dict[str, str], **buildx_args):
+    """
+    Runs the build command of the container backend like `backend.build`, which
+    always uses the process environment, with env added to it.
+    """
+    cmds = [
+        backend.binary,
+        *backend.build_cmd,
+        *backend.construct_build_args(**buildx_args),
+    ]
+    try:
+        subprocess.check_output(
+            [str(c) for c in cmds],
+            cwd=buildx_args["context_path"],
+            env={**backend.env, **os.environ, **env},
+        )
+    except subprocess.CalledProcessError as e:
+        raise BentoctlDockerException(f"Failed to build the image: {e}") from None
+
+
+def generate_deployable_container(
+    tags: list[str],
+    deployment_config: DeploymentConfig,
+    cleanup: bool,
+    staging_strategy: str = STAGING_STRATEGY_AUTO,
+    use_staging_cache: bool = False,
+    **build_kwargs,
+) -> str | None:
+    """
+    Creates the deployable and builds its image, see `prepare_deployable` and
+    `build_docker_image`.
+    """
+    with prepare_deployable(
+        deployment_config, cleanup, staging_strategy, use_staging_cache
+    ) as (context_path, _):
+        return build_docker_image(context_path, tags=tags, **build_kwargs)
+
+
+def get_registry_cache_ref(repository_url: str) -> str:
+    """
+    The image used as the buildx cache for a repository, eg.
+    `123.dkr.ecr.aws.com/repo:buildcache`.
+    """
+    return f"{repository_url.replace('https://', '')}:{REGISTRY_CACHE_TAG}"
+
+
+def get_registry_cache_args(repository_url: str) -> tuple[list[str], list[str]]:
+    """
+    Returns the --cache-from and --cache-to values that import and export all
+    the build layers (mode=max) from/to the repository's cache image.
+    """
+    ref = get_registry_cache_ref(repository_url)
+    return [f"type=registry,ref={ref}"], [f"type=registry,ref={ref},mode=max"]
+
+
+@contextmanager
+def local_build_cache(
+    cache_dir: str,
+) -> t.Generator[tuple[list[str], list[str]], None, None]:
+    """
+    Yields the --cache-from and --cache-to values for a buildx cache in a local
+    directory.
+
+    buildx doesn't remove old blobs from a local cache, so the cache is exported
+    to a new directory that replaces the old one once the build succeeds.
+    """
+    cache_dir = os.path.abspath(cache_dir)
+    new_cache_dir = f"{cache_dir}.new"
+    if os.path.isdir(new_cache_dir):
+        shutil.rmtree(new_cache_dir)
+    cache_from = []
+    if os.path.isdir(cache_dir):
+        cache_from = [f"type=local,src={cache_dir}"]
+    yield cache_from, [f"type=local,dest={new_cache_dir},mode=max"]
+
+    if os.path.isdir(new_cache_dir):
+        old_cache_dir = f"{cache_dir}.old"
+        # left behind by a run that crashed during the swap
+        shutil.rmtree(old_cache_dir, ignore_errors=True)
+        if os.path.isdir(cache_dir):
+            os.replace(cache_dir, old_cache_dir)
+        os.replace(new_cache_dir, cache_dir)
+        shutil.rmtree(old_cache_dir, ignore_errors=True)
+
+
+def get_registry_host(image_name: str) -> str:
+    """
+    Returns the registry part of an image name, eg. `123.dkr.ecr.aws.com` for
+    `123.dkr.ecr.aws.com/repo:tag`. Images without one are on Docker Hub.
+    """
+    name = image_name.replace("https://", "")
+    host, sep, _ = name.partition("/")
+    if sep and ("." in host or ":" in host or host == "localhost"):
+        return host
+    return DOCKER_HUB_REGISTRY
+
+
+def _get_docker_config_dir() -> str:
+    return os.environ.get(
+        "DOCKER_CONFIG", os.path.join(os.path.expanduser("~"), ".docker")
+    )
+
+
+def _link_or_copy(src: str, dst: str):
+    """
+    Symlinks src to dst, copying it where symlinks need privileges (Windows).
+    """
+    try:
+        os.symlink(src, dst, target_is_directory=os.path.isdir(src))
+    except OSError:
+        if os.path.isdir(src):
+            shutil.copytree(src, dst, symlinks=True)
+        else:
+            shutil.copy2(src, dst)
+
+
+@contextmanager
+def registry_login(
+    registry: str | None, username: str | None, password: str | None
+) -> t.Generator[dict[str, str] | None, None, None]:
+    """
+    Yields the environment variables that make the credentials for the registry
+    available to the docker CLI (and so buildx), without saving them in the
+    user's docker config. The process environment isn't changed, so builds in
+    other threads can use other credentials.
+
+    DOCKER_CONFIG points at a temporary copy of the user's config.json with the
+    credentials added, everything else in the docker config dir (buildx
+    builders, CLI plugins, contexts) is linked so buildx keeps using the same
+    builder.
+    """
+    if registry is None or username is None or password is None:
+        yield None
+        return
+
+    config_dir = _get_docker_config_dir()
+    config = {}
+    config_path = os.path.join(config_dir, "config.json")
+    if os.path.exists(config_path):
+        with open(config_path, encoding="utf-8") as f:
+            config = json.load(f)
+    # credential helpers take precedence over the credentials in auths. An empty
+    # helper makes the docker CLI read this registry's from auths, while other
+    # registries (base images, --push-to destinations) keep the user's helpers.
+    if config.get("credsStore") or registry in config.get("credHelpers", {}):
+        config.setdefault("credHelpers", {})[registry] = ""
+    auth = base64.b64encode(f"{username}:{password}".encode("utf-8")).decode()
+    config.setdefault("auths", {})[registry] = {"auth": auth}
+
+    with TempDirectory(prefix="docker-config") as tmp_config_dir:
+        if os.path.isdir(config_dir):
+            for name in os.listdir(config_dir):
+                if name != "config.json":
+                    _link_or_copy(
+                        os.path.join(config_dir, name),
+                        os.path.join(tmp_config_dir, name),
+                    )
+        fd = os.open(
+            os.path.join(tmp_config_dir, "config.json"),
+            os.O_WRONLY | os.O_CREAT,
+            0o600,
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        yield {"DOCKER_CONFIG": str(tmp_config_dir)}
+
+
+def get_buildx_image_digest(metadata_file: str) -> str | None:
+    """
+    Returns the digest of the image pushed by buildx from its --metadata-file.
+    """
+    try:
+        with open(metadata_file, encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return metadata.get("containerimage.digest")
 
 
 def tag_docker_image(image_name, image_tag):
-    docker_client = docker.from_env()
+    docker_client = get_docker_client()
     try:
         img = docker_client.images.get(image_name)
         was_tagged = img.tag(image_tag)
@@ -142,27 +529,329 @@ def tag_docker_image(image_name, image_tag):
 def push_docker_image_to_repository(
     repository, image_tag=None, username=None, password=None
 ):
-    docker_client = docker.from_env()
+    docker_client = get_docker_client()
     docker_push_kwags = {"repository": repository, "tag": image_tag}
     if username is not None and password is not None:
         docker_push_kwags["auth_config"] = {"username": username, "password": password}
     try:
+        digest = None
         progress_bar = DockerPushProgressBar()
-        with Live(progress_bar) as live:
+        live = nullcontext()
+        if use_live_display():
+            live = Live(
+                progress_bar,
+                console=console,
+                refresh_per_second=PUSH_PROGRESS_REFRESH_PER_SECOND,
+            )
+        with live:
             for line in docker_client.images.push(
                 **docker_push_kwags, decode=True, stream=True
             ):
+                if "aux" in line:
+                    digest = line["aux"].get("Digest", digest)
                 if "id" in line:
                     progress_bar.update(line)
-                    live.update(progress_bar)
+                    if not use_live_display():
+                        progress_bar.log()
                 elif "status" in line:
                     print(line.get("status"))
                 elif "errorDetail" in line:
                     raise BentoctlDockerException(
                         f"Failed to push docker image. {line['error']}"
                     )
+        if not use_live_display():
+            progress_bar.log(force=True)
         console.print(":rocket: Image pushed!")
+        return digest
     except docker.errors.APIError as error:
         raise BentoctlDockerException(
             f"Failed to push docker image {image_tag}: {error}"
         )
+
+
+class MultiPushProgress:
+    """
+    One progress bar per destination of concurrent pushes, with the bytes
+    pushed summed over the layers of the image.
+    """
+
+    def __init__(self, destinations: t.List[str]):
+        from rich.progress import (
+            BarColumn,
+            DownloadColumn,
+            Progress,
+            TextColumn,
+            TransferSpeedColumn,
+        )
+
+        self.progress = Progress(
+            TextColumn("Pushing [b]{task.description}[/]"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TextColumn("{task.fields[status]}"),
+            console=console,
+            disable=not use_live_display(),
+        )
+        self._tasks = {
+            d: self.progress.add_task(d, total=None, status="Waiting")
+            for d in destinations
+        }
+        # (current, total) bytes of every layer, by destination
+        self._layers: t.Dict[str, t.Dict[str, t.Tuple[int, int]]] = {
+            d: {} for d in destinations
+        }
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.progress.start()
+        return self
+
+    def __exit__(self, *_):
+        self.progress.stop()
+
+    def update(self, destination: str, line: t.Dict[str, t.Any]):
+        layer_id = line.get("id")
+        status = line.get("status", "")
+        detail = line.get("progressDetail") or {}
+        with self._lock:
+            layers = self._layers[destination]
+            if layer_id is not None and detail.get("total"):
+                layers[layer_id] = (detail.get("current", 0), detail["total"])
+            elif layer_id in layers and status in ("Pushed", "Layer already exists"):
+                layers[layer_id] = (layers[layer_id][1], layers[layer_id][1])
+            self.progress.update(
+                self._tasks[destination],
+                total=sum(total for _, total in layers.values()) or None,
+                completed=sum(current for current, _ in layers.values()),
+                status=status if layer_id is None else f"{layer_id}: {status}",
+            )
+
+    def finish(self, destination: str, status: str):
+        if self.progress.disable:
+            console.print(f"{destination}: {status}")
+            return
+        with self._lock:
+            task = self.progress.tasks[self._tasks[destination]]
+            self.progress.update(
+                self._tasks[destination],
+                completed=task.total or 0,
+                status=status,
+            )
+
+
+def _push_to_destination(
+    docker_client, destination: str, progress: MultiPushProgress
+) -> t.Tuple[str | None, int]:
+    """
+    Pushes the image tagged as destination and returns its digest along with
+    the number of layers the registry mounted from other repositories.
+    """
+    repository, tag = docker.utils.parse_repository_tag(destination)
+    digest = None
+    mounted_layers = 0
+    for line in docker_client.api.push(
+        repository, tag=tag or "latest", stream=True, decode=True
+    ):
+        if "errorDetail" in line:
+            raise BentoctlDockerException(
+                f"Failed to push docker image to {destination}. {line['error']}"
+            )
+        if "aux" in line:
+            digest = line["aux"].get("Digest", digest)
+        if line.get("status", "").startswith("Mounted from"):
+            mounted_layers += 1
+        progress.update(destination, line)
+    return digest, mounted_layers
+
+
+def push_docker_image_to_destinations(
+    image_name: str, destinations: t.List[str], max_workers: int | None = None
+) -> t.Dict[str, str | None]:
+    """
+    Tags the local image as each destination and pushes them concurrently on a
+    bounded thread pool, with the credentials from the docker config. Returns
+    the digest pushed to each destination.
+
+    Layers that are already in another repository of the same registry are
+    mounted from it by the docker daemon (cross-repository blob mounts) instead
+    of being uploaded again, where the registry supports it.
+    """
+    for destination in destinations:
+        tag_docker_image(image_name, destination)
+
+    docker_client = get_docker_client()
+    digests: t.Dict[str, str | None] = {}
+    errors = []
+    with MultiPushProgress(destinations) as progress, ThreadPoolExecutor(
+        max_workers=min(max_workers or PUSH_MAX_WORKERS, len(destinations))
+    ) as executor:
+        futures = {
+            executor.submit(_push_to_destination, docker_client, d, progress): d
+            for d in destinations
+        }
+        for future in as_completed(futures):
+            destination = futures[future]
+            try:
+                digests[destination], mounted_layers = future.result()
+            except (BentoctlDockerException, docker.errors.APIError) as error:
+                progress.finish(destination, "[red]Failed[/]")
+                errors.append(str(error))
+                continue
+            status = "[green]Pushed[/]"
+            if mounted_layers:
+                status += f" ({mounted_layers} layers mounted)"
+            progress.finish(destination, status)
+
+    if errors:
+        raise BentoctlDockerException("\n".join(errors))
+    return digests
+
+
+@dataclass
+class LayerStatus:
+    diff_id: str
+    in_repository: bool
+    # compressed size for layers in the repository, uncompressed otherwise
+    size: int | None
+
+
+@dataclass
+class PushPlan:
+    layers: list[LayerStatus]
+    # digest of the image in the repository if it is already there
+    image_digest: str | None = None
+
+    @property
+    def missing_layers(self) -> list[LayerStatus]:
+        return [layer for layer in self.layers if not layer.in_repository]
+
+    @property
+    def upload_size(self) -> int | None:
+        sizes = [layer.size for layer in self.missing_layers]
+        return None if None in sizes else sum(sizes)
+
+    def summary(self) -> str:
+        existing = len(self.layers) - len(self.missing_layers)
+        summary = f"{existing}/{len(self.layers)} layers already in the repository"
+        if self.missing_layers and self.upload_size is not None:
+            summary += f", up to {sizeof_fmt(self.upload_size)} to upload"
+        return summary
+
+
+def _get_layer_sizes(image, num_layers: int) -> list[int | None]:
+    """
+    The uncompressed size of each layer, from the image history. Instructions
+    that don't create a layer have a size of 0.
+    """
+    sizes = [entry["Size"] for entry in reversed(image.history()) if entry.get("Size")]
+    if len(sizes) != num_layers:
+        return [None] * num_layers
+    return sizes
+
+
+def plan_image_push(
+    image_name: str,
+    repository_image_tag: str,
+    username: str | None = None,
+    password: str | None = None,
+    previous_image_tags: t.Iterable[str] = (),
+) -> PushPlan | None:
+    """
+    Checks which layers of the local image are already in the repository.
+
+    The registry only knows layers by the digest of their compressed blobs, so
+    the blobs of the images pushed before (the target tag and
+    previous_image_tags) are matched to the local layers through the image
+    configs, and then checked with HEAD requests. Returns None if the registry
+    couldn't be queried.
+    """
+    from bentoctl.utils.registry import (
+        DOCKER_HUB_API_HOST,
+        RegistryClient,
+        parse_image_name,
+    )
+
+    docker_client = get_docker_client()
+    image = docker_client.images.get(image_name)
+    diff_ids = image.attrs["RootFS"]["Layers"]
+    sizes = _get_layer_sizes(image, len(diff_ids))
+
+    host, repository, tag = parse_image_name(repository_image_tag, DOCKER_HUB_API_HOST)
+    client = RegistryClient(host, username, password)
+    references = [tag]
+    for previous_image_tag in previous_image_tags:
+        previous = parse_image_name(previous_image_tag, DOCKER_HUB_API_HOST)
+        if previous[:2] == (host, repository) and previous[2] not in references:
+            references.append(previous[2])
+
+    # the blob digest and size of the layers pushed before, by diff id
+    known_layers: dict[str, tuple[str, int | None]] = {}
+    image_digest = None
+    try:
+        for reference in references:
+            result = client.get_image_manifest(
+                repository, reference, image.attrs["Os"], image.attrs["Architecture"]
+            )
+            if result is None:
+                continue
+            manifest, digest = result
+            config_digest = manifest["config"]["digest"]
+            if reference == tag and config_digest == image.id:
+                image_digest = digest
+            config = client.get_blob_json(repository, config_digest)
+            for diff_id, layer in zip(config["rootfs"]["diff_ids"], manifest["layers"]):
+                known_layers[diff_id] = (layer["digest"], layer.get("size"))
+        missing_blobs = client.missing_blobs(
+            repository, [known_layers[d][0] for d in diff_ids if d in known_layers]
+        )
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
+        logger.debug("Unable to check the layers in %s: %s", repository_image_tag, e)
+        return None
+    finally:
+        client.session.close()
+
+    layers = []
+    for diff_id, size in zip(diff_ids, sizes):
+        blob = known_layers.get(diff_id)
+        if blob is not None and blob[0] not in missing_blobs:
+            layers.append(LayerStatus(diff_id, True, blob[1]))
+        else:
+            layers.append(LayerStatus(diff_id, False, size))
+    plan = PushPlan(layers)
+    if not plan.missing_layers:
+        plan.image_digest = image_digest
+    return plan
+
+
+def get_local_image_id(image_name) -> str | None:
+    """
+    Returns the id of the local image, or None if it doesn't exist.
+    """
+    docker_client = get_docker_client()
+    try:
+        return docker_client.images.get(image_name).id
+    except docker.errors.ImageNotFound:
+        return None
+    except docker.errors.APIError as error:
+        raise BentoctlDockerException(
+            f"Failed to inspect docker image {image_name}: {error}"
+        )
+
+
+def get_registry_image_digest(image_name, username=None, password=None) -> str | None:
+    """
+    Returns the digest of the image in the registry, or None if it doesn't exist
+    or the registry can't be reached.
+    """
+    docker_client = get_docker_client()
+    auth_config = None
+    if username is not None and password is not None:
+        auth_config = {"username": username, "password": password}
+    try:
+        return docker_client.images.get_registry_data(
+            image_name, auth_config=auth_config
+        ).id
+    except docker.errors.APIError as error:
+        logger.debug("Unable to get %s from the registry: %s", image_name, error)
+        return None
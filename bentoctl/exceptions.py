@@ -1,6 +1,3 @@
-import yaml
-
-
 class BentoctlException(Exception):
     """
     Base class for all of bentoctl's exceptions.
@@ -84,11 +81,14 @@ class InvalidDeploymentConfig(BentoctlException):
             msg = "\n".join([str(m) for m in msg_list])
 
         if msg is None and config_errors is not None:
+            import yaml
+
             msg_list = ["Error while parsing Deployment Config."]
             msg_list.append(yaml.safe_dump(config_errors))
             msg = "\n".join(msg_list)
 
         super(InvalidDeploymentConfig, self).__init__(msg)
+        self.config_errors = config_errors
 
 
 class DeploymentConfigNotFound(BentoctlException):
@@ -168,3 +168,9 @@ class BentoctlGithubException(BentoctlException):
     """
     Raised when github request fails
     """
+
+
+class InvalidBuildManifest(BentoctlException):
+    """
+    Raised when the manifest passed to `bentoctl build-many` is invalid.
+    """
@@ -1,6 +1,26 @@
+import threading
+
 from bentoctl.operator.registry import OperatorRegistry
-from bentoctl.operator.utils import _get_bentoctl_home
+from bentoctl.operator.utils import _get_bentoctl_home_path
+
+_local_operator_registry = None
+_local_operator_registry_lock = threading.Lock()
+
+
+def get_local_operator_registry() -> OperatorRegistry:
+    """
+    Returns the process-wide operator registry for the current BENTOCTL_HOME.
 
+    The registry is created on first call and shared by every caller after that.
+    Nothing is read from or written to disk until the registry is used.
+    """
+    global _local_operator_registry  # pylint: disable=global-statement
 
-def get_local_operator_registry():
-    return OperatorRegistry(_get_bentoctl_home() / "operators")
+    operators_path = _get_bentoctl_home_path() / "operators"
+    with _local_operator_registry_lock:
+        if (
+            _local_operator_registry is None
+            or _local_operator_registry.path != operators_path
+        ):
+            _local_operator_registry = OperatorRegistry(operators_path)
+        return _local_operator_registry
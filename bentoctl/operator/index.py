@@ -0,0 +1,200 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+OPERATOR_INDEX_FILE_NAME = "operator_index.json"
+OPERATOR_INDEX_VERSION = 1
+
+# attributes of operator_config.py that are snapshotted into the index
+OPERATOR_CONFIG_ATTRIBUTES = [
+    "OPERATOR_NAME",
+    "OPERATOR_MODULE",
+    "OPERATOR_SCHEMA",
+    "OPERATOR_DEFAULT_TEMPLATE",
+    "OPERATOR_AVAILABLE_TEMPLATES",
+]
+
+# callables that show up in cerberus schemas (mostly as `coerce`) and can be
+# stored by name.
+_BUILTIN_CALLABLES = {
+    "int": int,
+    "float": float,
+    "str": str,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+}
+_BUILTIN_KEY = "__builtin__"
+
+
+class _NotSerializable(Exception):
+    pass
+
+
+def _encode(value):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value) or _BUILTIN_KEY in value:
+            raise _NotSerializable
+        return {k: _encode(v) for k, v in value.items()}
+    for name, builtin in _BUILTIN_CALLABLES.items():
+        if value is builtin:
+            return {_BUILTIN_KEY: name}
+    raise _NotSerializable
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        if list(value.keys()) == [_BUILTIN_KEY]:
+            return _BUILTIN_CALLABLES[value[_BUILTIN_KEY]]
+        return {k: _decode(v) for k, v in value.items()}
+    return value
+
+
+def snapshot_operator_config(operator_config):
+    """
+    Returns a JSON serializable snapshot of the operator_config module or None if
+    the config holds values (like custom `check_with` functions) that can only be
+    obtained by importing the module.
+    """
+    snapshot = {
+        attr: getattr(operator_config, attr)
+        for attr in OPERATOR_CONFIG_ATTRIBUTES
+        if hasattr(operator_config, attr)
+    }
+    try:
+        return _encode(snapshot)
+    except _NotSerializable:
+        return None
+
+
+def _file_digest(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class OperatorIndex:
+    """
+    Sidecar to operator_list.json that caches the metadata defined in each
+    operator's operator_config.py, so that listing and validating operators
+    doesn't have to import the operator's code.
+
+    Entries are keyed by operator name and invalidated when the mtime and
+    sha256 of operator_config.py no longer match. The index is shared by the
+    threads of `bentoctl build-many`, so entries are loaded, changed and written
+    while holding a lock.
+    """
+
+    def __init__(self, path):
+        self.index_file = os.path.join(path, OPERATOR_INDEX_FILE_NAME)
+        self._entries = None
+        # reentrant, the methods below call each other.
+        self._lock = threading.RLock()
+
+    @property
+    def entries(self):
+        with self._lock:
+            return self._load_entries()
+
+    def _load_entries(self):
+        if self._entries is None:
+            entries = {}
+            if os.path.exists(self.index_file):
+                try:
+                    with open(self.index_file, encoding="UTF-8") as f:
+                        content = json.load(f)
+                    if content.get("version") == OPERATOR_INDEX_VERSION:
+                        entries = content.get("operators", {})
+                except (OSError, ValueError, AttributeError):
+                    logger.debug(
+                        "Ignoring unreadable operator index %s", self.index_file
+                    )
+            self._entries = entries
+        return self._entries
+
+    def is_up_to_date(self, name, config_path):
+        """
+        Checks if the entry for the operator matches the config file at
+        config_path. Only the mtime and size are checked unless they changed, in
+        which case the content digest decides.
+        """
+        with self._lock:
+            entry = self._load_entries().get(name)
+            if entry is None or entry["config_path"] != os.path.abspath(config_path):
+                return False
+            try:
+                stat = os.stat(config_path)
+            except OSError:
+                return False
+            if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                return True
+            # the file was touched, only invalidate if the content changed.
+            if entry["sha256"] != _file_digest(config_path):
+                return False
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+            self.write()
+            return True
+
+    def get(self, name, config_path):
+        """
+        Returns the operator_config snapshot for the operator if it is still up
+        to date with the config file at config_path, else None.
+        """
+        with self._lock:
+            if not self.is_up_to_date(name, config_path):
+                return None
+            config = self._load_entries()[name]["config"]
+        return _decode(config) if config is not None else None
+
+    def update(self, name, config_path, operator_config):
+        stat = os.stat(config_path)
+        entry = {
+            "config_path": os.path.abspath(config_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": _file_digest(config_path),
+            "config": snapshot_operator_config(operator_config),
+        }
+        with self._lock:
+            self._load_entries()[name] = entry
+            self.write()
+
+    def remove(self, name):
+        with self._lock:
+            if self._load_entries().pop(name, None) is not None:
+                self.write()
+
+    def write(self):
+        index_dir = Path(self.index_file).parent
+        os.makedirs(index_dir, exist_ok=True)
+        with self._lock:
+            # a copy, so that the entries can't change while they are dumped.
+            operators = copy.deepcopy(self._load_entries())
+            # unique per writer, other processes may refresh the index at the
+            # same time.
+            fd, tmp_file = tempfile.mkstemp(
+                dir=index_dir, prefix=f"{OPERATOR_INDEX_FILE_NAME}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="UTF-8") as f:
+                    json.dump(
+                        {"version": OPERATOR_INDEX_VERSION, "operators": operators},
+                        f,
+                    )
+                os.replace(tmp_file, self.index_file)
+            except BaseException:
+                os.remove(tmp_file)
+                raise
@@ -1,4 +1,7 @@
+import hashlib
 import importlib
+import importlib.machinery
+import importlib.util
 import logging
 import os
 import subprocess
@@ -17,42 +20,78 @@ logger = logging.getLogger(__name__)
 
 
 class Operator:
-    def __init__(self, path, metadata=None):
+    def __init__(self, path, metadata=None, config=None):
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the operator codebase.
+        metadata : dict
+            The operator's entry in the operator registry.
+        config : dict
+            Snapshot of the values in operator_config.py (see
+            `bentoctl.operator.index`). When provided, operator_config.py is only
+            imported if a value that isn't in the snapshot is requested.
+        """
         self.path = Path(path)
         self.metadata = metadata
 
         # load the operator config
-        if not os.path.exists(os.path.join(self.path, "operator_config.py")):
+        if not os.path.exists(self.config_path):
             raise OperatorConfigNotFound(operator_path=self.path)
 
-        self.operator_config = _import_module("operator_config", self.path)
+        self._config = config
+        self._operator_config = None
+        self._operator_module = None
+        if config is None:
+            self._operator_config = _import_module("operator_config", self.path)
         self.version = metadata["version"] if metadata else None
 
+    @property
+    def config_path(self):
+        return os.path.join(self.path, "operator_config.py")
+
+    @property
+    def operator_config(self):
+        if self._operator_config is None:
+            self._operator_config = _import_module("operator_config", self.path)
+        return self._operator_config
+
+    def _has_config_value(self, attr):
+        if self._config is not None:
+            return attr in self._config
+        return hasattr(self.operator_config, attr)
+
+    def _get_config_value(self, attr):
+        if self._config is not None and attr in self._config:
+            return self._config[attr]
+        return getattr(self.operator_config, attr)
+
     @property
     def name(self):
-        return self.operator_config.OPERATOR_NAME
+        return self._get_config_value("OPERATOR_NAME")
 
     @property
     def module_name(self):
-        if hasattr(self.operator_config, "OPERATOR_MODULE"):
-            return self.operator_config.OPERATOR_MODULE
+        if self._has_config_value("OPERATOR_MODULE"):
+            return self._get_config_value("OPERATOR_MODULE")
         else:
             return self.name
 
     @property
     def schema(self):
-        return self.operator_config.OPERATOR_SCHEMA
+        return self._get_config_value("OPERATOR_SCHEMA")
 
     @property
     def default_template(self):
-        return self.operator_config.OPERATOR_DEFAULT_TEMPLATE
+        return self._get_config_value("OPERATOR_DEFAULT_TEMPLATE")
 
     @property
     def available_templates(self):
-        if hasattr(self.operator_config, "OPERATOR_AVAILABLE_TEMPLATES"):
-            return self.operator_config.OPERATOR_AVAILABLE_TEMPLATES
+        if self._has_config_value("OPERATOR_AVAILABLE_TEMPLATES"):
+            return self._get_config_value("OPERATOR_AVAILABLE_TEMPLATES")
         else:
-            return [self.operator_config.OPERATOR_DEFAULT_TEMPLATE]
+            return [self.default_template]
 
     def generate(
         self,
@@ -183,14 +222,82 @@ class Operator:
             raise PipInstallException(stderr=completedprocess.stderr.decode("utf-8"))
 
     def _load_operator_module(self):
-        return _import_module(self.module_name, self.path)
+        if self._operator_module is None:
+            self._operator_module = _import_module(self.module_name, self.path)
+        return self._operator_module
+
+
+# Operator modules are imported as submodules of a synthetic package whose
+# __path__ is the operator directory. This keeps sys.path untouched and lets
+# operators that share module names (eg. two versions of the same operator) be
+# loaded in the same process.
+OPERATOR_NAMESPACE_PREFIX = "bentoctl_operator_"
+
+
+def _get_operator_namespace_name(path):
+    path = os.path.abspath(path)
+    return f"{OPERATOR_NAMESPACE_PREFIX}{hashlib.md5(path.encode()).hexdigest()[:12]}"
+
+
+def _get_operator_namespace(path):
+    path = os.path.abspath(path)
+    namespace = _get_operator_namespace_name(path)
+    if namespace not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(namespace, None, is_package=True)
+        spec.submodule_search_locations = [path]
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[namespace] = module
+    return namespace
+
+
+def unload_operator_modules(path):
+    """
+    Removes the modules of the operator at path from sys.modules, so that they
+    are imported again from its files, eg. after the operator was updated in
+    place.
+    """
+    path = os.path.abspath(path)
+    namespace = _get_operator_namespace_name(path)
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if (
+            name == namespace
+            or name.startswith(f"{namespace}.")
+            # loaded from sys.path, see _import_module_from_sys_path
+            or (module_file and os.path.abspath(module_file).startswith(path + os.sep))
+        ):
+            del sys.modules[name]
+    importlib.invalidate_caches()
+
+
+def _is_operator_module(module_name, path):
+    top_level_name = module_name.split(".")[0]
+    return os.path.isdir(os.path.join(path, top_level_name)) or os.path.exists(
+        os.path.join(path, f"{top_level_name}.py")
+    )
+
+
+def _import_module_from_sys_path(module_name, path):
+    path = os.path.abspath(path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module_name)
 
 
 def _import_module(module_name, path):
+    namespace = _get_operator_namespace(path)
     try:
-        sys.path.insert(0, os.path.abspath(path))
-        module = importlib.import_module(module_name)
-        return module
+        try:
+            return importlib.import_module(f"{namespace}.{module_name}")
+        except ModuleNotFoundError as e:
+            # operators that import their own package by its absolute name can't
+            # be loaded in isolation, fallback to importing them from sys.path.
+            if e.name is None or not _is_operator_module(e.name, path):
+                raise
+            logger.debug(
+                "Loading %s from sys.path since it imports %s", module_name, e.name
+            )
+            return _import_module_from_sys_path(module_name, path)
     except (ImportError, ModuleNotFoundError) as e:
         logger.exception(e)
         raise OperatorLoadException(f"Failed to load module {module_name} - {e}.")
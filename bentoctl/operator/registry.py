@@ -15,7 +15,8 @@ from bentoctl.exceptions import (
     OperatorNotUpdated,
 )
 from bentoctl.operator.constants import OFFICIAL_OPERATORS
-from bentoctl.operator.operator import Operator
+from bentoctl.operator.index import OperatorIndex
+from bentoctl.operator.operator import Operator, unload_operator_modules
 from bentoctl.operator.utils import (
     _get_operator_dir_path,
     _is_official_operator,
@@ -36,10 +37,20 @@ class OperatorRegistry:
     def __init__(self, path):
         self.path = Path(path)
         self.operator_file = os.path.join(self.path, "operator_list.json")
-        self.operators_list = {}
-        if os.path.exists(self.operator_file):
-            with open(self.operator_file, encoding="UTF-8") as f:
-                self.operators_list = json.load(f)
+        self._operators_list = None
+        self.index = OperatorIndex(self.path)
+
+    @property
+    def operators_list(self):
+        # operator_list.json is read on first access so that creating a registry
+        # doesn't touch the disk.
+        if self._operators_list is None:
+            operators_list = {}
+            if os.path.exists(self.operator_file):
+                with open(self.operator_file, encoding="UTF-8") as f:
+                    operators_list = json.load(f)
+            self._operators_list = operators_list
+        return self._operators_list
 
     def list(self):
         return self.operators_list
@@ -47,12 +58,22 @@ class OperatorRegistry:
     def get(self, name: str):
         if name not in self.operators_list:
             raise OperatorNotFound(operator_name=name)
-        metadata = self.operators_list[name]
+        # a copy, operators_list is shared by the process and written as JSON
+        metadata = dict(self.operators_list[name])
         op_path = metadata["path"]
         metadata["version"] = (
             get_semver_version(metadata["version"]) if metadata.get("version") else None
         )
-        return Operator(op_path, metadata)
+        config_path = os.path.join(op_path, "operator_config.py")
+        config = self.index.get(name, config_path)
+        operator = Operator(op_path, metadata, config=config)
+        if config is None and not self.index.is_up_to_date(name, config_path):
+            # operator_config.py was imported, refresh the index with it.
+            self._index_operator(name, operator)
+        return operator
+
+    def _index_operator(self, name, operator):
+        self.index.update(name, operator.config_path, operator.operator_config)
 
     def get_operator_metadata(self, name):
         if name not in self.operators_list:
@@ -61,6 +82,7 @@ class OperatorRegistry:
         return operator
 
     def _write_to_file(self):
+        os.makedirs(self.path, exist_ok=True)
         with open(self.operator_file, "w", encoding="UTF-8") as f:
             json.dump(self.operators_list, f)
 
@@ -152,6 +174,7 @@ class OperatorRegistry:
             operator_name, operator_info = self._install_custom_operators(name)
         self.operators_list[operator_name] = operator_info
         self._write_to_file()
+        self._index_operator(operator_name, Operator(operator_info["path"]))
         return operator_name
 
     def update_operator(self, name: str, version: t.Optional[str] = None):
@@ -185,6 +208,9 @@ class OperatorRegistry:
             shutil.move(operator_path, tmp_operator_dir_path)
             self._download_install_official_operator(repo_name, updated_version_str)
             self.operators_list[name]["version"] = updated_version_str
+            # the old version's modules are cached under the same path
+            unload_operator_modules(operator_path)
+            self._index_operator(name, Operator(operator_path))
 
             return name
         except Exception as e:
@@ -205,6 +231,7 @@ class OperatorRegistry:
             shutil.rmtree(self.operators_list[name]["path"])
         del self.operators_list[name]
         self._write_to_file()
+        self.index.remove(name)
 
     def get_operator_versions(self, name):
         """
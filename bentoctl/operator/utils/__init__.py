@@ -6,9 +6,13 @@ from semantic_version import Version
 from bentoctl.operator.constants import OFFICIAL_OPERATORS
 
 
-def _get_bentoctl_home():
+def _get_bentoctl_home_path() -> Path:
     default_bentoctl_home = os.path.expanduser("~/bentoctl")
-    bentoctl_home = Path(os.environ.get("BENTOCTL_HOME", default_bentoctl_home))
+    return Path(os.environ.get("BENTOCTL_HOME", default_bentoctl_home))
+
+
+def _get_bentoctl_home():
+    bentoctl_home = _get_bentoctl_home_path()
     # if not present create bentoctl and bentoctl/operators dir
     if not bentoctl_home.exists():
         os.mkdir(bentoctl_home)
@@ -1,8 +1,6 @@
 import os.path
 import tarfile
 
-import requests
-
 from bentoctl.exceptions import BentoctlGithubException
 
 
@@ -10,6 +8,8 @@ def github_get_call(url):
     """
     Get a GitHub API call.
     """
+    import requests
+
     headers = {
         "Accept": "application/vnd.github.v3+json",
     }
@@ -70,6 +70,8 @@ def download_github_release(repo_name: str, output_dir: str, tag: str):
     """
     Download a GitHub release in tar.gz file.
     """
+    import requests
+
     if tag:
         url = f"https://api.github.com/repos/{repo_name}/releases/tags/{tag}"
     else:
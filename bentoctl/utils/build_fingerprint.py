@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import typing as t
+import uuid
+
+if t.TYPE_CHECKING:
+    from bentoctl.deployment_config import DeploymentConfig
+
+logger = logging.getLogger(__name__)
+
+BUILD_FINGERPRINT_VERSION = 1
+# spec fields that are set by `build` itself and so don't affect the image.
+_GENERATED_SPEC_FIELDS = {"image_tag"}
+# directories inside an operator that don't affect the deployable it creates.
+_IGNORED_OPERATOR_DIRS = {".git", "__pycache__", ".pytest_cache", "tests"}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _bento_digest(bento_path: str) -> str | None:
+    """
+    The digest of bento.yaml, which records the bento's creation time and the
+    models it contains. Bento contents never change for a given bento.yaml.
+    """
+    try:
+        with open(os.path.join(bento_path, "bento.yaml"), "rb") as f:
+            return _sha256(f.read())
+    except OSError:
+        return None
+
+
+def _operator_digest(operator_path: str) -> str:
+    """
+    A digest of the path, size and mtime of every file in the operator, so that
+    local operators that are being worked on invalidate the fingerprint too.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, filenames in os.walk(operator_path):
+        dirs[:] = sorted(d for d in dirs if d not in _IGNORED_OPERATOR_DIRS)
+        for filename in sorted(filenames):
+            file_path = os.path.join(root, filename)
+            file_stat = os.stat(file_path)
+            digest.update(
+                f"{os.path.relpath(file_path, operator_path)}:{file_stat.st_size}:"
+                f"{file_stat.st_mtime_ns}\n".encode("utf-8")
+            )
+    return digest.hexdigest()
+
+
+def compute_build_fingerprint(
+    deployment_config: DeploymentConfig, buildx_options: dict[str, t.Any]
+) -> dict[str, t.Any]:
+    """
+    Returns everything that determines the image `bentoctl build` pushes for
+    this deployment config: the bento, the operator, the deployment spec and the
+    buildx options, along with their combined `digest`.
+    """
+    operator = deployment_config.operator
+    spec = {
+        k: v
+        for k, v in deployment_config.operator_spec.items()
+        if k not in _GENERATED_SPEC_FIELDS
+    }
+    fingerprint = {
+        "version": BUILD_FINGERPRINT_VERSION,
+        "bento": {
+            "tag": str(deployment_config.bento.tag),
+            "digest": _bento_digest(deployment_config.bento.path),
+        },
+        "operator": {
+            "name": deployment_config.operator_name,
+            "version": str(operator.version) if operator.version else None,
+            "digest": _operator_digest(str(operator.path)),
+        },
+        "deployment": {
+            "name": deployment_config.deployment_name,
+            "template": deployment_config.template_type,
+            "spec": spec,
+        },
+        "buildx": buildx_options,
+    }
+    fingerprint["digest"] = _sha256(
+        json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")
+    )
+    return fingerprint
+
+
+def get_build_record_path(deployment_config_file: str) -> str:
+    """
+    The build record is saved next to the deployment config, eg.
+    `.deployment_config.yaml.build.json`.
+    """
+    dirname, basename = os.path.split(os.path.abspath(deployment_config_file))
+    return os.path.join(dirname, f".{basename}.build.json")
+
+
+def load_build_record(record_path: str) -> dict[str, t.Any] | None:
+    try:
+        with open(record_path, encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or "fingerprint" not in record:
+        return None
+    return record
+
+
+def save_build_record(record_path: str, record: dict[str, t.Any]):
+    tmp_path = f"{record_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, sort_keys=True, default=str)
+    os.replace(tmp_path, record_path)
+    logger.debug("Saved build record to %s", record_path)
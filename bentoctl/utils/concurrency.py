@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def run_in_background(
+    func: t.Callable[..., t.Any], *args: t.Any, **kwargs: t.Any
+) -> t.Generator[Future, None, None]:
+    """
+    Calls func in a background thread while the block runs and yields its
+    Future. The thread runs in a copy of the current context, so its timing
+    spans are recorded.
+
+    If the block fails, the call is cancelled when it hasn't started yet.
+    Running calls (eg. cloud API requests) can't be interrupted, so they are
+    waited for before the block's exception propagates.
+    """
+    context = contextvars.copy_context()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bentoctl")
+    future = executor.submit(context.run, func, *args, **kwargs)
+    try:
+        yield future
+    except BaseException:
+        if not future.cancel():
+            logger.debug("Waiting for %s to finish", getattr(func, "__name__", func))
+        raise
+    finally:
+        executor.shutdown(wait=True)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+import posixpath
+import re
+import typing as t
+
+logger = logging.getLogger(__name__)
+
+MODEL_BUILD_CONTEXT_PREFIX = "bentoctl-model-"
+# the instruction in bento Dockerfiles that copies the whole bento into the
+# image, eg. `COPY --chown=bentoml:bentoml . ./`
+_BENTO_COPY_RE = re.compile(r"^COPY\s+((?:--\S+\s+)*)\.\s+\./?\s*$", re.IGNORECASE)
+_CHOWN_RE = re.compile(r"--chown=\S+")
+
+
+def get_model_build_context_name(model_path: str) -> str:
+    """
+    The buildx build context name for a model, eg. `bentoctl-model-iris-v1` for
+    `iris/v1`. Context names follow the rules for image names.
+    """
+    name = re.sub(r"[^a-z0-9]+", "-", model_path.lower()).strip("-")
+    return f"{MODEL_BUILD_CONTEXT_PREFIX}{name}"
+
+
+def add_model_layers(
+    dockerfile_path: str, models: t.List[t.Tuple[str, str]]
+) -> t.Dict[str, str] | None:
+    """
+    Rewrites the Dockerfile so that each (path in the bento, staged model dir)
+    in models is copied into the image from its own build context, in its own
+    layer, right before the rest of the bento. Paths in the bento use forward
+    slashes, as they are written into the Dockerfile. Returns the build contexts
+    to pass to buildx, or None if the Dockerfile doesn't copy the bento with a
+    single `COPY . ./` and the models have to be in the main build context.
+
+    The model layers use `COPY --link`, so their digests only depend on the
+    model files: changes to the code, or to the python packages installed
+    before them, don't invalidate and re-push the models.
+    """
+    with open(dockerfile_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    copy_index = next(
+        (i for i, line in enumerate(lines) if _BENTO_COPY_RE.match(line.strip())),
+        None,
+    )
+    if copy_index is None:
+        logger.warning(
+            "%s doesn't copy the bento with 'COPY . ./', models are built into "
+            "the same layer as the bento.",
+            dockerfile_path,
+        )
+        return None
+
+    chown = _CHOWN_RE.search(_BENTO_COPY_RE.match(lines[copy_index].strip())[1])
+    flags = ["--link"] + ([chown[0]] if chown else [])
+    build_contexts = {}
+    model_lines = []
+    # sorted so that the layers keep their order as models are added or removed
+    for path_in_bento, model_dir in sorted(models):
+        context_name = get_model_build_context_name(
+            posixpath.relpath(path_in_bento, "models")
+        )
+        build_contexts[context_name] = model_dir
+        model_lines.append(
+            f"COPY --from={context_name} {' '.join(flags)} . "
+            f"./{path_in_bento.strip('/')}/"
+        )
+    lines[copy_index:copy_index] = model_lines
+
+    with open(dockerfile_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return build_contexts
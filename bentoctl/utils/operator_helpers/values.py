@@ -1,4 +1,7 @@
 import json
+import os
+import shutil
+import tempfile
 from collections import UserDict
 
 DEPLOYMENT_PARAMS_WARNING = """# This file is maintained automatically by
@@ -7,6 +10,10 @@ DEPLOYMENT_PARAMS_WARNING = """# This file is maintained automatically by
 
 """
 
+# read once, os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 
 class DeploymentValues(UserDict):
     def __init__(self, name, spec, template_type):
@@ -26,14 +33,18 @@ class DeploymentValues(UserDict):
         return registry_url, repository, version
 
     def to_params_file(self, file_path):
+        """
+        Writes the values file, returning whether its contents changed.
+        """
         if self.template_type == "terraform":
-            self.generate_terraform_tfvars_file(file_path)
+            return self.generate_terraform_tfvars_file(file_path)
+        return False
 
     @classmethod
     def from_params_file(cls, file_path):
         pass
 
-    def generate_terraform_tfvars_file(self, file_path):
+    def render_terraform_tfvars(self) -> str:
         params = []
         for param_name, param_value in self.items():
             if isinstance(param_value, (dict, list)):
@@ -44,7 +55,37 @@ class DeploymentValues(UserDict):
                 write_value = f'"{param_value}"'
             params.append(f"{param_name} = {write_value}")
 
-        with open(file_path, "w", encoding="utf-8") as params_file:
-            params_file.write(DEPLOYMENT_PARAMS_WARNING)
-            params_file.write("\n".join(params))
-            params_file.write("\n")
+        return DEPLOYMENT_PARAMS_WARNING + "\n".join(params) + "\n"
+
+    def generate_terraform_tfvars_file(self, file_path) -> bool:
+        """
+        Writes the tfvars file if its contents changed, leaving the existing file
+        (and its mtime) untouched otherwise. Returns whether it was written.
+        """
+        contents = self.render_terraform_tfvars()
+        try:
+            with open(file_path, encoding="utf-8") as params_file:
+                if params_file.read() == contents:
+                    return False
+        except (OSError, ValueError):
+            pass
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(file_path)),
+            prefix=f"{os.path.basename(file_path)}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as params_file:
+                params_file.write(contents)
+            if os.path.exists(file_path):
+                # keep the permissions of the file being replaced
+                shutil.copymode(file_path, tmp_path)
+            else:
+                # mkstemp creates the file readable by the owner only
+                os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return True
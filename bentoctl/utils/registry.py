@@ -0,0 +1,196 @@
+"""
+A minimal client for the registry HTTP API (distribution spec), used to find
+out what is already in a repository before pushing to it.
+"""
+
+from __future__ import annotations
+
+import base64
+import logging
+import re
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DOCKER_HUB_API_HOST = "registry-1.docker.io"
+MANIFEST_MEDIA_TYPES = [
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.oci.image.index.v1+json",
+]
+_INDEX_MEDIA_TYPES = {
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.index.v1+json",
+}
+# concurrent HEAD requests when checking blobs, and connections kept open.
+REGISTRY_MAX_WORKERS = 8
+_CHALLENGE_PARAM_RE = re.compile(r'(\w+)="([^"]*)"')
+
+
+class RegistryClient:
+    """
+    Talks to one registry over a pooled session. Bearer tokens are requested
+    per repository from the registry's auth server when it asks for them (the
+    `WWW-Authenticate` challenge), with the username and password if given.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        username: str | None = None,
+        password: str | None = None,
+        timeout: float = 30,
+    ):
+        insecure = host.split(":")[0] in ("localhost", "127.0.0.1")
+        self.base_url = f"{'http' if insecure else 'https'}://{host}/v2"
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=REGISTRY_MAX_WORKERS, max_retries=2
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._authorization: dict[str, str] = {}
+
+    def _authenticate(self, repository: str, challenge: str) -> str | None:
+        scheme, _, params = challenge.partition(" ")
+        basic_auth = None
+        if self.username is not None and self.password is not None:
+            basic_auth = (self.username, self.password)
+        if scheme.lower() == "basic":
+            if basic_auth is None:
+                return None
+            credentials = base64.b64encode(":".join(basic_auth).encode("utf-8"))
+            return f"Basic {credentials.decode()}"
+        if scheme.lower() != "bearer":
+            return None
+        params = dict(_CHALLENGE_PARAM_RE.findall(params))
+        response = self.session.get(
+            params.pop("realm"),
+            params={
+                "service": params.get("service"),
+                "scope": f"repository:{repository}:pull",
+            },
+            auth=basic_auth,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        body = response.json()
+        token = body.get("token") or body.get("access_token")
+        return f"Bearer {token}" if token else None
+
+    def _request(
+        self, method: str, repository: str, path: str, **kwargs
+    ) -> requests.Response:
+        url = f"{self.base_url}/{repository}/{path}"
+        headers = kwargs.pop("headers", {})
+        for attempt in range(2):
+            authorization = self._authorization.get(repository)
+            if authorization is not None:
+                headers["Authorization"] = authorization
+            response = self.session.request(
+                method, url, headers=headers, timeout=self.timeout, **kwargs
+            )
+            challenge = response.headers.get("WWW-Authenticate")
+            if response.status_code != 401 or challenge is None or attempt:
+                return response
+            authorization = self._authenticate(repository, challenge)
+            if authorization is None:
+                return response
+            self._authorization[repository] = authorization
+        return response
+
+    def blob_exists(self, repository: str, digest: str) -> bool:
+        response = self._request("HEAD", repository, f"blobs/{digest}")
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def missing_blobs(self, repository: str, digests: t.Iterable[str]) -> set[str]:
+        """
+        Returns the digests that are not in the repository, checked concurrently.
+        """
+        digests = list(dict.fromkeys(digests))
+        if not digests:
+            return set()
+        # authenticate once before fanning out
+        exists = [self.blob_exists(repository, digests[0])]
+        with ThreadPoolExecutor(max_workers=REGISTRY_MAX_WORKERS) as executor:
+            exists += executor.map(
+                lambda d: self.blob_exists(repository, d), digests[1:]
+            )
+        return {d for d, e in zip(digests, exists) if not e}
+
+    def get_manifest(
+        self, repository: str, reference: str
+    ) -> tuple[dict[str, t.Any], str] | None:
+        """
+        Returns the manifest for the tag or digest and its digest, or None if
+        there is no such manifest.
+        """
+        response = self._request(
+            "GET",
+            repository,
+            f"manifests/{reference}",
+            headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)},
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json(), response.headers.get("Docker-Content-Digest", "")
+
+    def get_image_manifest(
+        self, repository: str, reference: str, os_name: str, architecture: str
+    ) -> tuple[dict[str, t.Any], str] | None:
+        """
+        Like `get_manifest`, resolving multi-platform images to the manifest for
+        the given platform.
+        """
+        result = self.get_manifest(repository, reference)
+        if result is None:
+            return None
+        manifest, digest = result
+        if manifest.get("mediaType") in _INDEX_MEDIA_TYPES or "manifests" in manifest:
+            for entry in manifest.get("manifests", []):
+                platform = entry.get("platform", {})
+                if (
+                    platform.get("os") == os_name
+                    and platform.get("architecture") == architecture
+                ):
+                    return self.get_manifest(repository, entry["digest"])
+            return None
+        return manifest, digest
+
+    def get_blob_json(self, repository: str, digest: str) -> dict[str, t.Any]:
+        response = self._request("GET", repository, f"blobs/{digest}")
+        response.raise_for_status()
+        return response.json()
+
+
+def parse_image_name(image_name: str, docker_hub_host: str) -> tuple[str, str, str]:
+    """
+    Splits `host/repository:tag` into its parts. Images without a registry
+    host (and official images, as `library/<name>`) are on Docker Hub.
+    """
+    name = image_name.replace("https://", "")
+    name, _, digest = name.partition("@")
+    tag = digest
+    if not digest:
+        repository_part, _, last = name.rpartition("/")
+        last, _, tag = last.partition(":")
+        name = f"{repository_part}/{last}" if repository_part else last
+        tag = tag or "latest"
+    host, sep, repository = name.partition("/")
+    if not sep or not ("." in host or ":" in host or host == "localhost"):
+        host, repository = docker_hub_host, name
+        if "/" not in repository:
+            repository = f"library/{repository}"
+    return host, repository, tag
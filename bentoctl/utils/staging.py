@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import sys
+import typing as t
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+STAGING_STRATEGY_AUTO = "auto"
+STAGING_STRATEGY_COPY = "copy"
+STAGING_STRATEGY_REFLINK = "reflink"
+STAGING_STRATEGY_HARDLINK = "hardlink"
+STAGING_STRATEGIES = [
+    STAGING_STRATEGY_AUTO,
+    STAGING_STRATEGY_COPY,
+    STAGING_STRATEGY_REFLINK,
+    STAGING_STRATEGY_HARDLINK,
+]
+STAGING_STRATEGY_ENV_VAR = "BENTOCTL_STAGING_STRATEGY"
+# staging is bound by disk I/O, a few concurrent copies are enough to keep an
+# NVMe drive busy without thrashing spinning disks too much.
+STAGING_MAX_WORKERS = 8
+
+# ioctl request for FICLONE (see `man ioctl_ficlone`), supported on Linux by
+# btrfs, xfs (with reflink=1), bcachefs and overlayfs on top of those.
+FICLONE = 0x40049409
+
+# errors that mean the link can't be created between these two paths, in which
+# case the file is copied instead.
+_LINK_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EMLINK,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.ENOSYS,
+}
+
+
+def _reflink_file(src: str, dst: str):
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflinks are only supported on Linux", src)
+    import fcntl
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(dst)
+            raise
+    shutil.copymode(src, dst)
+
+
+# bytes handed to the kernel per copy_file_range call. The data never passes
+# through userspace so memory usage doesn't depend on the file size.
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+# errors from copy_file_range that mean it can't be used for these files.
+_COPY_FILE_RANGE_UNSUPPORTED_ERRNOS = _LINK_UNSUPPORTED_ERRNOS | {errno.EBADF}
+
+
+def _copy_file_range(src: str, dst: str) -> bool:
+    """
+    Copies src to dst with os.copy_file_range, which lets the kernel (or the
+    filesystem, eg. server side copies on NFS) do the copy. Returns False if it
+    isn't supported for these files.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(
+                    src_file.fileno(),
+                    dst_file.fileno(),
+                    min(remaining, COPY_CHUNK_SIZE),
+                )
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError as e:
+            if e.errno not in _COPY_FILE_RANGE_UNSUPPORTED_ERRNOS:
+                raise
+            return False
+    return remaining <= 0
+
+
+def _copy_file(src: str, dst: str):
+    # shutil.copyfile falls back to sendfile on Linux and fcopyfile on macOS,
+    # both of which also copy in bounded chunks.
+    if not _copy_file_range(src, dst):
+        shutil.copyfile(src, dst)
+    shutil.copymode(src, dst)
+
+
+def stage_file(src: str, dst: str, strategy: str = STAGING_STRATEGY_AUTO) -> str:
+    """
+    Places the file at src into dst using the given strategy and returns the
+    strategy that was actually used.
+
+    "hardlink" and "reflink" fall back to copying when the link can't be
+    created, eg. when src and dst are on different filesystems. "auto" tries a
+    reflink first. Hardlinked files share their inode with the source, so they
+    must not be modified in place.
+    """
+    if strategy == STAGING_STRATEGY_HARDLINK:
+        try:
+            os.link(src, dst)
+            return STAGING_STRATEGY_HARDLINK
+        except OSError as e:
+            if e.errno not in _LINK_UNSUPPORTED_ERRNOS:
+                raise
+            logger.debug("Unable to hardlink %s (%s), copying instead.", src, e)
+    elif strategy in (STAGING_STRATEGY_REFLINK, STAGING_STRATEGY_AUTO):
+        try:
+            _reflink_file(src, dst)
+            return STAGING_STRATEGY_REFLINK
+        except OSError as e:
+            if e.errno not in _LINK_UNSUPPORTED_ERRNOS:
+                raise
+            logger.debug("Unable to reflink %s (%s), copying instead.", src, e)
+    elif strategy != STAGING_STRATEGY_COPY:
+        raise ValueError(
+            f"Unknown staging strategy {strategy}, expected one of "
+            f"{STAGING_STRATEGIES}"
+        )
+
+    _copy_file(src, dst)
+    return STAGING_STRATEGY_COPY
+
+
+def walk_tree(src_dir: str) -> t.Iterator[t.Tuple[str, t.List[str], t.List[str]]]:
+    """
+    os.walk that follows symlinked directories, as the bento and model stores
+    are mirrored with their contents, except for links to one of their own
+    parent directories which would never end.
+    """
+    ancestors = {src_dir: {_dir_id(src_dir)}}
+    for root, dirs, filenames in os.walk(src_dir, followlinks=True):
+        root_ancestors = ancestors.pop(root)
+        for dirname in list(dirs):
+            path = os.path.join(root, dirname)
+            dir_id = _dir_id(path)
+            if dir_id in root_ancestors:
+                logger.warning("Skipping %s, it links to a parent directory.", path)
+                dirs.remove(dirname)
+            else:
+                ancestors[path] = root_ancestors | {dir_id}
+        yield root, dirs, filenames
+
+
+def _dir_id(path: str) -> t.Tuple[int, int]:
+    dir_stat = os.stat(path)
+    return dir_stat.st_dev, dir_stat.st_ino
+
+
+def _collect_files(src_dir: str, dst_dir: str) -> t.List[t.Tuple[str, str, int]]:
+    """
+    Creates the directory structure of src_dir inside dst_dir and returns the
+    (src, dst, size) of every file that needs to be staged.
+    """
+    files = []
+    for root, dirs, filenames in walk_tree(src_dir):
+        relative_root = os.path.relpath(root, src_dir)
+        dst_root = os.path.normpath(os.path.join(dst_dir, relative_root))
+        os.makedirs(dst_root, exist_ok=True)
+        for dirname in dirs:
+            os.makedirs(os.path.join(dst_root, dirname), exist_ok=True)
+        for filename in filenames:
+            src_file = os.path.join(root, filename)
+            dst_file = os.path.join(dst_root, filename)
+            if os.path.lexists(dst_file):
+                os.remove(dst_file)
+            files.append((src_file, dst_file, os.path.getsize(src_file)))
+    return files
+
+
+def stage_trees(
+    trees: t.List[t.Tuple[str, str]],
+    strategy: str = STAGING_STRATEGY_AUTO,
+    max_workers: int | None = None,
+    labels: t.List[str] | None = None,
+    show_progress: bool = False,
+) -> t.Dict[str, int]:
+    """
+    Recreates each (src_dir, dst_dir) directory tree, placing every file with
+    `stage_file`. Files from all the trees are staged concurrently by a bounded
+    thread pool, largest first (see `map_files`). Returns the number of files
+    staged with each strategy.
+
+    When show_progress is set, a progress bar is shown for every tree, labeled
+    with the matching entry from labels.
+    """
+    if labels is None:
+        labels = [src_dir for src_dir, _ in trees]
+
+    # keyed by destination so that trees staged into each other (eg. a model
+    # already present in the bento) are only written once, by the later tree.
+    files_by_dst = {}
+    for tree_index, (src_dir, dst_dir) in enumerate(trees):
+        for src, dst, size in _collect_files(src_dir, dst_dir):
+            files_by_dst[dst] = (tree_index, size, (src, dst, strategy))
+
+    stats: t.Dict[str, int] = {}
+    for used in map_files(
+        stage_file,
+        list(files_by_dst.values()),
+        labels,
+        max_workers=max_workers,
+        show_progress=show_progress,
+    ):
+        stats[used] = stats.get(used, 0) + 1
+    return stats
+
+
+def map_files(
+    func: t.Callable[..., t.Any],
+    files: t.List[t.Tuple[int, int, tuple]],
+    labels: t.List[str],
+    max_workers: int | None = None,
+    show_progress: bool = False,
+    description: str = "Staging",
+) -> t.List[t.Any]:
+    """
+    Calls func(*args) for every (label_index, size, args) in files on a bounded
+    thread pool, largest files first, and returns the results in the order of
+    files. The sizes drive a byte based progress bar per label when
+    show_progress is set.
+    """
+    if max_workers is None:
+        max_workers = STAGING_MAX_WORKERS
+    order = sorted(range(len(files)), key=lambda i: files[i][1], reverse=True)
+    results: t.List[t.Any] = [None] * len(files)
+    with _StagingProgress(show_progress, description) as progress:
+        task_ids = [
+            progress.add_task(
+                label, total=sum(size for index, size, _ in files if index == i)
+            )
+            for i, label in enumerate(labels)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(func, *files[i][2]): i for i in order}
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[i] = future.result()
+                    progress.advance(task_ids[files[i][0]], files[i][1])
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    return results
+
+
+def stage_tree(
+    src_dir: str, dst_dir: str, strategy: str = STAGING_STRATEGY_AUTO
+) -> t.Dict[str, int]:
+    """
+    Recreates the directory tree at src_dir inside dst_dir, see `stage_trees`.
+    """
+    return stage_trees([(src_dir, dst_dir)], strategy)
+
+
+class _StagingProgress:
+    """
+    Byte based progress bars for map_files, a no-op unless enabled.
+    """
+
+    def __init__(self, enabled: bool, description: str = "Staging"):
+        from bentoctl.console import use_live_display
+
+        self.progress = None
+        if enabled and use_live_display():
+            from rich.progress import (
+                BarColumn,
+                DownloadColumn,
+                Progress,
+                TextColumn,
+                TransferSpeedColumn,
+            )
+
+            from bentoctl.console import console
+
+            self.progress = Progress(
+                TextColumn(f"{description} [b]{{task.description}}[/]"),
+                BarColumn(),
+                DownloadColumn(),
+                TransferSpeedColumn(),
+                console=console,
+                transient=True,
+            )
+
+    def __enter__(self):
+        if self.progress is not None:
+            self.progress.start()
+        return self
+
+    def __exit__(self, *_):
+        if self.progress is not None:
+            self.progress.stop()
+
+    def add_task(self, description: str, total: int):
+        if self.progress is None:
+            return None
+        return self.progress.add_task(description, total=total)
+
+    def advance(self, task_id, size: int):
+        if self.progress is not None:
+            self.progress.advance(task_id, size)
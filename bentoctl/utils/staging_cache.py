@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import stat
+import sys
+import time
+import typing as t
+import uuid
+from contextlib import contextmanager
+
+from bentoctl.exceptions import BentoctlException
+from bentoctl.utils.staging import (
+    STAGING_STRATEGY_AUTO,
+    STAGING_STRATEGY_HARDLINK,
+    map_files,
+    stage_file,
+    walk_tree,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGING_CACHE_ENV_VAR = "BENTOCTL_STAGING_CACHE"
+STAGING_CACHE_MAX_SIZE_ENV_VAR = "BENTOCTL_STAGING_CACHE_MAX_SIZE"
+DEFAULT_STAGING_CACHE_MAX_SIZE = "50GB"
+STAGING_CACHE_VERSION = 2
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(size: str) -> int:
+    """
+    Parses sizes like '512MB', '20G' or '1024' (bytes) into bytes.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*", size, re.I)
+    if match is None:
+        raise BentoctlException(f"Invalid size '{size}', use eg. '500MB' or '20GB'.")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def _file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_signature(src_dir: str) -> str:
+    """
+    A digest of the relative path, size and mtime of every file in src_dir, to
+    notice a tree that changed under the same tag (eg. a bento rebuilt with an
+    explicit version).
+    """
+    files = []
+    for root, _, filenames in walk_tree(src_dir):
+        for filename in filenames:
+            file_stat = os.stat(os.path.join(root, filename))
+            relative_path = os.path.relpath(os.path.join(root, filename), src_dir)
+            files.append(
+                (
+                    relative_path.replace(os.sep, "/"),
+                    file_stat.st_size,
+                    file_stat.st_mtime_ns,
+                )
+            )
+    return hashlib.sha256(json.dumps(sorted(files)).encode()).hexdigest()
+
+
+class StagingCache:
+    """
+    Content-addressed cache of staged bento and model files.
+
+    Every cached tree (a bento or a model, identified by its tag) has a manifest
+    in `entries/` that maps its relative file paths to objects in `objects/`,
+    along with a signature of the source tree it was cached from. An entry whose
+    source changed since is replaced.
+    Objects are named by the sha256 and mode of the file so identical files are
+    stored once. Objects belong to the cache (they are never linked to the bento
+    or model stores) and are checked against their recorded size and mtime
+    before each use, so an object that was modified in place through a hardlink
+    is dropped instead of being reused.
+
+    When the cache grows past max_size the least recently used entries are
+    removed.
+    """
+
+    def __init__(self, path, max_size: int | None = None):
+        self.path = str(path)
+        self.objects_dir = os.path.join(self.path, "objects")
+        self.entries_dir = os.path.join(self.path, "entries")
+        self.max_size = max_size
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(
+            self.entries_dir, f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+        )
+
+    def _object_path(self, name: str) -> str:
+        return os.path.join(self.objects_dir, name[:2], name)
+
+    @contextmanager
+    def _lock(self, exclusive: bool = False, blocking: bool = True):
+        """
+        Entries are used under a shared lock and pruned under an exclusive one,
+        so objects aren't deleted while another build links them. Yields False
+        if blocking is not set and the lock couldn't be taken.
+        """
+        if sys.platform == "win32":
+            yield True
+            return
+        import fcntl
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "a+", encoding="utf-8") as f:
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(f.fileno(), flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _read_entry(self, key: str) -> dict | None:
+        try:
+            with open(self._entry_path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != STAGING_CACHE_VERSION or entry.get("key") != key:
+            return None
+        return entry
+
+    def _write_entry(self, entry: dict):
+        os.makedirs(self.entries_dir, exist_ok=True)
+        entry_path = self._entry_path(entry["key"])
+        tmp_path = f"{entry_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+
+    def _is_valid(self, entry: dict) -> bool:
+        valid = True
+        for file_info in entry["files"]:
+            object_path = self._object_path(file_info["object"])
+            try:
+                object_stat = os.stat(object_path)
+            except FileNotFoundError:
+                valid = False
+                continue
+            if (
+                object_stat.st_size != file_info["size"]
+                or object_stat.st_mtime_ns != file_info["mtime_ns"]
+            ):
+                logger.warning("Removing modified staging cache object %s", object_path)
+                os.remove(object_path)
+                valid = False
+        return valid
+
+    def _add_object(self, src: str) -> dict:
+        mode = stat.S_IMODE(os.stat(src).st_mode)
+        name = f"{_file_digest(src)}.{mode:o}"
+        object_path = self._object_path(name)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{uuid.uuid4().hex}.tmp"
+            # never hardlink into the cache, objects must not share their inode
+            # with the bento and model stores.
+            stage_file(src, tmp_path, STAGING_STRATEGY_AUTO)
+            try:
+                # unlike os.replace this never swaps out an existing object,
+                # whose mtime may already be recorded by another entry.
+                os.link(tmp_path, object_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+        object_stat = os.stat(object_path)
+        return {
+            "object": name,
+            "size": object_stat.st_size,
+            "mtime_ns": object_stat.st_mtime_ns,
+        }
+
+    def _add_entries(self, trees: t.List[t.Tuple[str, str, str]], show_progress: bool):
+        files = []
+        for tree_index, (_, src_dir, _) in enumerate(trees):
+            for root, _, filenames in walk_tree(src_dir):
+                for filename in filenames:
+                    src = os.path.join(root, filename)
+                    files.append((tree_index, os.path.getsize(src), (src,)))
+        objects = map_files(
+            self._add_object,
+            files,
+            [key for key, _, _ in trees],
+            show_progress=show_progress,
+            description="Caching",
+        )
+
+        entries = [
+            {
+                "version": STAGING_CACHE_VERSION,
+                "key": key,
+                "source": source,
+                "created": time.time(),
+                "files": [],
+            }
+            for key, _, source in trees
+        ]
+        for (tree_index, _, (src,)), object_info in zip(files, objects):
+            object_info["path"] = os.path.relpath(src, trees[tree_index][1])
+            entries[tree_index]["files"].append(object_info)
+        for entry in entries:
+            entry["size"] = sum(f["size"] for f in entry["files"])
+            self._write_entry(entry)
+        return entries
+
+    def stage(
+        self,
+        trees: t.List[t.Tuple[str, str, str]],
+        dst_dir: str,
+        strategy: str = STAGING_STRATEGY_AUTO,
+        show_progress: bool = False,
+    ) -> t.Dict[str, int]:
+        """
+        Stages each (key, src_dir, relative_dst_dir) tree into dst_dir through
+        the cache, adding the trees that are not cached yet or whose source
+        changed since they were cached. Keys identify the trees, eg. bento and
+        model tags.
+
+        Files are linked out of the cache with `strategy`, where "auto" means
+        hardlinks since the objects are owned by the cache.
+        """
+        if strategy == STAGING_STRATEGY_AUTO:
+            strategy = STAGING_STRATEGY_HARDLINK
+
+        with self._lock():
+            entries = {}
+            missing = []
+            for key, src_dir, _ in trees:
+                source = _source_signature(src_dir)
+                entry = self._read_entry(key)
+                if (
+                    entry is not None
+                    and entry.get("source") == source
+                    and self._is_valid(entry)
+                ):
+                    entries[key] = entry
+                else:
+                    missing.append((key, src_dir, source))
+            logger.debug(
+                "Staging cache: %d hit(s), %d miss(es)", len(entries), len(missing)
+            )
+            for entry in self._add_entries(missing, show_progress):
+                entries[entry["key"]] = entry
+
+            files = []
+            for tree_index, (key, _, relative_dst_dir) in enumerate(trees):
+                entry = entries[key]
+                os.utime(self._entry_path(key))  # mark as recently used
+                for file_info in entry["files"]:
+                    dst = os.path.join(dst_dir, relative_dst_dir, file_info["path"])
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    if os.path.lexists(dst):
+                        os.remove(dst)
+                    src = self._object_path(file_info["object"])
+                    files.append((tree_index, file_info["size"], (src, dst, strategy)))
+
+            stats: t.Dict[str, int] = {}
+            for used in map_files(
+                stage_file,
+                files,
+                [key for key, _, _ in trees],
+                show_progress=show_progress,
+            ):
+                stats[used] = stats.get(used, 0) + 1
+
+        if self.max_size is not None:
+            # skip pruning if another build is using the cache right now.
+            self.prune(self.max_size, blocking=False)
+        return stats
+
+    def prune(
+        self, max_size: int = 0, blocking: bool = True
+    ) -> t.Tuple[int, int] | None:
+        """
+        Removes the least recently used entries until the cache is no larger than
+        max_size bytes, along with objects that no entry refers to. Returns the
+        number of entries removed and the bytes freed, or None if the cache was
+        in use and blocking is not set.
+        """
+        with self._lock(exclusive=True, blocking=blocking) as locked:
+            if not locked:
+                return None
+
+            entries = []
+            if os.path.isdir(self.entries_dir):
+                for filename in os.listdir(self.entries_dir):
+                    entry_path = os.path.join(self.entries_dir, filename)
+                    try:
+                        with open(entry_path, encoding="utf-8") as f:
+                            entry = json.load(f)
+                        objects = {f["object"] for f in entry["files"]}
+                    except (OSError, ValueError, KeyError, TypeError):
+                        os.remove(entry_path)
+                        continue
+                    entries.append((os.stat(entry_path).st_mtime, entry_path, objects))
+            entries.sort()
+
+            object_sizes = {}
+            freed = 0
+            if os.path.isdir(self.objects_dir):
+                for root, _, filenames in os.walk(self.objects_dir):
+                    for filename in filenames:
+                        object_path = os.path.join(root, filename)
+                        if filename.endswith(".tmp"):
+                            freed += os.path.getsize(object_path)
+                            os.remove(object_path)
+                        else:
+                            object_sizes[filename] = os.path.getsize(object_path)
+
+            references: t.Dict[str, int] = {}
+            for _, _, objects in entries:
+                for name in objects:
+                    references[name] = references.get(name, 0) + 1
+
+            def remove_object(name):
+                nonlocal freed
+                freed += object_sizes.pop(name, 0)
+                try:
+                    os.remove(self._object_path(name))
+                except FileNotFoundError:
+                    pass
+
+            for name in [n for n in object_sizes if n not in references]:
+                remove_object(name)
+
+            removed_entries = 0
+            total_size = sum(object_sizes.values())
+            for _, entry_path, objects in entries:
+                if total_size <= max_size:
+                    break
+                os.remove(entry_path)
+                removed_entries += 1
+                for name in objects:
+                    references[name] -= 1
+                    if references[name] == 0:
+                        total_size -= object_sizes.get(name, 0)
+                        remove_object(name)
+
+        return removed_entries, freed
+
+
+def get_staging_cache() -> StagingCache:
+    from bentoctl.operator.utils import _get_bentoctl_home
+
+    max_size = parse_size(
+        os.environ.get(STAGING_CACHE_MAX_SIZE_ENV_VAR, DEFAULT_STAGING_CACHE_MAX_SIZE)
+    )
+    return StagingCache(_get_bentoctl_home() / "cache" / "staging", max_size)
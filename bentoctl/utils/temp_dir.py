@@ -16,9 +16,11 @@ class TempDirectory(object):
         self,
         cleanup=True,
         prefix="temp",
+        dir=None,  # pylint: disable=redefined-builtin
     ):
         self._cleanup = cleanup
         self._prefix = prefix
+        self._dir = dir
         self.path = None
 
     def __repr__(self):
@@ -35,7 +37,11 @@ class TempDirectory(object):
         if self.path is not None:
             return self.path
 
-        tempdir = tempfile.mkdtemp(prefix="bentoctl-{}-".format(self._prefix))
+        if self._dir is not None:
+            os.makedirs(self._dir, exist_ok=True)
+        tempdir = tempfile.mkdtemp(
+            prefix="bentoctl-{}-".format(self._prefix), dir=self._dir
+        )
         self.path = os.path.realpath(tempdir)
         return self.path
 
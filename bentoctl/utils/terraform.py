@@ -1,17 +1,46 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
 import json
+import logging
 import os
+import re
 import subprocess
+import sys
+import tempfile
+import threading
+import typing as t
 
 from bentoctl.exceptions import BentoctlException
 
+logger = logging.getLogger(__name__)
+
 TERRAFORM_VALUES_FILE = "bentoctl.tfvars"
 TERRAFORM_INIT_FOLDER = ".terraform"
+TERRAFORM_STATE_FILE = "terraform.tfstate"
+# where the local backend keeps the state of workspaces other than "default"
+TERRAFORM_WORKSPACE_DIR = "terraform.tfstate.d"
+
+PROVIDER_MIRROR_ENV_VAR = "BENTOCTL_TERRAFORM_PROVIDER_MIRROR"
+# provider installs reported by `terraform init`
+_PROVIDER_FROM_CACHE_RE = re.compile(
+    r"^- Using (\S+) (\S+) from the shared cache directory"
+)
+_PROVIDER_INSTALLED_RE = re.compile(r"^- Installed (\S+) (\S+)")
+_PROVIDER_REUSED_RE = re.compile(r"^- Using previously-installed (\S+) (\S+)")
+
+# parts of state files used by bentoctl, with the (mtime, size) they were read at
+_state_cache: dict[str, tuple[tuple[int, int], dict[str, t.Any]]] = {}
+_state_cache_lock = threading.Lock()
+# the inputs of the last successful `bentoctl apply`, kept in the data dir
+APPLY_RECORD_FILE = "bentoctl_apply.json"
 
 
 def terraform_run(cmd: list, return_output: bool = False):
     try:
         if not return_output:
-            subprocess.run(["terraform", *cmd], check=False)
+            return subprocess.run(["terraform", *cmd], check=False).returncode
         else:
             proc = subprocess.Popen(
                 ["terraform", *cmd],
@@ -27,7 +56,61 @@ def terraform_run(cmd: list, return_output: bool = False):
         )
 
 
-def terraform_destroy(auto_approve):
+def terraform_run_json(cmd: list, events_file: str | None = None):
+    """
+    Runs terraform with `-json` and shows the progress of every resource as
+    terraform streams its events, along with the slowest resources once it is
+    done. The events are also written to events_file as JSON lines. Raises a
+    BentoctlException if terraform fails.
+    """
+    from rich.live import Live
+
+    from bentoctl.console import console, use_live_display
+    from bentoctl.utils.terraform_events import (
+        TERRAFORM_PROGRESS_REFRESH_PER_SECOND,
+        TerraformProgress,
+        parse_event,
+    )
+
+    with contextlib.ExitStack() as stack:
+        events = None
+        if events_file is not None:
+            events = stack.enter_context(open(events_file, "w", encoding="utf-8"))
+        progress = TerraformProgress(events)
+        live = use_live_display()
+        if live:
+            stack.enter_context(
+                Live(
+                    progress,
+                    console=console,
+                    refresh_per_second=TERRAFORM_PROGRESS_REFRESH_PER_SECOND,
+                )
+            )
+        try:
+            proc = subprocess.Popen(
+                ["terraform", *cmd, "-json"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except FileNotFoundError:
+            raise BentoctlException(
+                "terraform not available. Please make "
+                "sure terraform is installed and available your path."
+            )
+        with proc:
+            for line in proc.stdout:
+                resource = progress.update(parse_event(line))
+                if not live:
+                    progress.log(resource)
+
+    progress.print_summary()
+    if proc.returncode != 0:
+        raise BentoctlException(f"terraform {cmd[0]} failed.")
+
+
+def terraform_destroy(auto_approve, events_file: str | None = None):
     if not is_terraform_initialised():
         raise BentoctlException("terraform is not initialised")
     if not os.path.exists(os.path.join(os.curdir, TERRAFORM_VALUES_FILE)):
@@ -41,30 +124,363 @@ def terraform_destroy(auto_approve):
         "-var-file",
         TERRAFORM_VALUES_FILE,
     ]
+    # whatever happens, the last apply no longer describes the resources
+    _remove_apply_record()
     if auto_approve:
-        terraform_cmd.append("-auto-approve")
-    terraform_run(terraform_cmd)
+        # terraform only streams JSON events without the interactive approval
+        terraform_run_json([*terraform_cmd, "-auto-approve"], events_file)
+    else:
+        terraform_run(terraform_cmd)
 
 
 def is_terraform_initialised():
     return os.path.exists(os.path.join(os.curdir, TERRAFORM_INIT_FOLDER))
 
 
-def terraform_apply(auto_approve):
+def _get_terraform_home() -> str:
+    from bentoctl.operator.utils import _get_bentoctl_home
+
+    terraform_home = os.path.join(_get_bentoctl_home(), "terraform")
+    os.makedirs(terraform_home, exist_ok=True)
+    return terraform_home
+
+
+def _write_provider_mirror_config(provider_mirror: str) -> str:
+    """
+    Writes a terraform CLI config that installs every provider from the
+    filesystem mirror (eg. one created with `terraform providers mirror`) and
+    returns its path.
+    """
+    provider_mirror = os.path.abspath(provider_mirror)
+    config = (
+        "provider_installation {\n"
+        "  filesystem_mirror {\n"
+        f"    path = {json.dumps(provider_mirror)}\n"
+        "  }\n"
+        "}\n"
+    )
+    config_name = hashlib.sha256(provider_mirror.encode("utf-8")).hexdigest()[:16]
+    config_path = os.path.join(_get_terraform_home(), f"mirror-{config_name}.tfrc")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(config)
+    return config_path
+
+
+def get_terraform_env(provider_mirror: str | None = None) -> dict[str, str]:
+    """
+    The environment for `terraform init`, sharing one provider plugin cache in
+    BENTOCTL_HOME between all the deployments unless TF_PLUGIN_CACHE_DIR is
+    already set. With provider_mirror, providers are installed from that
+    directory instead of the registry.
+    """
+    env = dict(os.environ)
+    if "TF_PLUGIN_CACHE_DIR" not in env:
+        plugin_cache_dir = os.path.join(_get_terraform_home(), "plugin-cache")
+        os.makedirs(plugin_cache_dir, exist_ok=True)
+        env["TF_PLUGIN_CACHE_DIR"] = plugin_cache_dir
+        # deployments are initialised without a lock file, which terraform
+        # 1.4+ requires to use the cache otherwise. The lock file then only
+        # records the checksums for the current platform.
+        env.setdefault("TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE", "true")
+    if provider_mirror is not None:
+        if "TF_CLI_CONFIG_FILE" in env:
+            logger.warning(
+                "TF_CLI_CONFIG_FILE is set, ignoring the provider mirror %s.",
+                provider_mirror,
+            )
+        else:
+            env["TF_CLI_CONFIG_FILE"] = _write_provider_mirror_config(provider_mirror)
+    return env
+
+
+def terraform_init(provider_mirror: str | None = None) -> dict[str, list[str]]:
+    """
+    Runs `terraform init` with the environment from `get_terraform_env` and
+    reports where the providers came from. Returns the providers (as
+    `name version`) taken from the plugin cache ("cached"), downloaded
+    ("installed") and already in the working directory ("reused").
+    """
+    from bentoctl.console import console
+
+    try:
+        proc = subprocess.Popen(
+            ["terraform", "init", "-input=false"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=get_terraform_env(provider_mirror),
+            encoding="utf-8",
+            errors="replace",
+        )
+    except FileNotFoundError:
+        raise BentoctlException(
+            "terraform not available. Please make "
+            "sure terraform is installed and available your path."
+        )
+
+    providers: dict[str, list[str]] = {"cached": [], "installed": [], "reused": []}
+    patterns = [
+        ("cached", _PROVIDER_FROM_CACHE_RE),
+        ("installed", _PROVIDER_INSTALLED_RE),
+        ("reused", _PROVIDER_REUSED_RE),
+    ]
+    with proc:
+        for line in proc.stdout:
+            sys.stdout.write(line)
+            for source, pattern in patterns:
+                match = pattern.match(line.strip())
+                if match is not None:
+                    providers[source].append(" ".join(match.groups()))
+                    break
+    if proc.returncode != 0:
+        raise BentoctlException("terraform init failed.")
+
+    console.print(
+        f"Terraform providers: {len(providers['cached'])} from the plugin cache, "
+        f"{len(providers['installed'])} downloaded, "
+        f"{len(providers['reused'])} already installed."
+    )
+    return providers
+
+
+def compute_apply_hash(apply_inputs: dict[str, t.Any] | None = None) -> str:
+    """
+    A hash of the terraform files in the current directory, the values file
+    and apply_inputs (eg. the digest of the image the values point to).
+    """
+    digest = hashlib.sha256()
+    filenames = sorted(f for f in os.listdir(os.curdir) if f.endswith(".tf"))
+    for filename in [*filenames, TERRAFORM_VALUES_FILE]:
+        digest.update(f"{filename}\n".encode("utf-8"))
+        try:
+            with open(filename, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except FileNotFoundError:
+            digest.update(b"missing")
+    digest.update(
+        json.dumps(apply_inputs or {}, sort_keys=True, default=str).encode("utf-8")
+    )
+    return digest.hexdigest()
+
+
+def _get_apply_record_path() -> str:
+    return os.path.join(_get_data_dir(), APPLY_RECORD_FILE)
+
+
+def _remove_apply_record():
+    try:
+        os.remove(_get_apply_record_path())
+    except FileNotFoundError:
+        pass
+
+
+def _get_state_version() -> dict[str, t.Any] | None:
+    """
+    The lineage and serial of the local state, which change with every apply
+    that changes it. None if the state isn't local.
+    """
+    state_path = get_local_state_path()
+    state = _read_state(state_path) if state_path is not None else None
+    if state is None:
+        return None
+    return {"lineage": state["lineage"], "serial": state["serial"]}
+
+
+def _has_planned_changes() -> bool:
+    """
+    Plans without refreshing the resources, so only changes between the
+    configuration and the last known state are found, without calling the
+    cloud APIs.
+    """
+    return_code, _, error = terraform_run(
+        [
+            "plan",
+            "-refresh=false",
+            "-detailed-exitcode",
+            "-input=false",
+            "-lock=false",
+            "-var-file",
+            TERRAFORM_VALUES_FILE,
+        ],
+        return_output=True,
+    )
+    if return_code == 1:
+        logger.debug("terraform plan failed: %s", error)
+    return return_code != 0
+
+
+def is_apply_up_to_date(apply_hash: str) -> bool:
+    """
+    Whether the last successful apply was done with the same inputs, and the
+    state hasn't changed since then. For remote state, where that can't be
+    checked locally, a plan without refresh has to find no changes.
+    """
+    try:
+        with open(_get_apply_record_path(), encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not isinstance(record, dict) or record.get("hash") != apply_hash:
+        return False
+    state_version = _get_state_version()
+    if state_version is not None:
+        return state_version == record.get("state")
+    return not _has_planned_changes()
+
+
+def _save_apply_record(apply_hash: str):
+    record_path = _get_apply_record_path()
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(record_path), prefix=f"{APPLY_RECORD_FILE}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"hash": apply_hash, "state": _get_state_version()}, f, indent=2)
+        os.replace(tmp_path, record_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def terraform_apply(
+    auto_approve,
+    events_file: str | None = None,
+    provider_mirror: str | None = None,
+    force: bool = False,
+    apply_inputs: dict[str, t.Any] | None = None,
+) -> bool:
+    """
+    Applies the terraform files in the current directory, unless nothing
+    changed since the last successful apply (see `is_apply_up_to_date`) and
+    force isn't set. Returns whether terraform apply was run.
+    """
+    from bentoctl.console import console
+
     if not is_terraform_initialised():
-        terraform_run(["init"])
+        terraform_init(provider_mirror)
+
+    apply_hash = compute_apply_hash(apply_inputs)
+    if not force and is_apply_up_to_date(apply_hash):
+        console.print(
+            "[green]Nothing changed since the last apply, skipping terraform "
+            "apply. Use '--force' to apply anyway.[/]"
+        )
+        return False
 
     terraform_cmd = [
         "apply",
         "-var-file",
         TERRAFORM_VALUES_FILE,
     ]
+    _remove_apply_record()
     if auto_approve:
-        terraform_cmd.append("-auto-approve")
-    terraform_run(terraform_cmd)
+        terraform_run_json([*terraform_cmd, "-auto-approve"], events_file)
+    elif terraform_run(terraform_cmd) != 0:
+        return True
+    _save_apply_record(apply_hash)
+    return True
+
+
+def _get_data_dir() -> str:
+    return os.environ.get("TF_DATA_DIR", TERRAFORM_INIT_FOLDER)
+
+
+def _get_workspace() -> str:
+    workspace = os.environ.get("TF_WORKSPACE")
+    if workspace:
+        return workspace
+    try:
+        with open(os.path.join(_get_data_dir(), "environment"), encoding="utf-8") as f:
+            return f.read().strip() or "default"
+    except OSError:
+        return "default"
+
+
+def get_local_state_path() -> str | None:
+    """
+    The path of the state file in the current directory, from the backend that
+    `terraform init` recorded in `.terraform/terraform.tfstate`. Returns None
+    if the state isn't stored locally (remote backends, terraform cloud) and
+    only terraform itself can read it.
+    """
+    backend_file = os.path.join(_get_data_dir(), TERRAFORM_STATE_FILE)
+    try:
+        with open(backend_file, encoding="utf-8") as f:
+            backend = json.load(f).get("backend") or {}
+    except FileNotFoundError:
+        # not initialised or no backend configured, terraform uses the default
+        # local backend.
+        backend = {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.debug(
+            "Unable to read the terraform backend from %s: %s", backend_file, e
+        )
+        return None
+
+    if backend.get("type", "local") != "local":
+        return None
+    config = backend.get("config") or {}
+    workspace = _get_workspace()
+    if workspace == "default":
+        return config.get("path") or TERRAFORM_STATE_FILE
+    return os.path.join(
+        config.get("workspace_dir") or TERRAFORM_WORKSPACE_DIR,
+        workspace,
+        TERRAFORM_STATE_FILE,
+    )
+
+
+def _read_state(state_path: str) -> dict[str, t.Any] | None:
+    """
+    The outputs, lineage and serial of a local state file, or None if it can't
+    be parsed. They are cached until the file changes.
+    """
+    try:
+        stat = os.stat(state_path)
+    except FileNotFoundError:
+        return {"outputs": {}, "lineage": None, "serial": None}
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _state_cache_lock:
+        cached = _state_cache.get(state_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        summary = {
+            "outputs": state.get("outputs") or {},
+            "lineage": state.get("lineage"),
+            "serial": state.get("serial"),
+        }
+    except (OSError, ValueError, AttributeError) as e:
+        logger.debug("Unable to read the terraform state %s: %s", state_path, e)
+        return None
+    with _state_cache_lock:
+        _state_cache[state_path] = (key, summary)
+    return summary
+
+
+def read_state_outputs(state_path: str) -> dict[str, t.Any] | None:
+    """
+    The outputs in a local state file, in the format of `terraform output
+    -json`, or None if the file can't be parsed. A state file that doesn't
+    exist has no outputs.
+    """
+    state = _read_state(state_path)
+    return state["outputs"] if state is not None else None
 
 
 def terraform_output():
+    """
+    The outputs of the terraform state in the current directory. Local state
+    files are read directly, terraform is only run for remote backends.
+    """
+    state_path = get_local_state_path()
+    if state_path is not None:
+        outputs = read_state_outputs(state_path)
+        if outputs is not None:
+            return outputs
+
     return_code, result, error = terraform_run(["output", "-json"], return_output=True)
     if return_code != 0:
         raise BentoctlException(error)
@@ -0,0 +1,163 @@
+"""
+Progress of terraform commands run with `-json`, from terraform's machine
+readable UI (https://developer.hashicorp.com/terraform/internals/machine-readable-ui).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import typing as t
+
+# how often the live view is redrawn
+TERRAFORM_PROGRESS_REFRESH_PER_SECOND = 4
+# resources listed in the summary of the slowest ones
+SLOWEST_RESOURCES_SHOWN = 5
+
+_HOOK_STATUSES = {
+    "apply_start": "running",
+    "apply_progress": "running",
+    "apply_complete": "complete",
+    "apply_errored": "errored",
+}
+
+
+def parse_event(line: str) -> dict[str, t.Any]:
+    """
+    Parses a line of `terraform -json` output. Lines that aren't JSON (eg.
+    crash output) are returned as "log" events with the line as @message.
+    """
+    line = line.rstrip("\n")
+    try:
+        event = json.loads(line)
+    except ValueError:
+        event = None
+    if not isinstance(event, dict):
+        event = {"type": "log", "@level": "info", "@message": line}
+    return event
+
+
+class TerraformProgress:
+    """
+    Tracks the resources being changed from the events of a terraform command,
+    with the time each one took. Rendered as a table by rich's Live display, or
+    printed as plain lines when resources complete (see `log`).
+    """
+
+    def __init__(self, events_file: t.TextIO | None = None):
+        self.events_file = events_file
+        # by resource address, in the order they started
+        self.resources: dict[str, dict[str, t.Any]] = {}
+        self.diagnostics: list[dict[str, t.Any]] = []
+        self.change_summary: str | None = None
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, event: dict[str, t.Any]) -> dict[str, t.Any] | None:
+        """
+        Records the event, returning the state of the resource it is about.
+        """
+        if self.events_file is not None:
+            record = {"elapsed_seconds": round(time.monotonic() - self._start, 3)}
+            self.events_file.write(json.dumps({**record, **event}) + "\n")
+
+        event_type = event.get("type")
+        if event_type == "diagnostic":
+            self.diagnostics.append(event.get("diagnostic") or {})
+        elif event_type == "change_summary":
+            self.change_summary = event.get("@message")
+        if event_type not in _HOOK_STATUSES:
+            return None
+
+        hook = event.get("hook") or {}
+        address = (hook.get("resource") or {}).get("addr", "unknown")
+        with self._lock:
+            resource = self.resources.setdefault(
+                address,
+                {
+                    "address": address,
+                    "action": hook.get("action"),
+                    "started": time.monotonic(),
+                    "elapsed_seconds": 0.0,
+                },
+            )
+            resource["status"] = _HOOK_STATUSES[event_type]
+            resource["elapsed_seconds"] = hook.get(
+                "elapsed_seconds", time.monotonic() - resource["started"]
+            )
+            return dict(resource)
+
+    def log(self, resource: dict[str, t.Any] | None):
+        """
+        Prints the resources as they complete, for output that can't show the
+        live view.
+        """
+        from bentoctl.console import console
+
+        if resource is not None and resource["status"] != "running":
+            console.print(
+                f"{resource['address']}: {resource['action']} {resource['status']} "
+                f"after {resource['elapsed_seconds']:.0f}s"
+            )
+
+    def slowest_resources(
+        self, count: int = SLOWEST_RESOURCES_SHOWN
+    ) -> list[dict[str, t.Any]]:
+        with self._lock:
+            resources = list(self.resources.values())
+        return sorted(resources, key=lambda r: r["elapsed_seconds"], reverse=True)[
+            :count
+        ]
+
+    def print_summary(self):
+        from rich.table import Table
+
+        from bentoctl.console import console
+
+        for diagnostic in self.diagnostics:
+            color = "red" if diagnostic.get("severity") == "error" else "yellow"
+            console.print(f"[{color}]{diagnostic.get('summary')}[/]")
+            if diagnostic.get("detail"):
+                console.print(diagnostic["detail"])
+        if self.change_summary:
+            console.print(self.change_summary)
+        slowest_resources = self.slowest_resources()
+        if slowest_resources:
+            table = Table(title="Slowest resources", title_justify="left")
+            table.add_column("Resource")
+            table.add_column("Action")
+            table.add_column("Status")
+            table.add_column("Duration", justify="right")
+            for resource in slowest_resources:
+                table.add_row(
+                    resource["address"],
+                    resource["action"],
+                    resource["status"],
+                    f"{resource['elapsed_seconds']:.0f}s",
+                )
+            console.print(table)
+
+    def __rich__(self):
+        from rich.table import Table
+
+        table = Table(box=None)
+        table.add_column("Resource")
+        table.add_column("Action")
+        table.add_column("Status")
+        table.add_column("Elapsed", justify="right")
+        now = time.monotonic()
+        with self._lock:
+            resources = list(self.resources.values())
+        for resource in resources:
+            elapsed = resource["elapsed_seconds"]
+            if resource["status"] == "running":
+                elapsed = now - resource["started"]
+            status = {"complete": "[green]complete[/]", "errored": "[red]errored[/]"}
+            table.add_row(
+                resource["address"],
+                resource["action"],
+                status.get(resource["status"], resource["status"]),
+                f"{elapsed:.0f}s",
+            )
+        return table
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import threading
+import time
+import typing as t
+from contextlib import contextmanager
+
+TIMINGS_VERSION = 1
+
+_current_timings: contextvars.ContextVar[Timings | None] = contextvars.ContextVar(
+    "bentoctl_timings", default=None
+)
+# the innermost open span, the parent of new spans.
+_current_span: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "bentoctl_timings_span", default=None
+)
+
+
+class Timings:
+    """
+    Collects the wall clock time spent in the named spans of a command.
+
+    Spans are opened with `span()` anywhere in the code while the Timings is
+    active (see `record_timings`) and are nested by their call structure.
+    """
+
+    def __init__(self, command: str):
+        self.command = command
+        self.spans: list[dict[str, t.Any]] = []
+        self._start = time.perf_counter()
+        self._end = None
+        self._lock = threading.Lock()
+
+    @property
+    def total_ms(self) -> float:
+        end = self._end if self._end is not None else time.perf_counter()
+        return (end - self._start) * 1000
+
+    @contextmanager
+    def span(self, name: str):
+        parent = _current_span.get()
+        record = {
+            "name": name,
+            "parent": parent["name"] if parent is not None else None,
+            "depth": parent["depth"] + 1 if parent is not None else 0,
+            "start_ms": (time.perf_counter() - self._start) * 1000,
+            "duration_ms": None,
+            "status": "ok",
+        }
+        with self._lock:
+            self.spans.append(record)
+        token = _current_span.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record["status"] = "error"
+            raise
+        finally:
+            record["duration_ms"] = (time.perf_counter() - start) * 1000
+            _current_span.reset(token)
+
+    def stop(self):
+        self._end = time.perf_counter()
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return {
+            "version": TIMINGS_VERSION,
+            "command": self.command,
+            "total_ms": round(self.total_ms, 3),
+            "spans": [
+                {
+                    **s,
+                    "start_ms": round(s["start_ms"], 3),
+                    "duration_ms": round(s["duration_ms"] or 0, 3),
+                }
+                for s in self.spans
+            ],
+        }
+
+    def write(self, file_path: str):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self):
+        from rich.table import Table
+
+        from bentoctl.console import console
+
+        total_ms = self.total_ms
+        table = Table(title=f"{self.command} timings", title_justify="left")
+        table.add_column("Phase")
+        table.add_column("Duration", justify="right")
+        table.add_column("%", justify="right")
+        for s in self.spans:
+            duration_ms = s["duration_ms"] or 0
+            name = "  " * s["depth"] + s["name"]
+            if s["status"] != "ok":
+                name += " [red](failed)[/]"
+            table.add_row(
+                name,
+                format_duration(duration_ms),
+                f"{duration_ms / total_ms * 100:.1f}" if total_ms else "-",
+            )
+        table.add_row("[b]total[/]", f"[b]{format_duration(total_ms)}[/]", "100.0")
+        console.print(table)
+
+
+def format_duration(duration_ms: float) -> str:
+    if duration_ms < 1000:
+        return f"{duration_ms:.0f}ms"
+    return f"{duration_ms / 1000:.2f}s"
+
+
+@contextmanager
+def record_timings(command: str) -> t.Generator[Timings, None, None]:
+    """
+    Makes a new Timings the active one for the spans opened in this context.
+    """
+    timings = Timings(command)
+    token = _current_timings.set(timings)
+    span_token = _current_span.set(None)
+    try:
+        yield timings
+    finally:
+        timings.stop()
+        _current_span.reset(span_token)
+        _current_timings.reset(token)
+
+
+@contextmanager
+def span(name: str) -> t.Generator[dict[str, t.Any] | None, None, None]:
+    """
+    Times the enclosed block as a span of the active Timings, if there is one.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield None
+        return
+    with timings.span(name) as record:
+        yield record
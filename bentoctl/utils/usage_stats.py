@@ -12,7 +12,9 @@ from bentoml._internal.utils.analytics.usage_stats import (  # noqa pylint: disa
 )
 
 from bentoctl import __version__
-from bentoctl.deployment_config import DeploymentConfig
+
+if t.TYPE_CHECKING:
+    from bentoctl.deployment_config import DeploymentConfig
 
 
 @lru_cache(maxsize=1)
@@ -37,7 +39,7 @@ class BentoctlCliEvent(EventMeta):
 
 
 def _bentoctl_event(
-    cmd_group: str, cmd_name: str, return_value: t.Optional[DeploymentConfig] = None
+    cmd_group: str, cmd_name: str, return_value: t.Optional["DeploymentConfig"] = None
 ):
     if return_value is not None:
         deployment_config = return_value
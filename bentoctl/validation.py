@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import fnmatch
+import glob
+import json
+import os
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+from bentoctl.exceptions import BentoctlException, InvalidDeploymentConfig
+from bentoctl.operator import get_local_operator_registry
+
+DEFAULT_DEPLOYMENT_CONFIG_PATTERN = "deployment_config*.y*ml"
+# below this many files the cost of starting worker processes isn't worth it.
+MIN_FILES_FOR_PROCESS_POOL = 32
+
+
+def find_deployment_config_files(
+    paths: t.Iterable[str], pattern: str = DEFAULT_DEPLOYMENT_CONFIG_PATTERN
+) -> list[str]:
+    """
+    Expands the given files, directories and glob patterns into a sorted list of
+    deployment config files. Directories are searched recursively for files whose
+    name matches `pattern`.
+    """
+    files = set()
+    for path in paths:
+        if glob.has_magic(path):
+            matches = glob.glob(path, recursive=True)
+        else:
+            matches = [path]
+        for match in matches:
+            if os.path.isdir(match):
+                for root, _, filenames in os.walk(match):
+                    files.update(
+                        os.path.join(root, filename)
+                        for filename in fnmatch.filter(filenames, pattern)
+                    )
+            else:
+                files.add(match)
+    return sorted(files)
+
+
+def validate_deployment_config_file(file_path: str) -> dict[str, t.Any]:
+    """
+    Validates one deployment config file and returns the result as a dict with
+    the `path`, whether it is `valid` and the list of `errors`.
+
+    Operators that are not installed are reported as errors instead of being
+    installed.
+    """
+    from bentoctl.deployment_config import (
+        DeploymentConfig,
+        load_deployment_config_file,
+    )
+
+    errors = []
+    try:
+        config_dict = load_deployment_config_file(file_path)
+        operator_dict = (
+            config_dict.get("operator") if isinstance(config_dict, dict) else None
+        )
+        operator_name = (
+            operator_dict.get("name") if isinstance(operator_dict, dict) else None
+        )
+        if (
+            operator_name is not None
+            and operator_name not in get_local_operator_registry().list()
+        ):
+            raise InvalidDeploymentConfig(
+                f"operator {operator_name} is not installed. Install it with "
+                f"`bentoctl operator install {operator_name}`."
+            )
+        DeploymentConfig(config_dict)
+    except InvalidDeploymentConfig as e:
+        if e.config_errors is not None:
+            errors.append(e.config_errors)
+        else:
+            errors.append(str(e))
+    except BentoctlException as e:
+        errors.append(str(e))
+    except Exception as e:  # pylint: disable=broad-except
+        errors.append(f"{type(e).__name__}: {e}")
+
+    return {"path": file_path, "valid": not errors, "errors": errors}
+
+
+def validate_deployment_config_files(
+    files: list[str], max_workers: int | None = None
+) -> list[dict[str, t.Any]]:
+    """
+    Validates the deployment config files, fanning out to a process pool for
+    large sets of files. Results are returned in the same order as `files`.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(files) < MIN_FILES_FOR_PROCESS_POOL:
+        return [validate_deployment_config_file(f) for f in files]
+
+    chunksize = max(1, len(files) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(validate_deployment_config_file, files, chunksize=chunksize)
+        )
+
+
+def _format_errors(errors: list) -> str:
+    return "\n".join(
+        e if isinstance(e, str) else json.dumps(e, sort_keys=True, default=str)
+        for e in errors
+    )
+
+
+def generate_json_report(results: list[dict[str, t.Any]]) -> str:
+    invalid = sum(1 for r in results if not r["valid"])
+    report = {
+        "total": len(results),
+        "valid": len(results) - invalid,
+        "invalid": invalid,
+        "results": results,
+    }
+    return json.dumps(report, indent=2, default=str)
+
+
+def generate_junit_report(results: list[dict[str, t.Any]]) -> str:
+    invalid = sum(1 for r in results if not r["valid"])
+    testsuite = ElementTree.Element(
+        "testsuite",
+        name="bentoctl validate",
+        tests=str(len(results)),
+        failures=str(invalid),
+        errors="0",
+    )
+    for result in results:
+        testcase = ElementTree.SubElement(
+            testsuite, "testcase", classname="deployment_config", name=result["path"]
+        )
+        if not result["valid"]:
+            failure = ElementTree.SubElement(
+                testcase, "failure", message="Invalid deployment config"
+            )
+            failure.text = _format_errors(result["errors"])
+    return ElementTree.tostring(testsuite, encoding="unicode")
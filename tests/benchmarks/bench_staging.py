@@ -0,0 +1,70 @@
+"""
+Benchmark the bento staging strategies on a synthetic model.
+
+    python tests/benchmarks/bench_staging.py --size-gb 4 --files 8
+
+The model is written to --work-dir (defaults to a directory inside
+BENTOCTL_HOME) so that the links are created within one filesystem, the same
+way `bentoctl build` stages bentos.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from bentoctl.operator.utils import _get_bentoctl_home
+from bentoctl.utils.staging import STAGING_STRATEGIES, stage_tree
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def create_synthetic_model(path, size_gb, num_files):
+    os.makedirs(path)
+    file_size = int(size_gb * 1024**3 / num_files)
+    chunk = os.urandom(CHUNK_SIZE)
+    for i in range(num_files):
+        with open(os.path.join(path, f"weights-{i:05d}.bin"), "wb") as f:
+            written = 0
+            while written < file_size:
+                n = min(CHUNK_SIZE, file_size - written)
+                f.write(chunk[:n])
+                written += n
+    with open(os.path.join(path, "model.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: synthetic\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-gb", type=float, default=2)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--work-dir", default=None)
+    args = parser.parse_args()
+
+    work_root = args.work_dir or str(_get_bentoctl_home() / "staging")
+    os.makedirs(work_root, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="bentoctl-bench-", dir=work_root)
+    try:
+        model_path = os.path.join(work_dir, "model")
+        create_synthetic_model(model_path, args.size_gb, args.files)
+        print(f"synthetic model: {args.size_gb}GB in {args.files} files")
+        print(f"{'strategy':<10} {'seconds':>8} {'extra disk (MB)':>16}  used")
+        for strategy in STAGING_STRATEGIES:
+            dst = os.path.join(work_dir, f"staged-{strategy}")
+            os.sync()
+            free_before = shutil.disk_usage(work_dir).free
+            start = time.perf_counter()
+            stats = stage_tree(model_path, dst, strategy)
+            elapsed = time.perf_counter() - start
+            os.sync()
+            # measured from the free space so that shared reflink extents count
+            extra = (free_before - shutil.disk_usage(work_dir).free) / 1024**2
+            print(f"{strategy:<10} {elapsed:>8.2f} {extra:>16.1f}  {stats}")
+            shutil.rmtree(dst)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
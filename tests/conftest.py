@@ -31,9 +31,15 @@ def mock_operator_registry(tmp_path):
 @pytest.fixture
 def get_mock_operator_registry(monkeypatch, tmp_path):
     operator_registry = OperatorRegistry(tmp_path)
-    monkeypatch.setattr(
-        "bentoctl.operator.get_local_operator_registry", lambda: operator_registry
-    )
+    for module in [
+        "bentoctl.operator",
+        "bentoctl.deployment_config",
+        "bentoctl.cli.interactive",
+        "bentoctl.cli.operator_management",
+    ]:
+        monkeypatch.setattr(
+            f"{module}.get_local_operator_registry", lambda: operator_registry
+        )
     return operator_registry
 
 
@@ -1,8 +1,16 @@
+import os
+import shutil
+
 __all__ = ["create_deployable", "generate", "get_registry_info"]
 
 
-def create_deployable():
-    pass
+def create_deployable(
+    bento_path, destination_dir, bento_metadata, overwrite_deployable=True
+):  # pylint: disable=unused-argument
+    # copy the bento into the destination like the official operators do
+    deployable_path = os.path.join(destination_dir, "bentoctl_deployable")
+    shutil.copytree(bento_path, deployable_path, dirs_exist_ok=overwrite_deployable)
+    return deployable_path
 
 
 def generate():
@@ -0,0 +1,81 @@
+# pylint: disable=W0621
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bentoctl import deployment_config, docker_utils
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+bentomock = MagicMock()
+bentomock.tag.version = "mock_version"
+
+
+@dataclass
+class DeploymentConfigMock:
+    directory: "Path" = None
+    repository_name: str = None
+    template_type: str = "terraform"
+    bento = bentomock
+    operator_name = "mocked_operator_name"
+
+    @classmethod
+    def from_file(cls, file):
+        return cls()
+
+    def save(self, save_path, filename):
+        pass
+
+    def set_bento(self, tag):
+        pass
+
+    def generate(self, destination_dir=None, values_only=False):
+        if values_only:
+            return ["bentoctl.tfvars"], ["bentoctl.tfvars"]
+        else:
+            return ["main.tf", "bentoctl.tfvars"], []
+
+    def generate_local_image_tag(self):
+        return "local_image_tag"
+
+    def create_deployable(
+        self,
+        destination_dir=None,
+        staging_strategy=None,
+        use_staging_cache=False,
+        models_dir=None,
+    ) -> str:
+        if self.directory:
+            return self.directory.__fspath__()
+        return "."
+
+    def create_repository(self):
+        return "registry_url", "registry_username", "registry_pass"
+
+    def delete_repository(self):
+        return
+
+    def generate_docker_image_tag(self, registry_url):
+        return "repository_image_tag"
+
+
+@pytest.fixture
+def mock_build_docker_image(monkeypatch, change_test_dir):
+    """
+    Patches the deployment config and docker so that `bentoctl build` doesn't
+    build or push anything, yielding the mocked `build_docker_image`. Tests
+    override the parts they assert on.
+    """
+    monkeypatch.setattr(
+        deployment_config, "DeploymentConfig", DeploymentConfigMock(change_test_dir)
+    )
+    monkeypatch.setattr(
+        docker_utils, "push_docker_image_to_repository", lambda **kwargs: None
+    )
+    monkeypatch.setattr(docker_utils, "tag_docker_image", lambda *args: None)
+    monkeypatch.setattr(docker_utils, "plan_image_push", lambda *a, **kw: None)
+    with patch("bentoctl.docker_utils.build_docker_image") as mock:
+        yield mock
@@ -1,17 +1,23 @@
+import json
 import os
-from dataclasses import dataclass
+import subprocess
+import sys
+import threading
 from typing import TYPE_CHECKING
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 from click.testing import CliRunner
 
 import bentoctl
-from bentoctl import __version__, deployment_config
+import bentoctl.cli.interactive
+from bentoctl import __version__, deployment_config, docker_utils
 from bentoctl.cli import bentoctl as bentoctl_cli
 from bentoctl.console import POST_BUILD_HELP_MESSAGE_TERRAFORM
+from bentoctl.exceptions import BentoctlException, BentoNotFound
 from bentoctl.operator import get_local_operator_registry
 from tests.conftest import TESTOP_PATH
+from tests.unit.cli.conftest import DeploymentConfigMock
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -32,7 +38,6 @@ def op_reg_with_testop(tmp_path, monkeypatch):
     os.environ["BENTOCTL_HOME"] = str(op_reg_path)
     op_reg = get_local_operator_registry()
     op_reg.install_operator(TESTOP_PATH)
-    monkeypatch.setattr(deployment_config, "local_operator_registry", op_reg)
 
     yield op_reg
 
@@ -46,56 +51,28 @@ def test_bentoctl_version():
     assert __version__ in result.output
 
 
-bentomock = MagicMock()
-bentomock.tag.version = "mock_version"
+# modules that should not be imported just to build the top-level command group
+HEAVY_MODULES = ["bentoml", "bentoml_cli", "docker", "cerberus", "fs", "yaml"]
 
 
-@dataclass
-class DeploymentConfigMock:
-    directory: "Path" = None
-    repository_name: str = None
-    template_type: str = "terraform"
-    bento = bentomock
-    operator_name = "mocked_operator_name"
-
-    @classmethod
-    def from_file(cls, file):
-        return cls()
-
-    def save(self, save_path, filename):
-        pass
-
-    def set_bento(self, tag):
-        pass
-
-    def generate(self, destination_dir=None, values_only=False):
-        if values_only:
-            return ["bentoctl.tfvars"]
-        else:
-            return ["main.tf", "bentoctl.tfvars"]
-
-    def generate_local_image_tag(self):
-        return "local_image_tag"
-
-    def create_deployable(self, destination_dir=None) -> str:
-        if self.directory:
-            return self.directory.__fspath__()
-        return "."
-
-    def create_repository(self):
-        return "registry_url", "registry_username", "registry_pass"
-
-    def delete_repository(self):
-        return
-
-    def generate_docker_image_tag(self, registry_url):
-        return "repository_image_tag"
+def test_bentoctl_cold_start_import_budget():
+    # run in a fresh interpreter since the test session has already imported
+    # most of these modules.
+    script = (
+        "import sys\n"
+        "import bentoctl.cli\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "[]"
 
 
 @pytest.mark.usefixtures("change_test_dir")
 def test_cli_init(monkeypatch, tmp_path, change_test_dir):
     monkeypatch.setattr(
-        bentoctl.cli,
+        bentoctl.cli.interactive,
         "deployment_config_builder",
         lambda: DeploymentConfigMock(directory=change_test_dir),
     )
@@ -134,7 +111,7 @@ def test_cli_init(monkeypatch, tmp_path, change_test_dir):
 @pytest.mark.usefixtures("change_test_dir")
 def test_cli_generate(monkeypatch, change_test_dir: "Path"):
     monkeypatch.setattr(
-        bentoctl.cli,
+        deployment_config,
         "DeploymentConfig",
         DeploymentConfigMock(directory=change_test_dir),
     )
@@ -144,6 +121,10 @@ def test_cli_generate(monkeypatch, change_test_dir: "Path"):
     assert "- main.tf" in result.output
     assert "- bentoctl.tfvars" in result.output
 
+    result = runner.invoke(bentoctl_cli, ["generate", "--values-only"])
+    assert result.exit_code == 0
+    assert "- bentoctl.tfvars (unchanged)" in result.output
+
 
 @pytest.mark.parametrize(
     "template_type, post_build_help_message",
@@ -153,26 +134,24 @@ def test_cli_generate(monkeypatch, change_test_dir: "Path"):
         ("cloudformation", None),
     ],
 )
-@pytest.mark.usefixtures("change_test_dir")
-@patch("bentoctl.cli.generate_deployable_container")
 def test_cli_build(
-    mock_generate_deployable_container,
+    mock_build_docker_image,
     template_type,
     post_build_help_message,
     monkeypatch,
     change_test_dir,
 ):
     monkeypatch.setattr(
-        bentoctl.cli,
+        deployment_config,
         "DeploymentConfig",
         DeploymentConfigMock(change_test_dir, template_type=template_type),
     )
     monkeypatch.setattr(
-        bentoctl.cli, "push_docker_image_to_repository", lambda **kwargs: print(kwargs)
+        docker_utils, "push_docker_image_to_repository", lambda **kwargs: print(kwargs)
     )
-    monkeypatch.setattr(bentoctl.cli, "tag_docker_image", lambda *args: print(args))
+    monkeypatch.setattr(docker_utils, "tag_docker_image", lambda *args: print(args))
 
-    mock_generate_deployable_container.return_value = "container_id"
+    mock_build_docker_image.return_value = "container_id"
 
     runner = CliRunner()
     result = runner.invoke(
@@ -192,6 +171,7 @@ def test_cli_build(
     assert "- main.tf" not in result.output
     if post_build_help_message is not None:
         assert post_build_help_message in result.output
+    assert "build timings" in result.output
 
     # test dry run
     result = runner.invoke(
@@ -214,3 +194,291 @@ def test_cli_build(
     assert "Created docker image:" in result.output
     if post_build_help_message is not None:
         assert post_build_help_message not in result.output
+
+
+def test_cli_build_incremental(mock_build_docker_image, monkeypatch):
+    monkeypatch.setattr(
+        bentoctl.cli,
+        "compute_build_fingerprint",
+        lambda *args: {"digest": "fingerprint"},
+    )
+    monkeypatch.setattr(
+        docker_utils, "push_docker_image_to_repository", lambda **kwargs: "sha256:1"
+    )
+    monkeypatch.setattr(docker_utils, "get_local_image_id", lambda *args: "image_id")
+    registry_digest = MagicMock(return_value="sha256:1")
+    monkeypatch.setattr(docker_utils, "get_registry_image_digest", registry_digest)
+
+    runner = CliRunner()
+    args = ["build", "--bento-tag", "testbento:latest", "--incremental"]
+    with runner.isolated_filesystem():
+        result = runner.invoke(bentoctl_cli, args, catch_exceptions=False)
+        assert result.exit_code == 0
+        assert mock_build_docker_image.call_count == 1
+        assert os.path.exists(".deployment_config.yaml.build.json")
+
+        # unchanged and still in the registry
+        result = runner.invoke(bentoctl_cli, args, catch_exceptions=False)
+        assert result.exit_code == 0
+        assert "Build is up to date" in result.output
+        assert "- bentoctl.tfvars" in result.output
+        assert mock_build_docker_image.call_count == 1
+
+        # --no-cache always rebuilds
+        result = runner.invoke(
+            bentoctl_cli, [*args, "--no-cache"], catch_exceptions=False
+        )
+        assert mock_build_docker_image.call_count == 2
+
+        # gone from the registry and the local image was removed
+        registry_digest.return_value = None
+        monkeypatch.setattr(docker_utils, "get_local_image_id", lambda *args: None)
+        result = runner.invoke(bentoctl_cli, args, catch_exceptions=False)
+        assert result.exit_code == 0
+        assert mock_build_docker_image.call_count == 3
+
+
+def test_cli_build_timings_file(mock_build_docker_image, tmp_path):
+    timings_file = tmp_path / "timings.json"
+    result = CliRunner().invoke(
+        bentoctl_cli,
+        ["build", "-b", "testbento:latest", "--timings-file", str(timings_file)],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    report = json.loads(timings_file.read_text())
+    assert report["command"] == "build"
+    assert sorted(s["name"] for s in report["spans"]) == [
+        "check_registry_layers",
+        "create_deployable",
+        "create_repository",
+        "generate",
+        "load_deployment_config",
+        "push_docker_image",
+        "set_bento",
+        "tag_docker_image",
+        "wait_for_repository",
+    ]
+
+
+def test_cli_build_skips_push_of_existing_image(mock_build_docker_image, monkeypatch):
+    mock_push = MagicMock()
+    monkeypatch.setattr(docker_utils, "push_docker_image_to_repository", mock_push)
+    push_plan = docker_utils.PushPlan(
+        [docker_utils.LayerStatus("sha256:a", True, 10)], image_digest="sha256:1"
+    )
+    monkeypatch.setattr(docker_utils, "plan_image_push", lambda *a, **kw: push_plan)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        bentoctl_cli, ["build", "-b", "testbento:latest"], catch_exceptions=False
+    )
+    assert result.exit_code == 0
+    assert "already in the repository, skipping push" in result.output
+    mock_push.assert_not_called()
+
+    push_plan.layers.append(docker_utils.LayerStatus("sha256:b", False, 2048))
+    push_plan.image_digest = None
+    result = runner.invoke(
+        bentoctl_cli, ["build", "-b", "testbento:latest"], catch_exceptions=False
+    )
+    assert result.exit_code == 0
+    assert "1/2 layers already in the repository, up to 2.0KiB" in result.output
+    mock_push.assert_called_once()
+
+
+def test_cli_build_push_to(mock_build_docker_image, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        docker_utils,
+        "push_docker_image_to_repository",
+        lambda **kwargs: calls.append(kwargs["repository"]),
+    )
+    monkeypatch.setattr(
+        docker_utils,
+        "push_docker_image_to_destinations",
+        lambda image, destinations: calls.append(destinations),
+    )
+
+    runner = CliRunner()
+    args = ["build", "-b", "testbento:latest", "--push-to", "a.io/x", "--push-to"]
+    result = runner.invoke(bentoctl_cli, [*args, "b.io/y"], catch_exceptions=False)
+    assert result.exit_code == 0
+    assert calls == ["repository_image_tag", ["a.io/x", "b.io/y"]]
+
+    # buildx pushes them along with the repository image
+    calls.clear()
+    result = runner.invoke(
+        bentoctl_cli,
+        [*args, "b.io/y", "--push-to-repository"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    assert calls == []
+    assert mock_build_docker_image.call_args.kwargs["tags"] == [
+        "repository_image_tag",
+        "a.io/x",
+        "b.io/y",
+    ]
+
+    result = runner.invoke(bentoctl_cli, [*args, "b.io/y", "--dry-run"])
+    assert result.exit_code == 2
+
+
+def test_cli_build_many(mock_build_docker_image, monkeypatch, tmp_path):
+    class FailingDeploymentConfigMock(DeploymentConfigMock):
+        def set_bento(self, tag):
+            if tag == "missing:latest":
+                raise BentoNotFound(tag)
+
+    monkeypatch.setattr(
+        deployment_config, "DeploymentConfig", FailingDeploymentConfigMock
+    )
+
+    manifest = tmp_path / "builds.yaml"
+    manifest.write_text("""
+args: [--dry-run]
+builds:
+  - bento_tag: iris:latest
+    deployment_config_file: iris/deployment_config.yaml
+  - bento_tag: missing:latest
+  - bento_tag: fraud:v1
+    args: [--build-arg, A=1]
+""")
+    timings_file = tmp_path / "timings.json"
+    result = CliRunner().invoke(
+        bentoctl_cli,
+        ["build-many", str(manifest), "-j", "2", "--timings-file", str(timings_file)],
+    )
+    assert result.exit_code == 1
+    assert "Built 2/3 bentos, 1 failed." in result.output
+    assert "missing:latest" in result.output
+    assert "BentoNotFound" in result.output
+    assert mock_build_docker_image.call_count == 2
+    build_args = [c.kwargs["build_args"] for c in mock_build_docker_image.mock_calls]
+    assert sorted(build_args, key=len) == [{}, {"A": "1"}]
+
+    report = json.loads(timings_file.read_text())
+    assert report["command"] == "build-many"
+    assert [b["status"] for b in report["builds"]] == ["ok", "failed", "ok"]
+    assert report["builds"][0]["deployment_config_file"] == str(
+        tmp_path / "iris" / "deployment_config.yaml"
+    )
+    spans = report["builds"][0]["timings"]["spans"]
+    assert "create_deployable" in [span["name"] for span in spans]
+
+    # options are checked before building anything
+    mock_build_docker_image.reset_mock()
+    manifest.write_text("builds: [{bento_tag: iris, args: [--no-such-option]}]")
+    result = CliRunner().invoke(bentoctl_cli, ["build-many", str(manifest)])
+    assert "InvalidBuildManifest" in result.output
+    assert "--no-such-option" in result.output
+    mock_build_docker_image.assert_not_called()
+
+    # the options build-many sets itself can't be overridden by an entry
+    for args in ("[--timings-file, t.json]", "[-f, other.yaml]", "[-b, other]"):
+        manifest.write_text(f"builds: [{{bento_tag: iris, args: {args}}}]")
+        result = CliRunner().invoke(bentoctl_cli, ["build-many", str(manifest)])
+        assert "InvalidBuildManifest" in result.output
+        assert "can't be used in 'args'" in result.output
+    mock_build_docker_image.assert_not_called()
+
+
+def test_cli_build_push_to_repository(mock_build_docker_image, monkeypatch):
+    mock_push = MagicMock()
+    monkeypatch.setattr(docker_utils, "push_docker_image_to_repository", mock_push)
+    monkeypatch.setattr(docker_utils, "tag_docker_image", mock_push)
+    mock_build_docker_image.return_value = "sha256:1"
+
+    runner = CliRunner()
+    result = runner.invoke(
+        bentoctl_cli,
+        ["build", "-b", "testbento:latest", "--push-to-repository"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    assert "Created the repository" in result.output
+    assert "- bentoctl.tfvars" in result.output
+    build_kwargs = mock_build_docker_image.call_args.kwargs
+    assert build_kwargs["tags"] == ["repository_image_tag"]
+    assert build_kwargs["push"] is True
+    assert build_kwargs["load"] is False
+    mock_push.assert_not_called()
+
+    result = runner.invoke(
+        bentoctl_cli,
+        ["build", "-b", "testbento:latest", "--push-to-repository", "--dry-run"],
+    )
+    assert result.exit_code == 2
+
+
+def test_cli_build_creates_repository_concurrently(
+    mock_build_docker_image, monkeypatch, change_test_dir
+):
+    repository_created = threading.Event()
+
+    class SlowRepositoryDeploymentConfigMock(DeploymentConfigMock):
+        def create_repository(self):
+            # only returns once the build has started
+            assert repository_created.wait(timeout=10)
+            return super().create_repository()
+
+    monkeypatch.setattr(
+        deployment_config,
+        "DeploymentConfig",
+        SlowRepositoryDeploymentConfigMock(change_test_dir),
+    )
+    mock_build_docker_image.side_effect = lambda *args, **kwargs: (
+        repository_created.set()
+    )
+
+    result = CliRunner().invoke(
+        bentoctl_cli, ["build", "-b", "testbento:latest"], catch_exceptions=False
+    )
+    assert result.exit_code == 0
+    assert "Created the repository" in result.output
+
+
+def test_cli_build_repository_creation_fails(
+    mock_build_docker_image, monkeypatch, change_test_dir
+):
+    class FailingRepositoryDeploymentConfigMock(DeploymentConfigMock):
+        def create_repository(self):
+            raise BentoctlException("no permission to create the repository")
+
+    monkeypatch.setattr(
+        deployment_config,
+        "DeploymentConfig",
+        FailingRepositoryDeploymentConfigMock(change_test_dir),
+    )
+    result = CliRunner().invoke(bentoctl_cli, ["build", "-b", "testbento:latest"])
+    assert "no permission to create the repository" in result.output
+    assert "generated template files" not in result.output
+
+
+def test_cli_build_registry_cache(mock_build_docker_image, tmp_path):
+    result = CliRunner().invoke(
+        bentoctl_cli,
+        [
+            "build",
+            "-b",
+            "testbento:latest",
+            "--registry-cache",
+            "--local-cache",
+            str(tmp_path / "cache"),
+            "--cache-from",
+            "user/app:cache",
+        ],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0
+    build_kwargs = mock_build_docker_image.call_args.kwargs
+    assert build_kwargs["cache_from"] == [
+        "user/app:cache",
+        "type=registry,ref=registry_url:buildcache",
+    ]
+    assert build_kwargs["cache_to"] == [
+        "type=registry,ref=registry_url:buildcache,mode=max",
+        f"type=local,dest={tmp_path / 'cache'}.new,mode=max",
+    ]
+    assert build_kwargs["load"] is True
@@ -49,12 +49,6 @@ def test_deployment_config_builder(
     monkeypatch.setattr(
         interactive_cli, "dropdown_select", lambda field, options: "operator1"
     )
-    monkeypatch.setattr(
-        interactive_cli, "local_operator_registry", get_mock_operator_registry
-    )
-    monkeypatch.setattr(
-        "bentoctl.deployment_config.local_operator_registry", get_mock_operator_registry
-    )
     interactive_cli.deployment_config_builder()
 
 
@@ -5,7 +5,11 @@ import pytest
 
 from bentoctl.exceptions import OperatorConfigNotFound, OperatorLoadException
 from bentoctl.operator import operator as op
-from bentoctl.operator.operator import Operator, _import_module
+from bentoctl.operator.operator import (
+    Operator,
+    _import_module,
+    unload_operator_modules,
+)
 from tests.conftest import TESTOP_PATH
 
 
@@ -17,8 +21,40 @@ def test_import_module():
 
     with pytest.raises(OperatorLoadException):
         testop = _import_module("MODULE_THAT_IS_NOT_PRESENT", TESTOP_PATH)
-    # clean the paths in sys.path
-    sys.path.pop(0)
+
+
+def test_import_module_is_isolated(tmp_path):
+    sys_path = list(sys.path)
+    first_op_path = tmp_path / "first"
+    second_op_path = tmp_path / "second"
+    shutil.copytree(TESTOP_PATH, first_op_path)
+    shutil.copytree(TESTOP_PATH, second_op_path)
+    (second_op_path / "testop" / "__init__.py").write_text("VERSION = 2\n")
+
+    first = _import_module("testop", first_op_path)
+    second = _import_module("testop", second_op_path)
+    assert first is not second
+    assert hasattr(first, "generate")
+    assert second.VERSION == 2
+    assert _import_module("testop", first_op_path) is first
+    assert sys.path == sys_path
+
+
+def test_operator_module_is_memoized(tmp_path, monkeypatch):
+    testop_path = tmp_path / "test-operator"
+    shutil.copytree(TESTOP_PATH, testop_path)
+    operator = Operator(testop_path)
+
+    calls = []
+    import_module = op._import_module
+
+    def counting_import_module(*args):
+        calls.append(args)
+        return import_module(*args)
+
+    monkeypatch.setattr(op, "_import_module", counting_import_module)
+    assert operator._load_operator_module() is operator._load_operator_module()
+    assert len(calls) == 1
 
 
 def test_operator_class_init(tmp_path, monkeypatch):
@@ -38,3 +74,38 @@ def test_operator_class_init(tmp_path, monkeypatch):
 
         monkeypatch.setattr(op, "_import_module", raise_error)
         Operator(testop_path)
+
+
+@pytest.fixture
+def operator_path(tmp_path, monkeypatch):
+    # _import_module falls back to importing from sys.path
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    yield tmp_path
+    unload_operator_modules(tmp_path)
+
+
+def test_import_module_absolute_self_import(operator_path):
+    pkg_path = operator_path / "selfimportop"
+    pkg_path.mkdir()
+    (pkg_path / "__init__.py").write_text("from selfimportop.sub import VALUE\n")
+    (pkg_path / "sub.py").write_text("VALUE = 1\n")
+
+    module = _import_module("selfimportop", operator_path)
+    assert module.VALUE == 1
+
+
+def test_unload_operator_modules(operator_path):
+    pkg_path = operator_path / "selfimportop"
+    pkg_path.mkdir()
+    (pkg_path / "__init__.py").write_text("from selfimportop.sub import VALUE\n")
+    (pkg_path / "sub.py").write_text("VALUE = 1\n")
+    _import_module("selfimportop", operator_path)
+
+    unload_operator_modules(operator_path)
+    assert not [
+        name
+        for name in sys.modules
+        if name.startswith(
+            ("selfimportop", op._get_operator_namespace_name(operator_path))
+        )
+    ]
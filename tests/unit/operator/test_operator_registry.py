@@ -2,11 +2,14 @@
 import json
 import os
 import shutil
+import threading
 from pathlib import Path
 
 import pytest
 
 from bentoctl.exceptions import OperatorExists, OperatorNotFound
+from bentoctl.operator import get_local_operator_registry
+from bentoctl.operator import operator as op
 from bentoctl.operator import registry
 from bentoctl.operator.operator import Operator
 from tests.conftest import TESTOP_PATH
@@ -27,6 +30,17 @@ def test_registry_get(op_reg):
     assert testop.name == "testop"
 
 
+def test_registry_get_does_not_change_metadata(op_reg):
+    op_reg.install_operator(TESTOP_PATH)
+    op_reg.operators_list["testop"]["version"] = "v0.2.0"
+    metadata = dict(op_reg.operators_list["testop"])
+    assert str(op_reg.get("testop").metadata["version"]) == "0.2.0"
+    assert op_reg.operators_list["testop"]["version"] == "v0.2.0"
+    op_reg._write_to_file()
+    with open(op_reg.path / "operator_list.json", encoding="UTF-8") as f:
+        assert json.load(f)["testop"] == metadata
+
+
 def test_registry_init_and_list(tmp_path):
     op_reg = registry.OperatorRegistry(tmp_path)
     assert op_reg.list() == {}
@@ -80,3 +94,128 @@ def test_registry_remove(op_reg):
 
     with pytest.raises(OperatorNotFound):
         op_reg.remove_operator("operator_that_is_not_present")
+
+
+def test_registry_is_lazy(tmp_path):
+    op_reg = registry.OperatorRegistry(tmp_path / "operators")
+    assert not (tmp_path / "operators").exists()
+
+    op_reg.install_operator(TESTOP_PATH)
+    assert (tmp_path / "operators" / "operator_list.json").exists()
+
+
+def test_get_local_operator_registry_is_shared(tmp_path, monkeypatch):
+    monkeypatch.setenv("BENTOCTL_HOME", str(tmp_path / "bentoctl"))
+    op_reg = get_local_operator_registry()
+    assert get_local_operator_registry() is op_reg
+    # nothing is created until the registry is used
+    assert not (tmp_path / "bentoctl").exists()
+    assert op_reg.list() == {}
+
+    monkeypatch.setenv("BENTOCTL_HOME", str(tmp_path / "other"))
+    assert get_local_operator_registry() is not op_reg
+
+
+def test_registry_get_uses_operator_index(op_reg, tmp_path, monkeypatch):
+    testop_path = tmp_path / "testop"
+    shutil.copytree(TESTOP_PATH, testop_path)
+    op_reg.install_operator(str(testop_path))
+    assert (op_reg.path / "operator_index.json").exists()
+
+    def raise_error(*_):
+        raise AssertionError("operator_config.py should not be imported")
+
+    monkeypatch.setattr(op, "_import_module", raise_error)
+    testop = registry.OperatorRegistry(op_reg.path).get("testop")
+    assert testop.name == "testop"
+    assert testop.available_templates == ["terraform"]
+    assert testop.schema == TEST_OPERATOR.schema
+
+    # touching the file without changing it keeps the index entry valid
+    config_path = testop_path / "operator_config.py"
+    os.utime(config_path, ns=(0, 0))
+    assert registry.OperatorRegistry(op_reg.path).get("testop").name == "testop"
+
+    config_path.write_text(config_path.read_text() + "\nCHANGED = True\n")
+    index = registry.OperatorRegistry(op_reg.path).index
+    assert index.get("testop", str(config_path)) is None
+
+
+def test_update_operator_reindexes_updated_config(op_reg, monkeypatch):
+    operator_path = registry._get_operator_dir_path("testop")
+    shutil.copytree(TESTOP_PATH, operator_path)
+    op_reg.operators_list["testop"] = {
+        "path": operator_path,
+        "is_official": True,
+        "is_local": False,
+        "version": "v0.1.0",
+    }
+    # imports the old operator_config.py into this process
+    op_reg._index_operator("testop", Operator(operator_path))
+
+    def download_install_official_operator(*_):
+        shutil.copytree(TESTOP_PATH, operator_path)
+        config_path = Path(operator_path, "operator_config.py")
+        config_path.write_text(
+            config_path.read_text()
+            + '\nOPERATOR_AVAILABLE_TEMPLATES = ["terraform", "cloudformation"]\n'
+        )
+
+    monkeypatch.setitem(registry.OFFICIAL_OPERATORS, "testop", "bentoml/testop")
+    monkeypatch.setattr(
+        op_reg,
+        "_download_install_official_operator",
+        download_install_official_operator,
+    )
+    assert op_reg.update_operator("testop", "v0.2.0") == "testop"
+
+    config_path = os.path.join(operator_path, "operator_config.py")
+    config = op_reg.index.get("testop", config_path)
+    assert config["OPERATOR_AVAILABLE_TEMPLATES"] == ["terraform", "cloudformation"]
+    testop = registry.OperatorRegistry(op_reg.path).get("testop")
+    assert testop.available_templates == ["terraform", "cloudformation"]
+
+
+def test_operator_index_concurrent_writes(op_reg):
+    op_reg.install_operator(TESTOP_PATH)
+    index = op_reg.index
+    threads = [threading.Thread(target=index.write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert os.listdir(op_reg.path).count("operator_index.json") == 1
+    assert not [f for f in os.listdir(op_reg.path) if f.endswith(".tmp")]
+    with open(op_reg.path / "operator_index.json", encoding="UTF-8") as f:
+        assert "testop" in json.load(f)["operators"]
+
+
+def test_operator_index_concurrent_updates(op_reg):
+    index = op_reg.index
+    config_path = Path(TESTOP_PATH, "operator_config.py")
+    operator_config = Operator(TESTOP_PATH).operator_config
+    threads = [
+        threading.Thread(
+            target=index.update, args=(f"testop-{i}", config_path, operator_config)
+        )
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(op_reg.path / "operator_index.json", encoding="UTF-8") as f:
+        operators = json.load(f)["operators"]
+    assert sorted(operators) == sorted(f"testop-{i}" for i in range(8))
+
+
+def test_operator_index_write_cleans_up_on_error(op_reg, monkeypatch):
+    op_reg.install_operator(TESTOP_PATH)
+
+    def fail(*_):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        op_reg.index.write()
+    assert not [f for f in os.listdir(op_reg.path) if f.endswith(".tmp")]
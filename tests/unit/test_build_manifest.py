@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+import pytest
+
+from bentoctl.build_manifest import BuildEntry, load_build_manifest, run_builds
+from bentoctl.exceptions import InvalidBuildManifest
+from bentoctl.utils.timings import span
+
+
+def test_load_build_manifest(tmp_path):
+    manifest = tmp_path / "builds.yaml"
+    manifest.write_text("""
+args: [--incremental]
+builds:
+  - bento_tag: iris:latest
+    deployment_config_file: iris/deployment_config.yaml
+    args: [--model-layers]
+  - bento_tag: fraud:v1
+""")
+    assert load_build_manifest(str(manifest)) == [
+        BuildEntry(
+            "iris:latest",
+            os.path.join(tmp_path, "iris", "deployment_config.yaml"),
+            ["--incremental", "--model-layers"],
+        ),
+        BuildEntry(
+            "fraud:v1",
+            os.path.join(tmp_path, "deployment_config.yaml"),
+            ["--incremental"],
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "builds: iris",
+        "- bento_tag: iris",
+        "builds: [{deployment_config_file: a.yaml}]",
+        "builds: [{bento_tag: iris, args: --push}]",
+        "builds: [{bento_tag: iris",
+    ],
+)
+def test_load_build_manifest_invalid(tmp_path, content):
+    manifest = tmp_path / "builds.yaml"
+    manifest.write_text(content)
+    with pytest.raises(InvalidBuildManifest):
+        load_build_manifest(str(manifest))
+
+
+def test_run_builds():
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def build(fail):
+        with span("build"):
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.pop()
+        if fail:
+            raise ValueError("broken")
+
+    entries = [BuildEntry(f"bento{i}:v1", "deployment_config.yaml") for i in range(6)]
+    results = run_builds(
+        [(entry, lambda i=i: build(i == 2)) for i, entry in enumerate(entries)],
+        max_workers=2,
+    )
+    assert [r["entry"] for r in results] == entries
+    assert [r["status"] for r in results] == ["ok"] * 2 + ["failed"] + ["ok"] * 3
+    assert results[2]["error"] == "ValueError: broken"
+    assert max(max_running) <= 2
+    # every build has its own timings
+    assert all(len(r["timings"].spans) == 1 for r in results)
@@ -1,7 +1,12 @@
 # pylint: disable=W0621
+import copy
+import os
 from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
 import pytest
+import yaml
 
 from bentoctl import deployment_config as dconf
 from bentoctl.exceptions import DeploymentConfigNotFound, InvalidDeploymentConfig
@@ -56,7 +61,6 @@ def test_deployment_config_init(get_mock_operator_registry, monkeypatch):
         dconf.DeploymentConfig({"api_version": "v1", "spec": {}})
 
     # deployment_config with operator that is not installed
-    monkeypatch.setattr(dconf, "local_operator_registry", get_mock_operator_registry)
     with pytest.raises(InvalidDeploymentConfig):
         dconf.DeploymentConfig(
             {
@@ -125,8 +129,7 @@ def create_yaml_file(yml_str, path):
 
 
 @pytest.fixture
-def op_reg_with_testop(get_mock_operator_registry, monkeypatch):
-    monkeypatch.setattr(dconf, "local_operator_registry", get_mock_operator_registry)
+def op_reg_with_testop(get_mock_operator_registry):
     get_mock_operator_registry.install_operator(TESTOP_PATH)
 
     yield get_mock_operator_registry
@@ -149,9 +152,93 @@ def test_deployment_config_from_file(
 def test_validate_operator_config(
     op_reg_with_testop, tmp_bento_path
 ):  # pylint: disable=W0613
-    import yaml
-
     dconf.DeploymentConfig(yaml.safe_load(VALID_YAML))
 
     with pytest.raises(InvalidDeploymentConfig):
         dconf.DeploymentConfig(yaml.safe_load(VALID_YAML_INVALID_SCHEMA))
+
+
+def test_get_schema_validator_is_cached_and_does_not_mutate_schema():
+    schema = {"name": {"type": "string", "help_message": "the name"}}
+    validator = dconf.get_schema_validator(schema)
+
+    assert dconf.get_schema_validator(schema) is validator
+    assert schema["name"]["help_message"] == "the name"
+    assert validator.validated({"name": "test"}) == {"name": "test"}
+    assert validator.validated({"name": 1}) is None
+    assert dconf.get_schema_validator({"name": {"type": "integer"}}) is not validator
+
+
+def test_validate_operator_config_keeps_operator_schema(
+    op_reg_with_testop, tmp_bento_path
+):  # pylint: disable=W0613
+    config = dconf.DeploymentConfig(yaml.safe_load(VALID_YAML))
+    schema = copy.deepcopy(config.operator.schema)
+    config = dconf.DeploymentConfig(yaml.safe_load(VALID_YAML))
+    assert config.operator.schema == schema
+
+
+@pytest.mark.parametrize(
+    "staging_strategy, use_staging_cache",
+    [("copy", False), ("hardlink", False), ("auto", True), ("copy", True)],
+)
+def test_prepare_bento_dir(tmp_path, monkeypatch, staging_strategy, use_staging_cache):
+    bento_path = tmp_path / "bento"
+    bento_path.mkdir()
+    (bento_path / "bento.yaml").write_text("service: svc")
+    model_path = tmp_path / "model"
+    model_path.mkdir()
+    (model_path / "saved_model.bin").write_bytes(b"weights")
+
+    model_info = MagicMock()
+    model_info.tag.path.return_value = "my_model/v1"
+    monkeypatch.setenv("BENTOCTL_HOME", str(tmp_path / "bentoctl"))
+    monkeypatch.setattr(
+        dconf, "get_model", lambda _: SimpleNamespace(path=str(model_path))
+    )
+
+    config = dconf.DeploymentConfig.__new__(dconf.DeploymentConfig)
+    config.bento = SimpleNamespace(
+        tag="bento:v1", path=str(bento_path), info=SimpleNamespace(models=[model_info])
+    )
+    # staging twice should give the same result, from the cache if enabled
+    for _ in range(2):
+        with config._prepare_bento_dir(
+            staging_strategy, use_staging_cache
+        ) as staged_path:
+            staged_model = Path(
+                staged_path, "models", "my_model", "v1", "saved_model.bin"
+            )
+            assert Path(staged_path, "bento.yaml").read_text() == "service: svc"
+            assert staged_model.read_bytes() == b"weights"
+            # files from the stores are only linked without the cache
+            assert os.path.samefile(staged_model, model_path / "saved_model.bin") is (
+                staging_strategy == "hardlink"
+            )
+        assert not Path(staged_path).exists()
+    assert (tmp_path / "bentoctl" / "cache" / "staging").exists() is use_staging_cache
+
+
+def test_generate_reports_unchanged_files(tmp_path):
+    from bentoctl.utils.operator_helpers.generate import Generate
+
+    config = dconf.DeploymentConfig.__new__(dconf.DeploymentConfig)
+    config.deployment_name = "test"
+    config.template_type = "terraform"
+    config.operator_spec = {"region": "us-west-1"}
+    config.operator = SimpleNamespace(
+        generate=lambda name, spec, template_type, destination_dir, values_only: (
+            Generate(str(tmp_path))(
+                name, dict(spec), template_type, destination_dir, values_only
+            )
+        )
+    )
+    values_file = str(tmp_path / "bentoctl.tfvars")
+
+    assert config.generate(str(tmp_path), values_only=True) == ([values_file], [])
+    assert config.generate(str(tmp_path), values_only=True) == (
+        [values_file],
+        [values_file],
+    )
+    config.operator_spec = {"region": "us-east-1"}
+    assert config.generate(str(tmp_path), values_only=True) == ([values_file], [])
@@ -0,0 +1,323 @@
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+import docker
+import pytest
+
+from bentoctl import docker_utils
+from bentoctl.docker_utils import (
+    DOCKER_HUB_REGISTRY,
+    DockerPushProgressBar,
+    get_registry_cache_args,
+    get_registry_host,
+    local_build_cache,
+    push_docker_image_to_destinations,
+    registry_login,
+)
+from bentoctl.exceptions import BentoctlDockerException
+
+
+@pytest.mark.parametrize(
+    "image_name, registry",
+    [
+        (
+            "123.dkr.ecr.us-west-1.amazonaws.com/repo:v1",
+            "123.dkr.ecr.us-west-1.amazonaws.com",
+        ),
+        ("https://gcr.io/project/repo:v1", "gcr.io"),
+        ("localhost:5000/repo:v1", "localhost:5000"),
+        ("user/repo:v1", DOCKER_HUB_REGISTRY),
+        ("repo:v1", DOCKER_HUB_REGISTRY),
+    ],
+)
+def test_get_registry_host(image_name, registry):
+    assert get_registry_host(image_name) == registry
+
+
+def test_registry_login(tmp_path, monkeypatch):
+    docker_config = tmp_path / "docker"
+    (docker_config / "buildx").mkdir(parents=True)
+    (docker_config / "config.json").write_text(
+        json.dumps(
+            {
+                "credsStore": "desktop",
+                "credHelpers": {"123.dkr.ecr.aws.com": "ecr-login"},
+                "auths": {"other.io": {}},
+            }
+        )
+    )
+    monkeypatch.setenv("DOCKER_CONFIG", str(docker_config))
+
+    with registry_login("gcr.io", "user", "pass") as env:
+        tmp_config = env["DOCKER_CONFIG"]
+        assert tmp_config != str(docker_config)
+        assert os.path.islink(os.path.join(tmp_config, "buildx"))
+        with open(os.path.join(tmp_config, "config.json"), encoding="utf-8") as f:
+            config = json.load(f)
+        # the other registries keep using the user's credential helpers
+        assert config["credsStore"] == "desktop"
+        assert config["credHelpers"] == {
+            "123.dkr.ecr.aws.com": "ecr-login",
+            "gcr.io": "",
+        }
+        assert config["auths"]["other.io"] == {}
+        assert base64.b64decode(config["auths"]["gcr.io"]["auth"]) == b"user:pass"
+
+    assert os.environ["DOCKER_CONFIG"] == str(docker_config)
+    assert not os.path.exists(tmp_config)
+    # the user's config is left untouched
+    assert "credsStore" in (docker_config / "config.json").read_text()
+
+
+def test_registry_login_without_symlinks(tmp_path, monkeypatch):
+    docker_config = tmp_path / "docker"
+    (docker_config / "buildx").mkdir(parents=True)
+    (docker_config / "buildx" / "current").write_text("builder")
+    monkeypatch.setenv("DOCKER_CONFIG", str(docker_config))
+
+    def symlink(*args, **kwargs):
+        raise OSError("A required privilege is not held by the client")
+
+    monkeypatch.setattr(os, "symlink", symlink)
+    with registry_login("gcr.io", "user", "pass") as env:
+        tmp_config = env["DOCKER_CONFIG"]
+        with open(os.path.join(tmp_config, "buildx", "current"), encoding="utf-8") as f:
+            assert f.read() == "builder"
+        with open(os.path.join(tmp_config, "config.json"), encoding="utf-8") as f:
+            assert "credHelpers" not in json.load(f)
+
+
+def test_registry_login_without_credentials(monkeypatch):
+    monkeypatch.delenv("DOCKER_CONFIG", raising=False)
+    with registry_login("gcr.io", None, None) as env:
+        assert env is None
+        assert "DOCKER_CONFIG" not in os.environ
+
+
+def test_concurrent_builds_use_their_own_credentials(tmp_path, monkeypatch):
+    docker_config = tmp_path / "docker"
+    docker_config.mkdir()
+    monkeypatch.setenv("DOCKER_CONFIG", str(docker_config))
+    monkeypatch.setattr(docker_utils, "check_backend_health", lambda backend: None)
+    # a build that waits for the other one to start before reading its config
+    backend = MagicMock()
+    backend.binary = sys.executable
+    backend.build_cmd = [
+        "-c",
+        "import json, os, sys, time\n"
+        "open(sys.argv[1] + '.started', 'w').close()\n"
+        "while not os.path.exists(sys.argv[2] + '.started'): time.sleep(0.01)\n"
+        "path = os.path.join(os.environ['DOCKER_CONFIG'], 'config.json')\n"
+        "json.dump(json.load(open(path))['auths'], open(sys.argv[1], 'w'))\n",
+    ]
+    backend.env = {}
+    backend.construct_build_args = lambda context_path, tag, **_: [
+        os.path.join(context_path, tag[0]),
+        os.path.join(context_path, tag[1]),
+    ]
+    monkeypatch.setattr(docker_utils.container, "get_backend", lambda name: backend)
+
+    def build(registry, username, other_registry):
+        with registry_login(registry, username, "pass") as env:
+            docker_utils.build_docker_image(
+                str(tmp_path),
+                tags=[registry, other_registry],
+                allow=[],
+                build_args={},
+                build_context={},
+                builder=None,
+                cache_from=[],
+                cache_to=[],
+                load=False,
+                no_cache=False,
+                output=None,
+                platform=[],
+                progress="plain",
+                pull=False,
+                push=False,
+                target=None,
+                env=env,
+            )
+
+    threads = [
+        threading.Thread(target=build, args=("gcr.io", "gcr-user", "quay.io")),
+        threading.Thread(target=build, args=("quay.io", "quay-user", "gcr.io")),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    for registry, username in [("gcr.io", "gcr-user"), ("quay.io", "quay-user")]:
+        auths = json.loads((tmp_path / registry).read_text())
+        assert list(auths) == [registry]
+        assert base64.b64decode(auths[registry]["auth"]) == f"{username}:pass".encode()
+    assert os.environ["DOCKER_CONFIG"] == str(docker_config)
+
+
+def test_get_registry_cache_args():
+    cache_from, cache_to = get_registry_cache_args("https://gcr.io/project/repo")
+    assert cache_from == ["type=registry,ref=gcr.io/project/repo:buildcache"]
+    assert cache_to == ["type=registry,ref=gcr.io/project/repo:buildcache,mode=max"]
+
+
+def test_local_build_cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+
+    # first build, nothing to import
+    with local_build_cache(str(cache_dir)) as (cache_from, cache_to):
+        assert cache_from == []
+        assert cache_to == [f"type=local,dest={cache_dir}.new,mode=max"]
+        os.makedirs(f"{cache_dir}.new/blobs")
+
+    assert (cache_dir / "blobs").is_dir()
+    assert not os.path.exists(f"{cache_dir}.new")
+
+    # the new export replaces the old cache
+    with local_build_cache(str(cache_dir)) as (cache_from, cache_to):
+        assert cache_from == [f"type=local,src={cache_dir}"]
+        os.makedirs(f"{cache_dir}.new/index")
+    assert os.listdir(cache_dir) == ["index"]
+
+    # failed builds keep the old cache
+    with pytest.raises(ValueError):
+        with local_build_cache(str(cache_dir)):
+            os.makedirs(f"{cache_dir}.new/partial")
+            raise ValueError
+    assert os.listdir(cache_dir) == ["index"]
+
+    # a leftover from a crashed swap doesn't break the next one
+    os.makedirs(f"{cache_dir}.old/stale")
+    with local_build_cache(str(cache_dir)):
+        os.makedirs(f"{cache_dir}.new/fresh")
+    assert os.listdir(cache_dir) == ["fresh"]
+    assert not os.path.exists(f"{cache_dir}.old")
+
+
+def test_push_docker_image_to_destinations(monkeypatch):
+    tagged = []
+    monkeypatch.setattr(
+        docker_utils, "tag_docker_image", lambda image, tag: tagged.append(tag)
+    )
+    # all the pushes have to be running at the same time to get past this
+    barrier = threading.Barrier(3, timeout=5)
+
+    def push(repository, tag, stream, decode):
+        barrier.wait()
+        if repository == "broken.io/app":
+            yield {"errorDetail": {}, "error": "denied"}
+        yield {"status": "Preparing", "id": "l1"}
+        yield {
+            "status": "Pushing",
+            "id": "l1",
+            "progressDetail": {"current": 5, "total": 10},
+        }
+        yield {"status": "Mounted from other/app", "id": "l2"}
+        yield {"status": "Pushed", "id": "l1"}
+        yield {"aux": {"Tag": tag, "Digest": f"sha256:{tag}", "Size": 1}}
+
+    docker_client = MagicMock()
+    docker_client.api.push.side_effect = push
+    monkeypatch.setattr(docker_utils, "get_docker_client", lambda: docker_client)
+
+    destinations = ["gcr.io/app:v1", "ghcr.io/org/app:v2", "localhost:5000/app"]
+    digests = push_docker_image_to_destinations("app:local", destinations)
+    assert tagged == destinations
+    assert digests == {
+        "gcr.io/app:v1": "sha256:v1",
+        "ghcr.io/org/app:v2": "sha256:v2",
+        "localhost:5000/app": "sha256:latest",
+    }
+
+    # a failed destination doesn't stop the others
+    barrier.reset()
+    docker_client.api.push.reset_mock()
+    with pytest.raises(BentoctlDockerException, match="broken.io/app:v1. denied"):
+        push_docker_image_to_destinations(
+            "app:local", ["gcr.io/app:v1", "broken.io/app:v1", "ghcr.io/app:v1"]
+        )
+    assert docker_client.api.push.call_count == 3
+
+
+def test_docker_push_progress_bar(monkeypatch, capsys):
+    now = [100.0]
+    monkeypatch.setattr(docker_utils.time, "monotonic", lambda: now[0])
+    progress_bar = DockerPushProgressBar()
+    progress_bar.update({"status": "Layer already exists", "id": "l1"})
+    for current in (0, 1024, 2048):
+        progress_bar.update(
+            {
+                "status": "Pushing",
+                "id": "l2",
+                "progressDetail": {"current": current, "total": 4096},
+            }
+        )
+    now[0] += 2
+    assert progress_bar.summary() == "Pushed 2.0KiB/4.0KiB, 1.0KiB/s, ETA 2s"
+
+    progress_bar.log()
+    assert capsys.readouterr().out == ""
+    now[0] += docker_utils.PUSH_PROGRESS_LOG_INTERVAL
+    progress_bar.log()
+    assert "Pushed 2.0KiB/4.0KiB" in capsys.readouterr().out
+
+    progress_bar.update({"status": "Pushed", "id": "l2", "progressDetail": {}})
+    assert progress_bar.summary().startswith("Pushed 4.0KiB/4.0KiB")
+    # every push has its own layers
+    assert DockerPushProgressBar().layers == {}
+
+
+def test_get_docker_client(monkeypatch):
+    from_env = MagicMock()
+    monkeypatch.setattr(docker, "from_env", from_env)
+    monkeypatch.setattr(docker_utils, "_docker_client", None)
+    assert docker_utils.get_docker_client() is docker_utils.get_docker_client()
+    from_env.assert_called_once()
+
+
+def test_check_backend_health(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(docker_utils.time, "monotonic", lambda: now[0])
+    health = MagicMock(side_effect=[ValueError, None, None])
+    monkeypatch.setattr(docker_utils.container, "health", health)
+    monkeypatch.setattr(docker_utils, "_backend_health_checked_at", {})
+
+    # failures aren't cached
+    with pytest.raises(ValueError):
+        docker_utils.check_backend_health("buildx")
+    docker_utils.check_backend_health("buildx")
+    docker_utils.check_backend_health("buildx")
+    assert health.call_count == 2
+
+    now[0] += docker_utils.BUILDX_HEALTH_CHECK_TTL
+    docker_utils.check_backend_health("buildx")
+    assert health.call_count == 3
+
+
+def test_limit_concurrent_builds():
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def build():
+        with docker_utils._build_slot():
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+    with docker_utils.limit_concurrent_builds(2):
+        threads = [threading.Thread(target=build) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert max(max_running) == 2
+    assert docker_utils._build_slots is None
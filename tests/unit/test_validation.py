@@ -0,0 +1,114 @@
+# pylint: disable=W0621
+import json
+import os
+from xml.etree import ElementTree
+
+import pytest
+from click.testing import CliRunner
+
+from bentoctl import validation
+from bentoctl.cli import bentoctl as bentoctl_cli
+from tests.conftest import TESTOP_PATH
+from tests.unit.test_deployment_config import (
+    INVALID_YAML,
+    VALID_YAML,
+    VALID_YAML_INVALID_SCHEMA,
+)
+
+
+@pytest.fixture
+def deployment_configs(tmp_path):
+    for region, content in [
+        ("us", VALID_YAML),
+        ("eu", VALID_YAML),
+        ("ap", VALID_YAML_INVALID_SCHEMA),
+        ("sa", INVALID_YAML),
+    ]:
+        config_dir = tmp_path / "models" / region
+        config_dir.mkdir(parents=True)
+        (config_dir / "deployment_config.yaml").write_text(content)
+    (tmp_path / "models" / "us" / "bentofile.yaml").write_text("service: svc")
+    return tmp_path
+
+
+@pytest.fixture
+def op_reg_with_testop(mock_operator_registry):
+    mock_operator_registry.install_operator(TESTOP_PATH)
+    yield mock_operator_registry
+
+
+def test_find_deployment_config_files(deployment_configs):
+    files = validation.find_deployment_config_files([str(deployment_configs)])
+    assert len(files) == 4
+    assert all(f.endswith("deployment_config.yaml") for f in files)
+
+    files = validation.find_deployment_config_files(
+        [os.path.join(str(deployment_configs), "models", "*", "*.yaml")]
+    )
+    assert len(files) == 5
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_validate_deployment_config_files(
+    deployment_configs, op_reg_with_testop, monkeypatch, max_workers
+):  # pylint: disable=W0613
+    monkeypatch.setattr(validation, "MIN_FILES_FOR_PROCESS_POOL", 0)
+    files = validation.find_deployment_config_files([str(deployment_configs)])
+    results = validation.validate_deployment_config_files(files, max_workers)
+
+    assert [r["path"] for r in results] == files
+    validity = {os.path.basename(os.path.dirname(r["path"])): r for r in results}
+    assert validity["us"]["valid"] and validity["eu"]["valid"]
+    assert not validity["ap"]["valid"]
+    assert "instances" in validity["ap"]["errors"][0]
+    assert not validity["sa"]["valid"]
+
+
+def test_validate_reports_operators_that_are_not_installed(
+    tmp_path, mock_operator_registry
+):  # pylint: disable=W0613
+    config_file = tmp_path / "deployment_config.yaml"
+    config_file.write_text(VALID_YAML)
+    result = validation.validate_deployment_config_file(str(config_file))
+    assert not result["valid"]
+    assert "not installed" in result["errors"][0]
+
+
+def test_reports():
+    results = [
+        {"path": "a.yaml", "valid": True, "errors": []},
+        {"path": "b.yaml", "valid": False, "errors": [{"spec": ["required"]}]},
+    ]
+    report = json.loads(validation.generate_json_report(results))
+    assert report["total"] == 2 and report["invalid"] == 1
+
+    testsuite = ElementTree.fromstring(validation.generate_junit_report(results))
+    assert testsuite.get("tests") == "2"
+    assert testsuite.get("failures") == "1"
+    assert len(testsuite.findall("testcase/failure")) == 1
+
+
+def test_cli_validate(deployment_configs, op_reg_with_testop, tmp_path):
+    # pylint: disable=W0613
+    runner = CliRunner()
+    report_file = tmp_path / "report.json"
+    result = runner.invoke(
+        bentoctl_cli,
+        [
+            "validate",
+            str(deployment_configs),
+            "--output",
+            "json",
+            "--output-file",
+            str(report_file),
+        ],
+    )
+    assert result.exit_code == 1
+    assert json.loads(report_file.read_text())["invalid"] == 2
+
+    result = runner.invoke(
+        bentoctl_cli,
+        ["validate", str(deployment_configs / "models" / "us")],
+    )
+    assert result.exit_code == 0
+    assert "1 deployment configs, 0 invalid" in result.output
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from click.testing import CliRunner
+
+from bentoctl.utils.build_fingerprint import (
+    compute_build_fingerprint,
+    get_build_record_path,
+    load_build_record,
+    save_build_record,
+)
+
+
+@pytest.fixture
+def deployment_config(tmp_path):
+    bento_path = tmp_path / "bento"
+    bento_path.mkdir()
+    (bento_path / "bento.yaml").write_text("creation_time: 1")
+    operator_path = tmp_path / "operator"
+    operator_path.mkdir()
+    (operator_path / "operator_config.py").write_text("OPERATOR_NAME = 'testop'")
+    return SimpleNamespace(
+        bento=SimpleNamespace(tag="testbento:v1", path=str(bento_path)),
+        operator=SimpleNamespace(version=None, path=operator_path),
+        operator_name="testop",
+        deployment_name="test",
+        template_type="terraform",
+        operator_spec={"region": "us-west-1", "image_tag": "repo:v1"},
+    )
+
+
+def test_build_fingerprint_is_stable(deployment_config):
+    buildx_options = {"platform": ["linux/amd64"]}
+    fingerprint = compute_build_fingerprint(deployment_config, buildx_options)
+    assert fingerprint == compute_build_fingerprint(deployment_config, buildx_options)
+
+    # the image tag is set by the build and doesn't change the image
+    deployment_config.operator_spec["image_tag"] = "repo:v2"
+    assert (
+        compute_build_fingerprint(deployment_config, buildx_options)["digest"]
+        == fingerprint["digest"]
+    )
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda c, tmp_path: c.operator_spec.update(region="eu-west-1"),
+        lambda c, tmp_path: (tmp_path / "bento" / "bento.yaml").write_text("v2"),
+        lambda c, tmp_path: (tmp_path / "operator" / "main.py").write_text(""),
+        lambda c, tmp_path: setattr(c.operator, "version", "1.1.0"),
+    ],
+)
+def test_build_fingerprint_changes(deployment_config, tmp_path, change):
+    buildx_options = {"platform": ["linux/amd64"]}
+    digest = compute_build_fingerprint(deployment_config, buildx_options)["digest"]
+    change(deployment_config, tmp_path)
+    assert (
+        compute_build_fingerprint(deployment_config, buildx_options)["digest"] != digest
+    )
+    assert (
+        compute_build_fingerprint(deployment_config, {"platform": ["linux/arm64"]})[
+            "digest"
+        ]
+        != digest
+    )
+
+
+def test_build_fingerprint_changes_with_model_layers(deployment_config):
+    digest = compute_build_fingerprint(deployment_config, {"model_layers": False})[
+        "digest"
+    ]
+    assert (
+        compute_build_fingerprint(deployment_config, {"model_layers": True})["digest"]
+        != digest
+    )
+
+
+def test_cli_build_fingerprint_options(monkeypatch):
+    import bentoctl.cli
+    from bentoctl import deployment_config
+
+    build_options = []
+
+    def fingerprint(_, options):
+        build_options.append(options)
+        raise RuntimeError
+
+    monkeypatch.setattr(bentoctl.cli, "compute_build_fingerprint", fingerprint)
+    monkeypatch.setattr(deployment_config, "DeploymentConfig", MagicMock())
+    args = ["build", "-b", "testbento:latest", "--incremental"]
+    CliRunner().invoke(bentoctl.cli.bentoctl, [*args, "--model-layers"])
+    CliRunner().invoke(bentoctl.cli.bentoctl, args)
+    assert [options["model_layers"] for options in build_options] == [True, False]
+
+
+def test_build_record(tmp_path):
+    record_path = get_build_record_path(str(tmp_path / "deployment_config.yaml"))
+    assert record_path == str(tmp_path / ".deployment_config.yaml.build.json")
+    assert load_build_record(record_path) is None
+
+    save_build_record(record_path, {"fingerprint": "abc", "image_id": "sha256:1"})
+    assert load_build_record(record_path) == {
+        "fingerprint": "abc",
+        "image_id": "sha256:1",
+    }
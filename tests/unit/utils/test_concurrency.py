@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from bentoctl.utils.concurrency import run_in_background
+from bentoctl.utils.timings import record_timings, span
+
+
+def create_repository():
+    with span("create_repository"):
+        return "repository_url"
+
+
+def test_run_in_background():
+    with record_timings("build") as timings:
+        with run_in_background(create_repository) as future:
+            with span("buildx_build"):
+                pass
+            assert future.result() == "repository_url"
+
+    assert sorted(s["name"] for s in timings.spans) == [
+        "buildx_build",
+        "create_repository",
+    ]
+    assert all(s["parent"] is None for s in timings.spans)
+
+
+def test_run_in_background_waits_when_block_fails():
+    started = threading.Event()
+    finished = threading.Event()
+
+    def slow():
+        started.set()
+        finished.wait(timeout=0.1)
+        finished.set()
+
+    with pytest.raises(ValueError):
+        with run_in_background(slow):
+            started.wait()
+            raise ValueError
+    assert finished.is_set()
@@ -0,0 +1,157 @@
+# pylint: disable=W0621
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from bentoctl import deployment_config as dconf
+from bentoctl import docker_utils
+from bentoctl.docker_utils import DOCKERFILE_PATH, prepare_deployable
+from bentoctl.utils.model_layers import add_model_layers
+from bentoctl.utils.staging import STAGING_STRATEGY_COPY
+from tests.conftest import TESTOP_PATH
+
+# the parts of a bento Dockerfile generated by bentoml that matter here
+BENTO_DOCKERFILE = """\
+FROM python:3.9-slim as base-container
+WORKDIR $BENTO_PATH
+COPY --chown=bentoml:bentoml ./env/python ./env/python/
+RUN bash -euxo pipefail /home/bentoml/bento/env/python/install.sh
+COPY --chown=bentoml:bentoml . ./
+USER bentoml
+"""
+
+
+def test_add_model_layers(tmp_path):
+    dockerfile = tmp_path / "Dockerfile"
+    dockerfile.write_text(BENTO_DOCKERFILE)
+    build_contexts = add_model_layers(
+        str(dockerfile),
+        [("models/b_model/v2", "/staging/b"), ("models/a_model/v1", "/staging/a")],
+    )
+    assert build_contexts == {
+        "bentoctl-model-a-model-v1": "/staging/a",
+        "bentoctl-model-b-model-v2": "/staging/b",
+    }
+    lines = dockerfile.read_text().splitlines()
+    assert lines[4:7] == [
+        "COPY --from=bentoctl-model-a-model-v1 --link --chown=bentoml:bentoml "
+        ". ./models/a_model/v1/",
+        "COPY --from=bentoctl-model-b-model-v2 --link --chown=bentoml:bentoml "
+        ". ./models/b_model/v2/",
+        "COPY --chown=bentoml:bentoml . ./",
+    ]
+
+
+def test_add_model_layers_unknown_dockerfile(tmp_path):
+    dockerfile = tmp_path / "Dockerfile"
+    dockerfile.write_text("FROM scratch\nCOPY service.py ./\n")
+    assert add_model_layers(str(dockerfile), [("models/m/v1", "/staging/m")]) is None
+    assert dockerfile.read_text() == "FROM scratch\nCOPY service.py ./\n"
+
+
+def _tree_contents(path):
+    contents = {}
+    for root, _, files in os.walk(path):
+        for filename in files:
+            file_path = os.path.join(root, filename)
+            with open(file_path, "rb") as f:
+                contents[os.path.relpath(file_path, path)] = f.read()
+    return contents
+
+
+@pytest.fixture
+def bento_with_model(tmp_path, monkeypatch):
+    bento_path = tmp_path / "bento"
+    os.makedirs(bento_path / "env" / "docker")
+    os.makedirs(bento_path / "env" / "python")
+    (bento_path / "env" / "docker" / "Dockerfile").write_text(BENTO_DOCKERFILE)
+    (bento_path / "env" / "python" / "requirements.txt").write_text("scikit-learn")
+    (bento_path / "service.py").write_text("svc = 1")
+    model_path = tmp_path / "model"
+    model_path.mkdir()
+    (model_path / "saved_model.pkl").write_bytes(os.urandom(1024))
+
+    model_info = SimpleNamespace(tag=SimpleNamespace(path=lambda: "iris_clf/v1"))
+    monkeypatch.setattr(
+        dconf, "get_model", lambda _: SimpleNamespace(path=str(model_path))
+    )
+    monkeypatch.setattr(dconf, "get_bento_metadata", lambda _: {})
+    return SimpleNamespace(
+        tag="iris_classifier:v1",
+        path=str(bento_path),
+        info=SimpleNamespace(models=[model_info]),
+    )
+
+
+@pytest.fixture
+def config(mock_operator_registry, bento_with_model):
+    mock_operator_registry.install_operator(TESTOP_PATH)
+    config = dconf.DeploymentConfig(
+        {
+            "api_version": "v1",
+            "name": "test",
+            "operator": {"name": "testop"},
+            "template": "terraform",
+            "spec": {"project_id": "test", "instances": {"min": 1, "max": 2}},
+        }
+    )
+    config.bento = bento_with_model
+    return config
+
+
+def test_model_layers_are_stable_across_code_changes(config, bento_with_model):
+    def build():
+        with prepare_deployable(config, cleanup=True, model_layers=True) as (
+            context_path,
+            build_contexts,
+        ):
+            # the models are not part of the main build context
+            assert not os.path.exists(os.path.join(context_path, "models"))
+            with open(
+                os.path.join(context_path, DOCKERFILE_PATH), encoding="utf-8"
+            ) as f:
+                dockerfile = f.read()
+            model_contexts = {
+                name: _tree_contents(path) for name, path in build_contexts.items()
+            }
+            return dockerfile, model_contexts
+
+    dockerfile, model_contexts = build()
+    assert dockerfile.splitlines()[4:6] == [
+        "COPY --from=bentoctl-model-iris-clf-v1 --link --chown=bentoml:bentoml "
+        ". ./models/iris_clf/v1/",
+        "COPY --chown=bentoml:bentoml . ./",
+    ]
+    assert list(model_contexts["bentoctl-model-iris-clf-v1"]) == ["saved_model.pkl"]
+
+    # changing the code doesn't change the model layers: the same `COPY --link`
+    # instructions from build contexts with the same files.
+    with open(os.path.join(bento_with_model.path, "service.py"), "w") as f:
+        f.write("svc = 2")
+    assert build() == (dockerfile, model_contexts)
+
+
+def test_model_layers_fallback_uses_staging_strategy(
+    config, bento_with_model, monkeypatch
+):
+    dockerfile = os.path.join(bento_with_model.path, "env", "docker", "Dockerfile")
+    with open(dockerfile, "w", encoding="utf-8") as f:
+        f.write("FROM scratch\nCOPY service.py ./\n")
+    staged = []
+    stage_tree = docker_utils.stage_tree
+    monkeypatch.setattr(
+        docker_utils,
+        "stage_tree",
+        lambda *args: staged.append(args) or stage_tree(*args),
+    )
+
+    with prepare_deployable(
+        config, cleanup=True, staging_strategy=STAGING_STRATEGY_COPY, model_layers=True
+    ) as (context_path, build_contexts):
+        assert build_contexts == {}
+        model_file = os.path.join(
+            context_path, "models", "iris_clf", "v1", "saved_model.pkl"
+        )
+        assert os.path.exists(model_file)
+    assert [strategy for _, _, strategy in staged] == [STAGING_STRATEGY_COPY]
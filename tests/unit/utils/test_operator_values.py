@@ -0,0 +1,61 @@
+import os
+import stat
+
+import pytest
+
+from bentoctl.utils.operator_helpers.generate import Generate
+from bentoctl.utils.operator_helpers.values import DeploymentValues
+
+
+def test_terraform_tfvars_only_written_on_change(tmp_path):
+    values_file = tmp_path / "bentoctl.tfvars"
+    spec = {"region": "us-west-1", "memory": 512, "env": {"A": "1"}, "debug": True}
+
+    values = DeploymentValues("test", dict(spec), "terraform")
+    assert values.to_params_file(str(values_file)) is True
+    assert values_file.read_text().endswith(
+        'deployment_name = "test"\nregion = "us-west-1"\nmemory = "512"\n'
+        'env = {"A": "1"}\ndebug = true\n'
+    )
+
+    os.utime(values_file, (0, 0))
+    values = DeploymentValues("test", dict(spec), "terraform")
+    assert values.to_params_file(str(values_file)) is False
+    assert values_file.stat().st_mtime == 0
+
+    values = DeploymentValues("test", {**spec, "memory": 1024}, "terraform")
+    assert values.to_params_file(str(values_file)) is True
+    assert 'memory = "1024"' in values_file.read_text()
+    assert values_file.stat().st_mtime != 0
+    assert os.listdir(tmp_path) == ["bentoctl.tfvars"]
+
+
+def test_generate_values_keeps_unchanged_file(tmp_path):
+    spec = {"image_tag": "registry/repo:v1", "region": "us-west-1"}
+    values_file = Generate.generate_terraform_values("test", dict(spec), tmp_path)
+    os.utime(values_file, (0, 0))
+    assert Generate.generate_terraform_values("test", dict(spec), tmp_path) == (
+        values_file
+    )
+    assert os.stat(values_file).st_mtime == 0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="no POSIX file modes on Windows")
+def test_terraform_tfvars_keeps_file_mode(tmp_path):
+    values_file = tmp_path / "bentoctl.tfvars"
+    values_file.write_text("")
+    os.chmod(values_file, 0o640)
+    values = DeploymentValues("test", {"region": "us-west-1"}, "terraform")
+    assert values.to_params_file(str(values_file)) is True
+    assert stat.S_IMODE(values_file.stat().st_mode) == 0o640
+
+
+def test_terraform_tfvars_removes_tmp_file_on_error(tmp_path, monkeypatch):
+    def fail(*_):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    values = DeploymentValues("test", {"region": "us-west-1"}, "terraform")
+    with pytest.raises(OSError):
+        values.to_params_file(str(tmp_path / "bentoctl.tfvars"))
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,275 @@
+import base64
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from bentoctl import docker_utils
+from bentoctl.utils.registry import (
+    DOCKER_HUB_API_HOST,
+    RegistryClient,
+    parse_image_name,
+)
+
+MANIFEST_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+INDEX_MEDIA_TYPE = "application/vnd.oci.image.index.v1+json"
+
+
+def _digest(data: bytes) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+class FakeRegistry:
+    """
+    The parts of the registry:2 API used by RegistryClient, with an optional
+    token server that only accepts the given credentials.
+    """
+
+    def __init__(self, credentials=None):
+        self.credentials = credentials
+        self.token = "secret-token"
+        self.blobs = {}
+        self.manifests = {}
+        self.requests = []
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                registry.handle(self, send_body=False)
+
+            def do_GET(self):
+                registry.handle(self, send_body=True)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def add_blob(self, repository, data: bytes) -> str:
+        digest = _digest(data)
+        self.blobs[(repository, digest)] = data
+        return digest
+
+    def add_manifest(self, repository, tag, manifest) -> str:
+        data = json.dumps(manifest).encode()
+        digest = _digest(data)
+        self.manifests[(repository, tag)] = self.manifests[(repository, digest)] = (
+            manifest["mediaType"],
+            data,
+        )
+        return digest
+
+    def push_image(self, repository, tag, layers, os_name="linux", arch="amd64"):
+        """
+        Adds an image whose layers are (diff_id, compressed blob) pairs.
+        """
+        config = {
+            "os": os_name,
+            "architecture": arch,
+            "rootfs": {"type": "layers", "diff_ids": [d for d, _ in layers]},
+        }
+        config_data = json.dumps(config).encode()
+        config_digest = self.add_blob(repository, config_data)
+        manifest = {
+            "schemaVersion": 2,
+            "mediaType": MANIFEST_MEDIA_TYPE,
+            "config": {"digest": config_digest, "size": len(config_data)},
+            "layers": [
+                {"digest": self.add_blob(repository, blob), "size": len(blob)}
+                for _, blob in layers
+            ],
+        }
+        return config_digest, self.add_manifest(repository, tag, manifest)
+
+    def _send(self, handler, status, headers=None, body=b"", send_body=True):
+        handler.send_response(status)
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(body)
+
+    def handle(self, handler, send_body):
+        self.requests.append((handler.command, handler.path))
+        if handler.path.startswith("/token"):
+            credentials = ":".join(self.credentials).encode()
+            expected = f"Basic {base64.b64encode(credentials).decode()}"
+            if handler.headers.get("Authorization") != expected:
+                return self._send(handler, 401)
+            body = json.dumps({"token": self.token}).encode()
+            return self._send(handler, 200, body=body)
+
+        authorization = handler.headers.get("Authorization")
+        if self.credentials is not None and authorization != f"Bearer {self.token}":
+            challenge = (
+                f'Bearer realm="http://{self.host}/token",service="fake-registry"'
+            )
+            return self._send(
+                handler, 401, {"WWW-Authenticate": challenge}, send_body=send_body
+            )
+
+        repository, kind, reference = handler.path[len("/v2/") :].rsplit("/", 2)
+        if kind == "blobs" and (repository, reference) in self.blobs:
+            data = self.blobs[(repository, reference)]
+            return self._send(handler, 200, body=data, send_body=send_body)
+        if kind == "manifests" and (repository, reference) in self.manifests:
+            media_type, data = self.manifests[(repository, reference)]
+            headers = {
+                "Content-Type": media_type,
+                "Docker-Content-Digest": _digest(data),
+            }
+            return self._send(handler, 200, headers, data, send_body=send_body)
+        return self._send(handler, 404, send_body=send_body)
+
+
+@pytest.mark.parametrize(
+    "image_name, expected",
+    [
+        ("localhost:5000/repo:v1", ("localhost:5000", "repo", "v1")),
+        ("gcr.io/project/repo", ("gcr.io", "project/repo", "latest")),
+        ("user/repo:v1", (DOCKER_HUB_API_HOST, "user/repo", "v1")),
+        ("repo", (DOCKER_HUB_API_HOST, "library/repo", "latest")),
+        ("gcr.io/repo@sha256:abc", ("gcr.io", "repo", "sha256:abc")),
+    ],
+)
+def test_parse_image_name(image_name, expected):
+    assert parse_image_name(image_name, DOCKER_HUB_API_HOST) == expected
+
+
+@pytest.mark.parametrize("credentials", [None, ("user", "pass")])
+def test_missing_blobs(credentials):
+    with FakeRegistry(credentials) as registry:
+        existing = [registry.add_blob("repo", f"{i}".encode()) for i in range(10)]
+        missing = [_digest(b"missing-1"), _digest(b"missing-2")]
+        client = RegistryClient(registry.host, *(credentials or ()))
+        assert client.missing_blobs("repo", existing + missing) == set(missing)
+        assert client.missing_blobs("other", existing[:1]) == set(existing[:1])
+        assert client.missing_blobs("repo", []) == set()
+        if credentials is not None:
+            assert sum(path.startswith("/token") for _, path in registry.requests) == 2
+
+
+def test_missing_blobs_wrong_credentials():
+    with FakeRegistry(("user", "pass")) as registry:
+        client = RegistryClient(registry.host, "user", "wrong")
+        with pytest.raises(requests.HTTPError):
+            client.missing_blobs("repo", [registry.add_blob("repo", b"layer")])
+
+
+def test_get_image_manifest():
+    with FakeRegistry() as registry:
+        _, amd64 = registry.push_image("repo", "amd64", [("sha256:a", b"a")])
+        _, arm64 = registry.push_image(
+            "repo", "arm64", [("sha256:b", b"b")], arch="arm64"
+        )
+        registry.add_manifest(
+            "repo",
+            "v1",
+            {
+                "schemaVersion": 2,
+                "mediaType": INDEX_MEDIA_TYPE,
+                "manifests": [
+                    {"digest": d, "platform": {"os": "linux", "architecture": a}}
+                    for d, a in [(amd64, "amd64"), (arm64, "arm64")]
+                ],
+            },
+        )
+        client = RegistryClient(registry.host)
+        assert client.get_image_manifest("repo", "v1", "linux", "arm64")[1] == arm64
+        assert client.get_image_manifest("repo", "amd64", "linux", "amd64")[1] == (
+            amd64
+        )
+        assert client.get_image_manifest("repo", "v1", "windows", "amd64") is None
+        assert client.get_image_manifest("repo", "v2", "linux", "amd64") is None
+
+
+@pytest.fixture
+def local_image(monkeypatch):
+    """
+    A local image with 3 layers, the first two of them from a previous build.
+    """
+    image = MagicMock()
+    image.id = "sha256:local-image"
+    image.attrs = {
+        "Os": "linux",
+        "Architecture": "amd64",
+        "RootFS": {"Layers": ["sha256:base", "sha256:deps", "sha256:bento"]},
+    }
+    # newest first, with an instruction that doesn't create a layer
+    image.history.return_value = [
+        {"Size": 300},
+        {"Size": 0},
+        {"Size": 200},
+        {"Size": 100},
+    ]
+    client = MagicMock()
+    client.images.get.return_value = image
+    monkeypatch.setattr(docker_utils, "get_docker_client", lambda: client)
+    return image
+
+
+def test_plan_image_push(local_image):
+    with FakeRegistry(("user", "pass")) as registry:
+        registry.push_image(
+            "repo", "previous", [("sha256:base", b"base"), ("sha256:deps", b"dep")]
+        )
+        plan = docker_utils.plan_image_push(
+            f"{registry.host}/repo:local",
+            f"{registry.host}/repo:new",
+            "user",
+            "pass",
+            previous_image_tags=[f"{registry.host}/repo:previous"],
+        )
+        assert [layer.in_repository for layer in plan.layers] == [True, True, False]
+        # compressed sizes from the registry, uncompressed for the new layer
+        assert [layer.size for layer in plan.layers] == [4, 3, 300]
+        assert plan.upload_size == 300
+        assert plan.image_digest is None
+        assert plan.summary() == (
+            "2/3 layers already in the repository, up to 300.0B to upload"
+        )
+
+        # without the previous build nothing is known to be in the repository
+        plan = docker_utils.plan_image_push(
+            "repo:local", f"{registry.host}/repo:new", "user", "pass"
+        )
+        assert plan.upload_size == 600
+
+
+def test_plan_image_push_existing_image(local_image):
+    with FakeRegistry() as registry:
+        config_digest, manifest_digest = registry.push_image(
+            "repo",
+            "v1",
+            [("sha256:base", b"b"), ("sha256:deps", b"d"), ("sha256:bento", b"e")],
+        )
+        local_image.id = config_digest
+        plan = docker_utils.plan_image_push("repo:local", f"{registry.host}/repo:v1")
+        assert plan.image_digest == manifest_digest
+        assert plan.missing_layers == []
+
+        # the image is only complete if its blobs are still there
+        del registry.blobs[("repo", _digest(b"e"))]
+        plan = docker_utils.plan_image_push("repo:local", f"{registry.host}/repo:v1")
+        assert plan.image_digest is None
+        assert len(plan.missing_layers) == 1
+
+
+def test_plan_image_push_registry_unavailable(local_image):
+    with FakeRegistry() as registry:
+        host = registry.host
+    assert docker_utils.plan_image_push("repo:local", f"{host}/repo:v1") is None
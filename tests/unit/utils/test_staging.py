@@ -0,0 +1,119 @@
+import errno
+import os
+
+import pytest
+
+from bentoctl.utils import staging
+
+
+@pytest.fixture
+def src_tree(tmp_path):
+    src = tmp_path / "src"
+    (src / "env" / "docker").mkdir(parents=True)
+    (src / "env" / "docker" / "Dockerfile").write_text("FROM scratch")
+    (src / "models").mkdir()
+    (src / "models" / "weights.bin").write_bytes(os.urandom(1024))
+    return src
+
+
+def _relative_files(path):
+    return sorted(
+        os.path.relpath(os.path.join(root, f), path)
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+@pytest.mark.parametrize("strategy", staging.STAGING_STRATEGIES)
+def test_stage_tree(src_tree, tmp_path, strategy):
+    dst = tmp_path / "dst"
+    stats = staging.stage_tree(str(src_tree), str(dst), strategy)
+
+    assert sum(stats.values()) == 2
+    assert _relative_files(dst) == _relative_files(src_tree)
+    assert (dst / "models" / "weights.bin").read_bytes() == (
+        src_tree / "models" / "weights.bin"
+    ).read_bytes()
+    if strategy == staging.STAGING_STRATEGY_HARDLINK:
+        assert stats == {staging.STAGING_STRATEGY_HARDLINK: 2}
+        assert os.path.samefile(
+            dst / "env/docker/Dockerfile", src_tree / "env/docker/Dockerfile"
+        )
+    elif strategy == staging.STAGING_STRATEGY_COPY:
+        assert stats == {staging.STAGING_STRATEGY_COPY: 2}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks need privileges on Windows")
+def test_stage_tree_follows_symlinked_directories(src_tree, tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "utils.py").write_text("x = 1")
+    os.symlink(shared, src_tree / "shared")
+    # a link to a parent directory is skipped instead of recursing forever
+    os.symlink(src_tree, src_tree / "env" / "loop")
+
+    dst = tmp_path / "dst"
+    staging.stage_tree(str(src_tree), str(dst))
+    assert (dst / "shared" / "utils.py").read_text() == "x = 1"
+    assert not (dst / "shared").is_symlink()
+    assert not (dst / "env" / "loop").exists()
+
+
+def test_stage_file_falls_back_to_copy_across_filesystems(
+    src_tree, tmp_path, monkeypatch
+):
+    def cross_device_link(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link", src)
+
+    monkeypatch.setattr(os, "link", cross_device_link)
+    monkeypatch.setattr(staging, "_reflink_file", cross_device_link)
+    src_file = str(src_tree / "models" / "weights.bin")
+    for strategy in staging.STAGING_STRATEGIES:
+        dst_file = str(tmp_path / f"weights-{strategy}.bin")
+        assert staging.stage_file(src_file, dst_file, strategy) == "copy"
+        assert not os.path.samefile(src_file, dst_file)
+
+
+def test_stage_file_invalid_strategy(src_tree, tmp_path):
+    with pytest.raises(ValueError):
+        staging.stage_file(
+            str(src_tree / "models" / "weights.bin"), str(tmp_path / "dst"), "symlink"
+        )
+
+
+def test_stage_trees(src_tree, tmp_path):
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    for i in range(10):
+        (model_dir / f"shard-{i}.bin").write_bytes(os.urandom(4096))
+    dst = tmp_path / "dst"
+
+    stats = staging.stage_trees(
+        [(str(src_tree), str(dst)), (str(model_dir), str(dst / "models" / "m"))],
+        staging.STAGING_STRATEGY_COPY,
+        max_workers=4,
+        labels=["bento", "model"],
+        show_progress=True,
+    )
+    assert stats == {staging.STAGING_STRATEGY_COPY: 12}
+    for i in range(10):
+        assert (dst / "models" / "m" / f"shard-{i}.bin").read_bytes() == (
+            model_dir / f"shard-{i}.bin"
+        ).read_bytes()
+
+
+def test_copy_file_falls_back_without_copy_file_range(tmp_path, monkeypatch):
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(3 * 1024))
+    src.chmod(0o755)
+    monkeypatch.setattr(staging, "COPY_CHUNK_SIZE", 1024)
+    staging._copy_file(str(src), str(tmp_path / "chunked.bin"))
+    assert (tmp_path / "chunked.bin").read_bytes() == src.read_bytes()
+    assert os.stat(tmp_path / "chunked.bin").st_mode == os.stat(src).st_mode
+
+    def unsupported(*_):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    staging._copy_file(str(src), str(tmp_path / "fallback.bin"))
+    assert (tmp_path / "fallback.bin").read_bytes() == src.read_bytes()
@@ -0,0 +1,134 @@
+# pylint: disable=W0621
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from bentoctl.cli import bentoctl as bentoctl_cli
+from bentoctl.exceptions import BentoctlException
+from bentoctl.utils import staging_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return staging_cache.StagingCache(tmp_path / "cache")
+
+
+def make_tree(path, files):
+    path.mkdir(parents=True)
+    for name, content in files.items():
+        (path / name).write_bytes(content)
+    return str(path)
+
+
+def count_objects(cache):
+    return sum(len(files) for _, _, files in os.walk(cache.objects_dir))
+
+
+def test_stage_reuses_cached_trees(cache, tmp_path, monkeypatch):
+    bento = make_tree(tmp_path / "bento", {"bento.yaml": b"service: svc"})
+    model = make_tree(tmp_path / "model", {"a.bin": b"weights", "b.bin": b"weights"})
+    trees = [("bento:v1", bento, ""), ("model:v1", model, "models/m")]
+
+    cache.stage(trees, str(tmp_path / "first"))
+    # identical files are only stored once
+    assert count_objects(cache) == 2
+
+    added = []
+    add_object = cache._add_object
+    monkeypatch.setattr(
+        cache, "_add_object", lambda src: added.append(src) or add_object(src)
+    )
+    stats = cache.stage(trees, str(tmp_path / "second"))
+    assert added == []
+    assert stats == {"hardlink": 3}
+    assert (tmp_path / "second" / "models" / "m" / "b.bin").read_bytes() == b"weights"
+
+
+def test_stage_drops_modified_objects(cache, tmp_path):
+    model = make_tree(tmp_path / "model", {"a.bin": b"weights"})
+    trees = [("model:v1", model, "")]
+    cache.stage(trees, str(tmp_path / "first"))
+
+    # modifying the hardlinked file in place also modifies the cached object
+    with open(tmp_path / "first" / "a.bin", "ab") as f:
+        f.write(b"corrupted")
+    cache.stage(trees, str(tmp_path / "second"))
+    assert (tmp_path / "second" / "a.bin").read_bytes() == b"weights"
+
+
+def test_stage_restages_changed_source(cache, tmp_path):
+    bento = make_tree(tmp_path / "bento", {"bento.yaml": b"service: svc"})
+    trees = [("bento:v1", bento, "")]
+    cache.stage(trees, str(tmp_path / "first"))
+
+    # the bento is deleted and built again with the same version
+    os.remove(os.path.join(bento, "bento.yaml"))
+    os.rmdir(bento)
+    make_tree(tmp_path / "bento", {"bento.yaml": b"service: new_svc"})
+    cache.stage(trees, str(tmp_path / "second"))
+    assert (tmp_path / "second" / "bento.yaml").read_bytes() == b"service: new_svc"
+    assert (tmp_path / "first" / "bento.yaml").read_bytes() == b"service: svc"
+
+
+def test_prune(cache, tmp_path):
+    for i in range(3):
+        model = make_tree(tmp_path / f"model{i}", {"a.bin": bytes([i]) * 100})
+        cache.stage([(f"model:{i}", model, "")], str(tmp_path / f"staged{i}"))
+        os.utime(cache._entry_path(f"model:{i}"), (i, i))
+
+    assert cache.prune(max_size=250) == (1, 100)
+    assert cache._read_entry("model:0") is None
+    assert cache._read_entry("model:2") is not None
+
+    assert cache.prune() == (2, 200)
+    assert count_objects(cache) == 0
+
+
+def test_stage_prunes_to_max_size(tmp_path):
+    cache = staging_cache.StagingCache(tmp_path / "cache", max_size=150)
+    for i in range(3):
+        model = make_tree(tmp_path / f"model{i}", {"a.bin": bytes([i]) * 100})
+        cache.stage([(f"model:{i}", model, "")], str(tmp_path / f"staged{i}"))
+    assert count_objects(cache) == 1
+    assert cache._read_entry("model:2") is not None
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        ("1024", 1024),
+        ("1K", 1024),
+        ("1.5MB", int(1.5 * 1024**2)),
+        ("20GiB", 20 * 1024**3),
+    ],
+)
+def test_parse_size(size, expected):
+    assert staging_cache.parse_size(size) == expected
+
+
+def test_parse_size_invalid():
+    with pytest.raises(BentoctlException):
+        staging_cache.parse_size("lots")
+
+
+def test_cli_cache_prune(tmp_path, monkeypatch):
+    monkeypatch.setenv("BENTOCTL_HOME", str(tmp_path / "bentoctl"))
+    cache = staging_cache.get_staging_cache()
+    model = make_tree(tmp_path / "model", {"a.bin": b"weights"})
+    cache.stage([("model:v1", model, "")], str(tmp_path / "staged"))
+
+    result = CliRunner().invoke(bentoctl_cli, ["cache", "prune", "--do-not-track"])
+    assert result.exit_code == 0
+    assert "Removed 1 staging cache entries" in result.output
+    assert count_objects(cache) == 0
+
+
+def test_cli_cache_prune_invalid_max_size(tmp_path, monkeypatch):
+    monkeypatch.setenv("BENTOCTL_HOME", str(tmp_path / "bentoctl"))
+    result = CliRunner().invoke(
+        bentoctl_cli, ["cache", "prune", "--max-size", "10QB", "--do-not-track"]
+    )
+    # reported as a bentoctl error instead of a traceback
+    assert result.exception is None
+    assert "Invalid size '10QB'" in result.output
@@ -0,0 +1,277 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from bentoctl.exceptions import BentoctlException
+from bentoctl.utils import terraform
+from bentoctl.utils.terraform import (
+    compute_apply_hash,
+    get_local_state_path,
+    get_terraform_env,
+    is_terraform_applied,
+    read_state_outputs,
+    terraform_apply,
+    terraform_destroy,
+    terraform_init,
+    terraform_output,
+    terraform_run_json,
+)
+
+
+def _write_json(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(content, f)
+
+
+@pytest.fixture
+def terraform_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("TF_WORKSPACE", raising=False)
+    monkeypatch.delenv("TF_DATA_DIR", raising=False)
+
+    def terraform_run(*args, **kwargs):
+        raise AssertionError("terraform should not be run")
+
+    monkeypatch.setattr(terraform, "terraform_run", terraform_run)
+    return tmp_path
+
+
+def test_get_local_state_path(terraform_dir, monkeypatch):
+    assert get_local_state_path() == "terraform.tfstate"
+
+    _write_json(".terraform/terraform.tfstate", {"backend": {"type": "local"}})
+    with open(".terraform/environment", "w", encoding="utf-8") as f:
+        f.write("staging")
+    assert get_local_state_path() == os.path.join(
+        "terraform.tfstate.d", "staging", "terraform.tfstate"
+    )
+
+    monkeypatch.setenv("TF_WORKSPACE", "default")
+    _write_json(
+        ".terraform/terraform.tfstate",
+        {"backend": {"type": "local", "config": {"path": "state/bento.tfstate"}}},
+    )
+    assert get_local_state_path() == "state/bento.tfstate"
+
+    _write_json(".terraform/terraform.tfstate", {"backend": {"type": "s3"}})
+    assert get_local_state_path() is None
+
+
+def test_terraform_output_from_local_state(terraform_dir):
+    assert terraform_output() == {}
+    assert not is_terraform_applied()
+
+    outputs = {"endpoint": {"value": "https://bento.example.com", "type": "string"}}
+    _write_json("terraform.tfstate", {"version": 4, "outputs": outputs})
+    assert terraform_output() == outputs
+    assert is_terraform_applied()
+
+    # destroyed, the state is rewritten without outputs
+    _write_json("terraform.tfstate", {"version": 4, "outputs": {}})
+    assert not is_terraform_applied()
+
+
+def test_read_state_outputs_cache(terraform_dir, monkeypatch):
+    _write_json("terraform.tfstate", {"outputs": {"a": {"value": 1}}})
+    assert read_state_outputs("terraform.tfstate") == {"a": {"value": 1}}
+
+    def fail_to_load(*args, **kwargs):
+        raise AssertionError("the state should not be parsed again")
+
+    with monkeypatch.context() as m:
+        m.setattr(terraform.json, "load", fail_to_load)
+        assert read_state_outputs("terraform.tfstate") == {"a": {"value": 1}}
+
+    with open("terraform.tfstate", "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert read_state_outputs("terraform.tfstate") is None
+
+
+def test_terraform_output_remote_backend(terraform_dir, monkeypatch):
+    _write_json(".terraform/terraform.tfstate", {"backend": {"type": "gcs"}})
+    calls = []
+
+    def terraform_run(cmd, return_output=False):
+        calls.append(cmd)
+        return 0, json.dumps({"endpoint": {"value": "x"}}), ""
+
+    monkeypatch.setattr(terraform, "terraform_run", terraform_run)
+    assert is_terraform_applied()
+    assert calls == [["output", "-json"]]
+
+
+FAKE_TERRAFORM = """#!{python}
+import json, sys
+print("Initializing...")
+for event_type, elapsed in [("apply_start", 0), ("apply_complete", 42)]:
+    hook = {{"resource": {{"addr": "aws_s3_bucket.b"}}, "action": "create"}}
+    hook["elapsed_seconds"] = elapsed
+    print(json.dumps({{"type": event_type, "hook": hook}}), flush=True)
+print(json.dumps({{"type": "change_summary", "@message": "Apply complete!"}}))
+with open("args.json", "w") as f:
+    json.dump(sys.argv[1:], f)
+sys.exit({exit_code})
+"""
+
+
+def _install_fake_terraform(tmp_path, monkeypatch, exit_code=0):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    script = bin_dir / "terraform"
+    script.write_text(FAKE_TERRAFORM.format(python=sys.executable, exit_code=exit_code))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_terraform_run_json(terraform_dir, monkeypatch, capsys):
+    _install_fake_terraform(terraform_dir, monkeypatch)
+    terraform_run_json(["apply", "-auto-approve"], events_file="events.jsonl")
+
+    with open("args.json", encoding="utf-8") as f:
+        assert json.load(f) == ["apply", "-auto-approve", "-json"]
+    with open("events.jsonl", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+    assert [e["type"] for e in events] == [
+        "log",
+        "apply_start",
+        "apply_complete",
+        "change_summary",
+    ]
+    output = capsys.readouterr().out
+    assert "aws_s3_bucket.b: create complete after 42s" in output
+    assert "Slowest resources" in output
+
+    _install_fake_terraform(terraform_dir, monkeypatch, exit_code=1)
+    with pytest.raises(BentoctlException, match="terraform apply failed"):
+        terraform_run_json(["apply", "-auto-approve"])
+
+
+FAKE_TERRAFORM_INIT = """#!{python}
+import json, os
+print("Initializing provider plugins...")
+print("- Using hashicorp/aws v5.31.0 from the shared cache directory")
+print("- Installed hashicorp/random v3.6.0 (signed by HashiCorp)")
+with open("env.json", "w") as f:
+    json.dump(dict(os.environ), f)
+"""
+
+
+def test_get_terraform_env(terraform_dir, monkeypatch):
+    monkeypatch.setenv("BENTOCTL_HOME", str(terraform_dir / "home"))
+    monkeypatch.delenv("TF_PLUGIN_CACHE_DIR", raising=False)
+    monkeypatch.delenv("TF_CLI_CONFIG_FILE", raising=False)
+
+    env = get_terraform_env()
+    plugin_cache_dir = terraform_dir / "home" / "terraform" / "plugin-cache"
+    assert env["TF_PLUGIN_CACHE_DIR"] == str(plugin_cache_dir)
+    assert plugin_cache_dir.is_dir()
+    assert "TF_CLI_CONFIG_FILE" not in env
+
+    env = get_terraform_env(provider_mirror="mirror")
+    with open(env["TF_CLI_CONFIG_FILE"], encoding="utf-8") as f:
+        assert json.dumps(str(terraform_dir / "mirror")) in f.read()
+
+    # the user's own settings win
+    monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", "/cache")
+    monkeypatch.setenv("TF_CLI_CONFIG_FILE", "/terraformrc")
+    env = get_terraform_env(provider_mirror="mirror")
+    assert env["TF_PLUGIN_CACHE_DIR"] == "/cache"
+    assert env["TF_CLI_CONFIG_FILE"] == "/terraformrc"
+
+
+def test_terraform_init(terraform_dir, monkeypatch, capsys):
+    monkeypatch.setenv("BENTOCTL_HOME", str(terraform_dir / "home"))
+    monkeypatch.delenv("TF_PLUGIN_CACHE_DIR", raising=False)
+    bin_dir = terraform_dir / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "terraform"
+    script.write_text(FAKE_TERRAFORM_INIT.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    assert terraform_init() == {
+        "cached": ["hashicorp/aws v5.31.0"],
+        "installed": ["hashicorp/random v3.6.0"],
+        "reused": [],
+    }
+    output = capsys.readouterr().out
+    assert "Initializing provider plugins..." in output
+    assert "1 from the plugin cache, 1 downloaded" in output
+    with open("env.json", encoding="utf-8") as f:
+        env = json.load(f)
+    assert env["TF_PLUGIN_CACHE_DIR"].startswith(str(terraform_dir / "home"))
+
+
+@pytest.fixture
+def applied_terraform_dir(terraform_dir, monkeypatch):
+    """
+    An initialised terraform dir with local state, where `apply` bumps the
+    state serial.
+    """
+    os.mkdir(".terraform")
+    with open("main.tf", "w", encoding="utf-8") as f:
+        f.write('variable "image_tag" {}')
+    with open("bentoctl.tfvars", "w", encoding="utf-8") as f:
+        f.write('image_tag = "repo:v1"')
+    calls = []
+
+    def terraform_run(cmd, return_output=False):
+        calls.append(cmd[0])
+        state = {"lineage": "l1", "serial": calls.count("apply"), "outputs": {}}
+        _write_json("terraform.tfstate", state)
+        return 0
+
+    monkeypatch.setattr(terraform, "terraform_run", terraform_run)
+    return calls
+
+
+def test_compute_apply_hash(applied_terraform_dir):
+    apply_hash = compute_apply_hash({"repository_digest": "sha256:1"})
+    assert compute_apply_hash({"repository_digest": "sha256:1"}) == apply_hash
+    assert compute_apply_hash({"repository_digest": "sha256:2"}) != apply_hash
+    with open("bentoctl.tfvars", "w", encoding="utf-8") as f:
+        f.write('image_tag = "repo:v2"')
+    assert compute_apply_hash({"repository_digest": "sha256:1"}) != apply_hash
+
+
+def test_terraform_apply_skips_unchanged(applied_terraform_dir):
+    calls = applied_terraform_dir
+    assert terraform_apply(False)
+    assert not terraform_apply(False)
+    assert terraform_apply(False, force=True)
+    assert calls == ["apply", "apply"]
+
+    # a new image under the same tag
+    assert terraform_apply(False, apply_inputs={"repository_digest": "sha256:2"})
+    assert len(calls) == 3
+
+    # the state changed outside of bentoctl apply
+    _write_json("terraform.tfstate", {"lineage": "l1", "serial": 10})
+    assert terraform_apply(False, apply_inputs={"repository_digest": "sha256:2"})
+    assert len(calls) == 4
+
+    # destroy invalidates the last apply
+    terraform_destroy(False)
+    assert not os.path.exists(os.path.join(".terraform", "bentoctl_apply.json"))
+
+
+def test_terraform_apply_record_removes_tmp_file_on_error(
+    applied_terraform_dir, monkeypatch
+):
+    def fail(*_):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        terraform_apply(False)
+    assert os.listdir(".terraform") == []
+
+
+def test_terraform_apply_failed(applied_terraform_dir, monkeypatch):
+    monkeypatch.setattr(terraform, "terraform_run", lambda cmd: 1)
+    terraform_apply(False)
+    assert not os.path.exists(os.path.join(".terraform", "bentoctl_apply.json"))
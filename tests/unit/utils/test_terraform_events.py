@@ -0,0 +1,55 @@
+import io
+import json
+
+from bentoctl.utils.terraform_events import TerraformProgress, parse_event
+
+
+def _hook_event(event_type, address, elapsed_seconds=None):
+    hook = {"resource": {"addr": address}, "action": "create"}
+    if elapsed_seconds is not None:
+        hook["elapsed_seconds"] = elapsed_seconds
+    return {"type": event_type, "hook": hook}
+
+
+def test_parse_event():
+    assert parse_event('{"type": "version", "terraform": "1.5.0"}\n') == {
+        "type": "version",
+        "terraform": "1.5.0",
+    }
+    assert parse_event("panic: runtime error\n") == {
+        "type": "log",
+        "@level": "info",
+        "@message": "panic: runtime error",
+    }
+
+
+def test_terraform_progress():
+    events_file = io.StringIO()
+    progress = TerraformProgress(events_file)
+    events = [
+        {"type": "version", "terraform": "1.5.0"},
+        _hook_event("apply_start", "aws_lambda_function.fn"),
+        _hook_event("apply_start", "aws_iam_role.role"),
+        _hook_event("apply_complete", "aws_iam_role.role", 2),
+        _hook_event("apply_progress", "aws_lambda_function.fn", 10),
+        _hook_event("apply_errored", "aws_lambda_function.fn", 31),
+        {
+            "type": "diagnostic",
+            "diagnostic": {"severity": "error", "summary": "quota exceeded"},
+        },
+    ]
+    resources = [progress.update(event) for event in events]
+
+    assert resources[0] is None
+    assert resources[3]["status"] == "complete"
+    assert resources[4]["status"] == "running"
+    assert [r["address"] for r in progress.slowest_resources()] == [
+        "aws_lambda_function.fn",
+        "aws_iam_role.role",
+    ]
+    assert progress.resources["aws_lambda_function.fn"]["status"] == "errored"
+    assert progress.diagnostics == [{"severity": "error", "summary": "quota exceeded"}]
+
+    records = [json.loads(line) for line in events_file.getvalue().splitlines()]
+    assert [r["type"] for r in records] == [e["type"] for e in events]
+    assert all("elapsed_seconds" in r for r in records)
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from bentoctl.utils.timings import record_timings, span
+
+
+def test_spans_are_nested():
+    with record_timings("build") as timings:
+        with span("create_deployable"):
+            with span("stage_bento"):
+                pass
+        with span("push_docker_image"):
+            pass
+
+    assert [(s["name"], s["parent"], s["depth"]) for s in timings.spans] == [
+        ("create_deployable", None, 0),
+        ("stage_bento", "create_deployable", 1),
+        ("push_docker_image", None, 0),
+    ]
+    assert all(s["duration_ms"] <= timings.total_ms for s in timings.spans)
+
+
+def test_failed_span(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    with pytest.raises(ValueError):
+        with record_timings("build") as timings:
+            try:
+                with span("buildx_build"):
+                    raise ValueError
+            finally:
+                timings.write(timings_file)
+
+    report = json.loads(timings_file.read_text())
+    assert report["command"] == "build"
+    assert report["spans"][0]["name"] == "buildx_build"
+    assert report["spans"][0]["status"] == "error"
+
+
+def test_span_without_timings():
+    with span("generate") as record:
+        assert record is None